@@ -0,0 +1,95 @@
+# FIO/benchmarks/__main__.py
+"""
+Benchmark suite command line.
+
+    python -m benchmarks list
+    python -m benchmarks run [-k PATTERN] [--kind micro|macro] [-o results.json] [--baseline baseline.json]
+    python -m benchmarks compare baseline.json results.json [--threshold 0.10] [--stat p50]
+
+`compare` (and `run --baseline`) exit with status 1 when any benchmark regressed.
+"""
+
+import argparse
+import sys
+
+from benchmarks.harness import (REGRESSION, compare, format_comparison, load_results, run_all,
+                                save_results)
+
+
+def _list(args):
+    from benchmarks.suite import select
+    for benchmark in select(args.pattern, args.kind):
+        print(f"{benchmark.name:<34} {benchmark.kind:<6} {benchmark.description}")
+    return 0
+
+
+def _run(args):
+    from benchmarks.suite import select
+    from core.eventlog.event_log import event_log, NullSink
+    benchmarks = select(args.pattern, args.kind)
+    if not benchmarks:
+        print("No benchmarks match.", file=sys.stderr)
+        return 2
+    previous_sinks = event_log.set_sinks(NullSink())
+    try:
+        results = run_all(benchmarks, args.warmup, args.repeats)
+    finally:
+        event_log.set_sinks(*previous_sinks)
+    if args.output:
+        save_results(args.output, results)
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        # Only the selected benchmarks are compared
+        baseline["benchmarks"] = {name: stats for name, stats in baseline["benchmarks"].items()
+                                  if name in results["benchmarks"]}
+        return _report(baseline, results, args.threshold, args.stat)
+    return 0
+
+
+def _compare(args):
+    return _report(load_results(args.baseline), load_results(args.current), args.threshold, args.stat)
+
+
+def _report(baseline, current, threshold, stat):
+    rows = compare(baseline, current, threshold, stat)
+    print(format_comparison(rows, stat))
+    regressions = [row[0] for row in rows if row[1] == REGRESSION]
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("No regressions.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Smart city benchmark suite.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, handler in (("list", _list), ("run", _run)):
+        command = commands.add_parser(name)
+        command.add_argument("-k", dest="pattern", help="only benchmarks whose name contains PATTERN")
+        command.add_argument("--kind", choices=("micro", "macro"))
+        command.set_defaults(handler=handler)
+        if name == "run":
+            command.add_argument("-o", "--output", help="write results JSON to this path")
+            command.add_argument("--warmup", type=int, help="override warmup repeats")
+            command.add_argument("--repeats", type=int, help="override timed repeats")
+            command.add_argument("--baseline", help="compare against this results JSON afterwards")
+
+    command = commands.add_parser("compare")
+    command.add_argument("baseline")
+    command.add_argument("current")
+    command.set_defaults(handler=_compare)
+
+    for command in (commands.choices["run"], commands.choices["compare"]):
+        command.add_argument("--threshold", type=float, default=0.10,
+                             help="relative slowdown flagged as a regression (default 0.10)")
+        command.add_argument("--stat", default="p50", choices=("min", "mean", "p50", "p90", "p99", "max"))
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+# FIO/benchmarks/bench_brightness_controller.py
+
+import os
+import random
+import sys
+
+# Add the FIO directory to the path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.lighting.brightness_controller import BrightnessController
+
+LIGHTS = 1_000_000
+CHANGED_FRACTION = 0.01
+CONTROL_PERIOD_SECONDS = 1.0
+
+
+def run_benchmark(lights=LIGHTS, changed_fraction=CHANGED_FRACTION):
+    """Measures full and incremental control ticks against the 1-second control period."""
+    rng = random.Random(42)
+    controller = BrightnessController(lights, hour=21)
+    controller.load(rng.randbytes(lights), rng.randbytes(lights))
+
+    controller.tick()
+    full = controller.last_tick_seconds
+
+    changed = rng.sample(range(lights), int(lights * changed_fraction))
+    controller.update(changed, ambient=[rng.random() for _ in changed], traffic=[rng.random() for _ in changed])
+    controller.tick()
+    incremental = controller.last_tick_seconds
+
+    controller.set_hour(6)
+    controller.tick()
+    table_switch = controller.last_tick_seconds
+
+    print(f"Brightness controller, {lights:,} lights (control period {CONTROL_PERIOD_SECONDS:.0f}s):")
+    print(f"- full recompute:          {full * 1e3:8.1f} ms")
+    print(f"- incremental ({changed_fraction:.0%} dirty):  {incremental * 1e3:8.1f} ms")
+    print(f"- hour change (new table): {table_switch * 1e3:8.1f} ms")
+    return {"full": full, "incremental": incremental, "table_switch": table_switch}
+
+
+if __name__ == "__main__":
+    run_benchmark()
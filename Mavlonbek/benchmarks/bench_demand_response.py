@@ -0,0 +1,55 @@
+# FIO/benchmarks/bench_demand_response.py
+
+import os
+import random
+import sys
+import time
+
+# Add the FIO directory to the path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.energy.demand_response import DemandResponseOptimizer, DemandResponseProblem
+from modules.energy.energy_module import daily_load_profile
+
+FEEDERS = 2000
+PERIODS = 96
+RESOLVES = 10  # Warm-started re-solves with a slightly changed forecast, as in rolling re-optimization
+
+
+def build_problem(feeders=FEEDERS, periods=PERIODS, seed=3, drift=0.0):
+    """A random city: feeder sizes, evening lighting and overnight charging vary per feeder."""
+    rng = random.Random(seed)
+    profile = [daily_load_profile(24.0 * period / periods) for period in range(periods)]
+    night = [1.0 if period < periods * 7 // 24 or period >= periods * 18 // 24 else 0.0 for period in range(periods)]
+    base, lighting = [], []
+    for _ in range(feeders):
+        size = rng.uniform(2000.0, 6000.0) * (1.0 + drift)
+        base.append([size * share * rng.uniform(0.97, 1.03) for share in profile])
+        lamps = rng.uniform(50.0, 300.0)
+        lighting.append([lamps * on for on in night])
+    energy = [rng.uniform(8000.0, 20000.0) for _ in range(feeders)]
+    power = [rng.uniform(2000.0, 4000.0) for _ in range(feeders)]
+    return DemandResponseProblem(base, [7500.0] * feeders, lighting_load=lighting, min_dim=0.6,
+                                 charging_energy=energy, charging_power=power,
+                                 charging_window=(periods * 22 // 24, periods * 6 // 24), period_hours=24 / periods)
+
+
+def run_benchmark(feeders=FEEDERS, periods=PERIODS, resolves=RESOLVES):
+    """Times a cold solve, then warm-started re-solves of drifting forecasts; reports ms per solve."""
+    optimizer = DemandResponseOptimizer()
+    problem = build_problem(feeders, periods)
+    schedule = optimizer.solve(problem)
+    print(f"cold: {schedule}")
+    problems = [build_problem(feeders, periods, drift=0.002 * (number + 1)) for number in range(resolves)]
+    start = time.perf_counter()
+    iterations = 0
+    for problem in problems:
+        schedule = optimizer.solve(problem)
+        iterations += schedule.iterations
+    elapsed = time.perf_counter() - start
+    print(f"warm: {resolves} re-solves, {elapsed / resolves * 1e3:.1f} ms and {iterations / resolves:.1f} iterations each")
+    return elapsed / resolves
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,70 @@
+# FIO/benchmarks/bench_device_memory.py
+
+import gc
+import os
+import sys
+import tracemalloc
+
+# Add the FIO directory to the path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.factories.abstract_factory import AdvancedDeviceFactory, BasicDeviceFactory, DeviceFleet
+
+DEVICES = 1_000_000
+FAMILIES = {"basic": BasicDeviceFactory, "advanced": AdvancedDeviceFactory}
+
+
+class _DictDevice:
+    """Pre-flyweight layout: one regular object per device with its own behavior instance."""
+    def __init__(self, device_id, product, x, y, state):
+        self.device_id = device_id
+        self.product = product
+        self.x = x
+        self.y = y
+        self.state = state
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    gc.collect()
+    return size
+
+
+def run_benchmark(devices=DEVICES):
+    """Reports bytes per device for 1M devices of each family under three layouts."""
+    half = devices // 2
+    results = {}
+    for family, factory_class in FAMILIES.items():
+        factory = factory_class()
+        sensor_class = type(factory.create_sensor())
+        actuator_class = type(factory.create_actuator())
+
+        def build_fleet():
+            fleet = DeviceFleet()
+            factory.add_sensors(fleet, half)
+            factory.add_actuators(fleet, devices - half)
+            return fleet
+
+        layouts = {
+            "object per device": lambda: [_DictDevice(i, sensor_class() if i < half else actuator_class(),
+                                                      float(i), float(i), 1) for i in range(devices)],
+            "slotted records": lambda: [factory.create_sensor_device(i, float(i), float(i)) if i < half
+                                        else factory.create_actuator_device(i, float(i), float(i))
+                                        for i in range(devices)],
+            "array fleet": build_fleet,
+        }
+        print(f"{family} family, {devices:,} devices:")
+        for name, build in layouts.items():
+            per_device = _measure(build) / devices
+            results[(family, name)] = per_device
+            print(f"- {name:<18} {per_device:8.1f} bytes/device")
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark()
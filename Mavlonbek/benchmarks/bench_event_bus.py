@@ -0,0 +1,62 @@
+# FIO/benchmarks/bench_event_bus.py
+
+import os
+import sys
+import time
+
+# Add the FIO directory to the path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.eventbus.event_bus import EventBus
+
+SUBSCRIBER_COUNTS = (10, 1_000, 100_000)
+MESSAGES = 200_000
+
+
+def _bus_with(subscribers):
+    """A bus with `subscribers` subscriptions spread over distinct topics and wildcard patterns, none on the hot topic."""
+    bus = EventBus()
+    for number in range(subscribers):
+        kind = number % 3
+        if kind == 0:
+            bus.subscribe(f"district{number}.sensor.reading", lambda message: None)
+        elif kind == 1:
+            bus.subscribe(f"district{number}.*.alert", lambda message: None)
+        else:
+            bus.subscribe(f"district{number}.#", lambda message: None)
+    received = []
+    bus.subscribe("transport.traffic.*", received.append)
+    return bus, received
+
+
+def run_benchmark(subscriber_counts=SUBSCRIBER_COUNTS, messages=MESSAGES):
+    """Publish cost on a hot topic as the subscriber count grows, single and batched, plus async delivery lag."""
+    for subscribers in subscriber_counts:
+        bus, received = _bus_with(subscribers)
+        start = time.perf_counter()
+        for number in range(messages):
+            bus.publish("transport.traffic.cycle", now=number)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bus.publish_batch(("transport.traffic.cycle", {"now": number}) for number in range(messages))
+        batched = time.perf_counter() - start
+        assert len(received) == 2 * messages
+        print(f"{subscribers:>7,} subscribers: publish {messages / single:,.0f} msg/s, "
+              f"publish_batch {messages / batched:,.0f} msg/s")
+
+    bus = EventBus(workers=2)
+    bus.subscribe("energy.meter.reading", lambda batch: None, asynchronous=True, batch=True)
+    start = time.perf_counter()
+    for number in range(messages):
+        bus.publish("energy.meter.reading", now=number)
+    bus.join()
+    elapsed = time.perf_counter() - start
+    stats = bus.stats()["energy.meter.reading"]
+    bus.close()
+    print(f"async batch subscriber: {messages / elapsed:,.0f} msg/s end to end, "
+          f"lag mean {stats['mean_lag'] * 1e3:.2f} ms, max {stats['max_lag'] * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    run_benchmark()
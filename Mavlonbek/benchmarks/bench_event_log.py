@@ -0,0 +1,52 @@
+# FIO/benchmarks/bench_event_log.py
+
+import os
+import sys
+import time
+
+# Add the FIO directory to the path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.eventlog.event_log import event_log, ConsoleSink, NullSink, INFO, WARNING
+from modules.transport.transport_module import TransportModule
+
+CALLS = 50000
+
+
+def _time_create_vehicle(calls):
+    module = TransportModule()
+    start = time.perf_counter()
+    for _ in range(calls):
+        module.create_vehicle("bus")
+    return time.perf_counter() - start
+
+
+def run_benchmark(calls=CALLS):
+    """Measures TransportModule.create_vehicle throughput under different event log setups."""
+    previous_sinks, previous_level = event_log.sinks, event_log.level
+    devnull = open(os.devnull, "w")
+    scenarios = [
+        ("console sink (stdout -> devnull)", INFO, [ConsoleSink(devnull)]),
+        ("null sink (ring buffer only)", INFO, [NullSink()]),
+        ("level filtered (WARNING)", WARNING, [NullSink()]),
+    ]
+    results = {}
+    try:
+        for name, level, sinks in scenarios:
+            event_log.set_sinks(*sinks)
+            event_log.level = level
+            results[name] = calls / _time_create_vehicle(calls)
+    finally:
+        event_log.set_sinks(*previous_sinks)
+        event_log.level = previous_level
+        devnull.close()
+
+    baseline = results[scenarios[0][0]]
+    print(f"create_vehicle x {calls}:")
+    for name, rate in results.items():
+        print(f"- {name:<36} {rate:>12,.0f} calls/sec  ({rate / baseline:.1f}x)")
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark()
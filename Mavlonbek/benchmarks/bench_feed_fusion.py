@@ -0,0 +1,61 @@
+# FIO/benchmarks/bench_feed_fusion.py
+
+import os
+import sys
+import time
+
+# Add the FIO directory to the path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.adapters.adapter import LegacySecurityCamera, SecurityCameraAdapter
+from core.eventlog.event_log import event_log, WARNING
+from modules.security.security_module import FeedChain, SecurityFeedDecorator
+
+DEPTHS = (1, 2, 4, 8, 16)
+FEED_CALLS = 20000
+FRAMES = 200
+FRAME_SIZE = 16 * 1024
+
+
+def _feed_rate(device, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        device.start_feed()
+    return calls / (time.perf_counter() - start)
+
+
+def _frame_rate(device, frames, frame_size):
+    start = time.perf_counter()
+    for _ in device.stream_frames(frames, frame_size):
+        pass
+    return frames * frame_size / (time.perf_counter() - start) / 1e6
+
+
+def run_benchmark(depths=DEPTHS, calls=FEED_CALLS, frames=FRAMES, frame_size=FRAME_SIZE):
+    """Compares nested and fused decorator stacks for start_feed calls and frame streaming."""
+    previous_level = event_log.level
+    event_log.level = WARNING  # Measure dispatch, not console output
+    results = {}
+    try:
+        print(f"{'depth':>5} {'nested calls/s':>15} {'fused calls/s':>15} {'nested MB/s':>12} {'fused MB/s':>12}")
+        for depth in depths:
+            chain = FeedChain(SecurityCameraAdapter(LegacySecurityCamera()))
+            for _ in range(depth):
+                chain.add(SecurityFeedDecorator)
+            nested, fused = chain.build(), chain.compile()
+            row = {
+                "nested_calls": _feed_rate(nested, calls),
+                "fused_calls": _feed_rate(fused, calls),
+                "nested_mb_s": _frame_rate(nested, frames, frame_size),
+                "fused_mb_s": _frame_rate(fused, frames, frame_size),
+            }
+            results[depth] = row
+            print(f"{depth:>5} {row['nested_calls']:>15,.0f} {row['fused_calls']:>15,.0f} "
+                  f"{row['nested_mb_s']:>12,.1f} {row['fused_mb_s']:>12,.1f}")
+    finally:
+        event_log.level = previous_level
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,61 @@
+# FIO/benchmarks/bench_sensor_ingestion.py
+
+import multiprocessing
+import os
+import sys
+import time
+from array import array
+
+# Add the FIO directory to the path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.ingestion.sensor_ring import SensorIngestion, OVERFLOW_BLOCK
+
+PRODUCERS = 4
+READINGS_PER_PRODUCER = 5_000_000
+BATCH = 4096
+RING_CAPACITY = 1 << 18
+
+
+def _produce(ring, producer, readings, batch):
+    """Producer process: writes `readings` readings (rounded up to whole batches) for its own device ids."""
+    device_ids = array("I", range(producer * batch, (producer + 1) * batch))
+    values = array("d", (float(i) for i in range(batch)))
+    written = 0
+    while written < readings:
+        timestamps = array("d", [time.time()]) * batch
+        written += ring.write_batch(device_ids, timestamps, values)
+    ring.close()
+
+
+def run_benchmark(producers=PRODUCERS, readings=READINGS_PER_PRODUCER, batch=BATCH, overflow=OVERFLOW_BLOCK):
+    """Producer processes write into one ring each while this process drains them; reports readings/sec."""
+    ingestion = SensorIngestion(RING_CAPACITY, overflow=overflow, timeout=10.0)
+    rings = [ingestion.open_ring() for _ in range(producers)]
+    workers = [multiprocessing.Process(target=_produce, args=(ring, number, readings, batch))
+               for number, ring in enumerate(rings)]
+    checksum = [0.0]
+
+    def consume(reading_batch):
+        checksum[0] += sum(reading_batch.values)
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    drained = 0
+    while any(worker.is_alive() for worker in workers) or ingestion.pending():
+        drained += ingestion.drain(consume)
+    elapsed = time.perf_counter() - start
+    for worker in workers:
+        worker.join()
+    dropped = ingestion.dropped()
+    ingestion.close()
+
+    expected = producers * -(-readings // batch) * batch
+    print(f"{producers} producers, {drained:,} readings ({expected:,} written, {dropped:,} dropped) "
+          f"in {elapsed:.2f}s: {drained / elapsed:,.0f} readings/sec")
+    return drained / elapsed
+
+
+if __name__ == "__main__":
+    run_benchmark()
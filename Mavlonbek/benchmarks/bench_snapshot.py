@@ -0,0 +1,92 @@
+# FIO/benchmarks/bench_snapshot.py
+
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+# Add the FIO directory to the path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.controller import SmartCityController
+from core.eventlog.event_log import event_log, NullSink
+
+FLEET_SIZES = (10_000, 100_000, 1_000_000)
+LIGHTS_PER_VEHICLE = 0.2
+RUNS = 3
+
+
+def _populate(controller, vehicles):
+    transport = controller._transport_module
+    transport.create_vehicles("bus", vehicles // 2)
+    transport.create_vehicles("taxi", vehicles - vehicles // 2)
+    side = max(1, int((vehicles * LIGHTS_PER_VEHICLE) ** 0.5))
+    lighting = controller._lighting_module
+    lighting.add_street_lights([(x * 25.0, y * 25.0) for x in range(side) for y in range(side)], district="City")
+    lighting.enable_adaptive_control(hour=21)
+    lighting.run_control_tick()
+    controller.build_infrastructure()
+
+
+def _pickled_state(controller):
+    lighting = controller._lighting_module
+    return {"fleet": controller._transport_module.fleet, "lights": lighting.lights,
+            "brightness": lighting.controller, "infrastructure": controller.infrastructure}
+
+
+def _best(function, runs=RUNS):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(fleet_sizes=FLEET_SIZES):
+    """Compares snapshot()/restore() with pickling the same state: write time, restore time, file size."""
+    previous_sinks = event_log.set_sinks(NullSink())
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for vehicles in fleet_sizes:
+                SmartCityController.clear_instances()
+                source = SmartCityController.for_district("source")
+                _populate(source, vehicles)
+                snapshot_path = os.path.join(tmp, f"city_{vehicles}.snap")
+                pickle_path = os.path.join(tmp, f"city_{vehicles}.pickle")
+
+                def write_pickle():
+                    with open(pickle_path, "wb") as f:
+                        pickle.dump(_pickled_state(source), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+                def read_pickle():
+                    with open(pickle_path, "rb") as f:
+                        return pickle.load(f)
+
+                target = SmartCityController.for_district("target")
+                # The first restore imports and constructs the target's subsystems; time later ones
+                source.snapshot(snapshot_path)
+                target.restore(snapshot_path)
+                row = {
+                    "snapshot_write_s": _best(lambda: source.snapshot(snapshot_path)),
+                    "snapshot_restore_s": _best(lambda: target.restore(snapshot_path)),
+                    "pickle_write_s": _best(write_pickle),
+                    "pickle_restore_s": _best(read_pickle),
+                    "snapshot_bytes": os.path.getsize(snapshot_path),
+                    "pickle_bytes": os.path.getsize(pickle_path),
+                }
+                results[vehicles] = row
+                print(f"{vehicles:,} vehicles:")
+                print(f"- write    snapshot {row['snapshot_write_s'] * 1e3:8.2f} ms | pickle {row['pickle_write_s'] * 1e3:8.2f} ms")
+                print(f"- restore  snapshot {row['snapshot_restore_s'] * 1e3:8.2f} ms | pickle {row['pickle_restore_s'] * 1e3:8.2f} ms")
+                print(f"- size     snapshot {row['snapshot_bytes'] / 1e6:8.2f} MB | pickle {row['pickle_bytes'] / 1e6:8.2f} MB")
+    finally:
+        event_log.set_sinks(*previous_sinks)
+        SmartCityController.clear_instances()
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,81 @@
+# FIO/benchmarks/bench_startup.py
+
+import json
+import os
+import subprocess
+import sys
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the FIO directory to the path to allow imports
+sys.path.append(PACKAGE_DIR)
+
+from core.controller import SUBSYSTEMS
+
+RUNS = 5
+
+# Cold-start scenarios, each run in a fresh interpreter with console output discarded
+SCENARIOS = {
+    "controller import": "import core.controller",
+    "sensitive energy request": ("from core.controller import SmartCityController\n"
+                                 "SmartCityController().request_sensitive_energy_data('Admin')"),
+    "full status report": "from core.controller import SmartCityController\nSmartCityController().get_city_status()",
+}
+
+_TIMED = """
+import sys, time
+start = time.perf_counter()
+{code}
+sys.stderr.write(repr(time.perf_counter() - start))
+"""
+
+
+def _run(code, *flags):
+    command = [sys.executable, *flags, "-c", code]
+    completed = subprocess.run(command, cwd=PACKAGE_DIR, capture_output=True, text=True, check=True)
+    return completed.stderr
+
+
+def cold_start_seconds(code, runs=RUNS):
+    """Best-of-`runs` wall time of `code` in a fresh interpreter (interpreter startup excluded)."""
+    return min(float(_run(_TIMED.format(code=code)).strip().splitlines()[-1]) for _ in range(runs))
+
+
+def import_time(module_path):
+    """Runs `-X importtime` for one module; returns (cumulative microseconds, raw report)."""
+    report = _run(f"import {module_path}", "-X", "importtime")
+    cumulative = 0
+    for line in report.splitlines():
+        if line.startswith("import time:") and line.rstrip().endswith(f"| {module_path}"):
+            cumulative = int(line.split("|")[1])
+    return cumulative, report
+
+
+def run_benchmark(output_dir=None, runs=RUNS):
+    """Records cold-start wall times and per-subsystem import times; optionally saves raw reports."""
+    results = {"cold_start": {}, "import_us": {}}
+    print(f"Cold start (best of {runs}):")
+    for name, code in SCENARIOS.items():
+        seconds = cold_start_seconds(code, runs)
+        results["cold_start"][name] = seconds
+        print(f"- {name:<26} {seconds * 1e3:8.2f} ms")
+
+    print("Import time per subsystem (-X importtime, cumulative):")
+    reports = {}
+    for name, (module_path, _) in SUBSYSTEMS.items():
+        cumulative, reports[name] = import_time(module_path)
+        results["import_us"][name] = cumulative
+        print(f"- {name:<26} {cumulative / 1e3:8.2f} ms")
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        for name, report in reports.items():
+            with open(os.path.join(output_dir, f"importtime_{name}.txt"), "w", encoding="utf-8") as f:
+                f.write(report)
+        with open(os.path.join(output_dir, "startup.json"), "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark(sys.argv[1] if len(sys.argv) > 1 else None)
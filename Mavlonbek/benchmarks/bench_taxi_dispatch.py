@@ -0,0 +1,57 @@
+# FIO/benchmarks/bench_taxi_dispatch.py
+
+import os
+import random
+import sys
+import time
+from collections import deque
+
+# Add the FIO directory to the path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.transport.dispatch import DispatchEngine
+from modules.transport.fleet_store import FleetStore
+
+TAXIS = 100_000
+CITY_METERS = 30_000.0
+REQUESTS_PER_SECOND = 10_000
+SECONDS = 2.0
+WINDOW_SECONDS = 0.02
+TRIPS_IN_PROGRESS = 20_000  # Oldest trips end (at a random drop-off) once this many are running
+
+
+def run_benchmark(taxis=TAXIS, rate=REQUESTS_PER_SECOND, seconds=SECONDS, window_seconds=WINDOW_SECONDS, seed=7):
+    """Submits requests paced at `rate` per second against `taxis` scattered taxis; reports p50/p99 dispatch latency."""
+    rng = random.Random(seed)
+    fleet = FleetStore(("taxi",))
+    ids = fleet.add_many(0, taxis)
+    fleet.move_many(ids, [rng.uniform(0, CITY_METERS) for _ in ids], [rng.uniform(0, CITY_METERS) for _ in ids])
+
+    on_trip = deque()
+    start = time.perf_counter()
+    engine = DispatchEngine(fleet, 0, window_seconds=window_seconds,
+                            on_dispatch=lambda batch: on_trip.extend(a.taxi_id for a in batch if a.taxi_id is not None))
+    index_seconds = time.perf_counter() - start
+
+    total = int(rate * seconds)
+    points = [(rng.uniform(0, CITY_METERS), rng.uniform(0, CITY_METERS)) for _ in range(total)]
+    start = time.perf_counter()
+    for number, (x, y) in enumerate(points):
+        while time.perf_counter() - start < number / rate:
+            engine.poll()
+        engine.submit(x, y)
+        while len(on_trip) > TRIPS_IN_PROGRESS:
+            engine.complete_trip(on_trip.popleft(), rng.uniform(0, CITY_METERS), rng.uniform(0, CITY_METERS))
+    engine.flush()
+    elapsed = time.perf_counter() - start
+
+    stats = engine.stats()
+    print(f"{taxis:,} taxis (index built in {index_seconds:.2f}s), {total:,} requests in {elapsed:.2f}s "
+          f"({total / elapsed:,.0f} req/s offered at {rate:,}/s), {stats['batches']:,} batches")
+    print(f"dispatched {stats['dispatched']:,}, unmatched {stats['unmatched']:,}; "
+          f"latency p50 {stats['p50_latency'] * 1e3:.1f} ms, p99 {stats['p99_latency'] * 1e3:.1f} ms")
+    return stats
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,37 @@
+# FIO/benchmarks/bench_traffic_engine.py
+
+import os
+import sys
+import time
+
+# Add the FIO directory to the path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.transport.road_network import RoadNetwork
+from modules.transport.traffic_engine import TrafficEngine
+
+GRIDS = ((50, 50), (100, 100), (224, 224))  # ~50k intersections for the largest city
+TICK_SECONDS = 1.0
+TICKS = 10
+DEMAND = 0.02
+
+
+def run_benchmark(grids=GRIDS, ticks=TICKS):
+    """Reports intersections/sec and the real-time factor of one-second signal ticks per network size."""
+    results = {}
+    for width, height in grids:
+        start = time.perf_counter()
+        engine = TrafficEngine(RoadNetwork.grid(width, height), tick_seconds=TICK_SECONDS)
+        engine.add_demand(DEMAND)
+        setup_seconds = time.perf_counter() - start
+        engine.run(2)  # Fill the queues before timing
+        report = engine.run(ticks)
+        results[width * height] = report
+        print(f"{width * height:>7,} intersections ({engine.network.road_count:,} roads, setup {setup_seconds:.2f}s): "
+              f"{report.intersections_per_second:>12,.0f} intersections/sec, "
+              f"{report.wall_seconds / ticks * 1e3:7.1f} ms/tick, {report.realtime_factor:5.1f}x real time")
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,152 @@
+# FIO/benchmarks/harness.py
+
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+
+# --- Benchmarks ---
+
+MICRO = "micro"
+MACRO = "macro"
+
+
+class Benchmark:
+    """
+    One timed hot path.
+    `setup()` builds fresh state and returns the zero-argument callable to time;
+    each repeat calls it `number` times and records the mean time per call.
+    Micro benchmarks time single pattern operations (many calls per repeat),
+    macro benchmarks time whole workflows (one call per repeat).
+    """
+    def __init__(self, name, setup, kind=MICRO, number=1000, warmup=3, repeats=30, description=""):
+        self.name = name
+        self.setup = setup
+        self.kind = kind
+        self.number = number
+        self.warmup = warmup
+        self.repeats = repeats
+        self.description = description
+
+
+def percentile(sorted_values, fraction):
+    """Linearly interpolated percentile of an already sorted sequence (`fraction` in 0.0-1.0)."""
+    if not sorted_values:
+        raise ValueError("Cannot take a percentile of no samples.")
+    position = (len(sorted_values) - 1) * fraction
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(samples):
+    """Percentile statistics (seconds per call) of one benchmark's repeat samples."""
+    ordered = sorted(samples)
+    mean = statistics.fmean(ordered)
+    return {
+        "repeats": len(ordered),
+        "min": ordered[0],
+        "mean": mean,
+        "stdev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "p50": percentile(ordered, 0.50),
+        "p90": percentile(ordered, 0.90),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1],
+        "ops_per_sec": 1.0 / mean if mean > 0 else float("inf"),
+    }
+
+
+def measure(benchmark, warmup=None, repeats=None, number=None):
+    """Runs warmup repeats (untimed), then timed repeats; returns summarize() of the per-call times."""
+    warmup = benchmark.warmup if warmup is None else warmup
+    repeats = benchmark.repeats if repeats is None else repeats
+    number = benchmark.number if number is None else number
+    function = benchmark.setup()
+    loop = range(number)
+    for _ in range(warmup):
+        for _ in loop:
+            function()
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(repeats):
+        start = clock()
+        for _ in loop:
+            function()
+        samples.append((clock() - start) / number / 1e9)
+    stats = summarize(samples)
+    stats.update(kind=benchmark.kind, number=number, warmup=warmup)
+    return stats
+
+
+def run_all(benchmarks, warmup=None, repeats=None, number=None, report=print):
+    """Measures every benchmark and returns a JSON-ready result document."""
+    results = {}
+    for benchmark in benchmarks:
+        stats = results[benchmark.name] = measure(benchmark, warmup, repeats, number)
+        if report is not None:
+            report(f"- {benchmark.name:<34} p50 {_format_seconds(stats['p50'])}  "
+                   f"p99 {_format_seconds(stats['p99'])}  ({stats['repeats']} x {stats['number']})")
+    return {
+        "meta": {"python": sys.version.split()[0], "implementation": platform.python_implementation(),
+                 "platform": platform.platform(), "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "benchmarks": results,
+    }
+
+
+def _format_seconds(seconds):
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit:<2}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+# --- Results ---
+
+def save_results(path, results):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+REGRESSION = "regression"
+IMPROVEMENT = "improvement"
+UNCHANGED = "unchanged"
+MISSING = "missing"
+NEW = "new"
+
+
+def compare(baseline, current, threshold=0.10, stat="p50"):
+    """
+    Compares two result documents on `stat`. A benchmark whose time grew by more
+    than `threshold` (a fraction) is a regression, one that shrank by more is an
+    improvement. Returns rows of (name, status, baseline value, current value, ratio).
+    """
+    old, new = baseline["benchmarks"], current["benchmarks"]
+    rows = []
+    for name in sorted(old.keys() | new.keys()):
+        if name not in new:
+            rows.append((name, MISSING, old[name][stat], None, None))
+            continue
+        if name not in old:
+            rows.append((name, NEW, None, new[name][stat], None))
+            continue
+        before, after = old[name][stat], new[name][stat]
+        ratio = after / before if before > 0 else float("inf")
+        status = REGRESSION if ratio > 1.0 + threshold else IMPROVEMENT if ratio < 1.0 - threshold else UNCHANGED
+        rows.append((name, status, before, after, ratio))
+    return rows
+
+
+def format_comparison(rows, stat="p50"):
+    lines = [f"{'benchmark':<34} {'baseline ' + stat:>14} {'current ' + stat:>14} {'ratio':>7}  status"]
+    for name, status, before, after, ratio in rows:
+        before_text = _format_seconds(before) if before is not None else "-"
+        after_text = _format_seconds(after) if after is not None else "-"
+        ratio_text = f"{ratio:6.2f}x" if ratio is not None else "-"
+        lines.append(f"{name:<34} {before_text:>14} {after_text:>14} {ratio_text:>7}  {status}")
+    return "\n".join(lines)
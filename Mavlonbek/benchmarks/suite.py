@@ -0,0 +1,208 @@
+# FIO/benchmarks/suite.py
+
+import contextlib
+import os
+import random
+import sys
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the FIO directory to the path to allow imports
+sys.path.append(PACKAGE_DIR)
+
+from benchmarks.harness import Benchmark, MICRO, MACRO
+from core.adapters.adapter import LegacySecurityCamera, SecurityCameraAdapter
+from core.builders.infrastructure_builder import SmartCityBuilder, InfrastructureDirector
+from core.controller import SmartCityController
+from core.eventbus.event_bus import EventBus
+from core.factories.abstract_factory import BasicDeviceFactory, AdvancedDeviceFactory
+from core.proxy.proxy import EnergyDataProxy
+from modules.energy.demand_response import DemandResponseOptimizer
+from modules.security.security_module import SecurityFeedDecorator
+from modules.transport.dispatch import DispatchEngine
+from modules.transport.fleet_store import FleetStore
+from modules.transport.road_network import RoadNetwork
+from modules.transport.traffic_engine import TrafficEngine
+from modules.transport.transport_module import TransportModule
+
+# --- Singleton ---
+
+def _singleton_call():
+    SmartCityController()
+    return SmartCityController
+
+
+def _singleton_keyed():
+    return lambda: SmartCityController.for_district("benchmark")
+
+# --- Factory Method ---
+
+def _factory_method():
+    module = TransportModule()
+    return lambda: module._factory_method("bus")
+
+
+def _create_vehicle():
+    module = TransportModule()
+    return lambda: module.create_vehicle("bus")
+
+
+def _traffic_tick(width=50, height=50):
+    engine = TrafficEngine(RoadNetwork.grid(width, height))
+    engine.add_demand(0.02)
+    return engine.step
+
+def _dispatch_batch(taxis=100_000, batch=200, extent=30_000.0):
+    rng = random.Random(1)
+    fleet = FleetStore(("taxi",))
+    ids = fleet.add_many(0, taxis)
+    fleet.move_many(ids, [rng.uniform(0, extent) for _ in ids], [rng.uniform(0, extent) for _ in ids])
+    engine = DispatchEngine(fleet, 0, window_seconds=float("inf"), max_batch=batch + 1)
+    points = [(rng.uniform(0, extent), rng.uniform(0, extent)) for _ in range(batch)]
+    drop_offs = [(rng.uniform(0, extent), rng.uniform(0, extent)) for _ in range(batch)]
+
+    def dispatch():
+        for x, y in points:
+            engine.submit(x, y)
+        # Drop the passengers off so every batch sees the same number of free taxis
+        for assignment, (x, y) in zip(engine.flush(), drop_offs):
+            engine.complete_trip(assignment.taxi_id, x, y)
+    return dispatch
+
+# --- Energy ---
+
+def _demand_response(feeders=500):
+    from benchmarks.bench_demand_response import build_problem
+    problem = build_problem(feeders)
+    optimizer = DemandResponseOptimizer()
+    return lambda: optimizer.solve(problem)
+
+# --- Event Bus ---
+
+def _bus_publish(subscribers=1000):
+    bus = EventBus()
+    for number in range(subscribers):
+        bus.subscribe(f"district{number}.#", lambda message: None)
+    bus.subscribe("transport.traffic.*", lambda message: None)
+    return lambda: bus.publish("transport.traffic.cycle", now=0.0)
+
+# --- Abstract Factory ---
+
+def _creator(factory_class, method_name):
+    def setup():
+        return getattr(factory_class(), method_name)
+    return setup
+
+
+def _sensor_device():
+    factory = BasicDeviceFactory()
+    return lambda: factory.create_sensor_device(1, 10.0, 20.0)
+
+# --- Adapter + Decorator ---
+
+def _start_feed():
+    return SecurityFeedDecorator(SecurityCameraAdapter(LegacySecurityCamera())).start_feed
+
+# --- Proxy ---
+
+def _proxy_basic(cache_ttl=None):
+    def setup():
+        return EnergyDataProxy(cache_ttl=cache_ttl).get_basic_data
+    return setup
+
+
+def _proxy_sensitive(role):
+    def setup():
+        proxy = EnergyDataProxy()
+        return lambda: proxy.get_sensitive_data(role)
+    return setup
+
+# --- Builder ---
+
+def _builder_full():
+    builder = SmartCityBuilder()
+    director = InfrastructureDirector(builder)
+
+    def build():
+        director.build_full_infrastructure()
+        return builder.get_result()
+    return build
+
+
+def _builder_cold():
+    def build():
+        builder = SmartCityBuilder()
+        InfrastructureDirector(builder).build_full_infrastructure()
+        return builder.get_result()
+    return build
+
+
+def _builder_incremental(steps=100, parts=100):
+    plan = {f"district_{d}": {f"Lamp {d}-{i}": "LED" for i in range(parts)} for d in range(steps)}
+    variants = [dict(plan, district_0={**plan["district_0"], "Lamp 0-0": f"LED v{n}"}) for n in range(2)]
+    builder = SmartCityBuilder()
+    director = InfrastructureDirector(builder)
+    director.build_plan(plan)
+    state = {"result": builder.get_result(), "turn": 0}
+
+    def rebuild():
+        state["turn"] ^= 1
+        state["result"] = director.rebuild_incremental(state["result"], variants[state["turn"]])
+    return rebuild
+
+# --- Full Demonstration ---
+
+def _demonstration():
+    from main import run_system_demonstration
+
+    def run():
+        SmartCityController.clear_instances()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            run_system_demonstration()
+    return run
+
+
+SUITE = [
+    Benchmark("singleton.call", _singleton_call, MICRO, number=10000,
+              description="SmartCityController() on an existing instance"),
+    Benchmark("singleton.keyed_instance", _singleton_keyed, MICRO, number=10000,
+              description="SmartCityController.for_district() lookup"),
+    Benchmark("transport.factory_method", _factory_method, MICRO, number=10000,
+              description="TransportModule._factory_method('bus')"),
+    Benchmark("transport.create_vehicle", _create_vehicle, MICRO, number=2000,
+              description="TransportModule.create_vehicle('bus') including event logging"),
+    Benchmark("transport.traffic_tick_2500", _traffic_tick, MACRO, number=1, warmup=3, repeats=20,
+              description="One signal tick over a 50x50 grid"),
+    Benchmark("transport.dispatch_batch_200", _dispatch_batch, MACRO, number=1, warmup=3, repeats=20,
+              description="Match a batch of 200 ride requests against 100,000 taxis"),
+    Benchmark("energy.demand_response_500x96", _demand_response, MACRO, number=1, warmup=2, repeats=10,
+              description="Warm-started peak minimization over 500 feeders x 96 periods"),
+    Benchmark("eventbus.publish_1000_subscribers", _bus_publish, MICRO, number=10000,
+              description="publish() to one of 1,000 wildcard subscriptions"),
+    Benchmark("factory.basic.create_sensor", _creator(BasicDeviceFactory, "create_sensor"), MICRO, number=10000),
+    Benchmark("factory.basic.create_actuator", _creator(BasicDeviceFactory, "create_actuator"), MICRO, number=10000),
+    Benchmark("factory.advanced.create_sensor", _creator(AdvancedDeviceFactory, "create_sensor"), MICRO, number=10000),
+    Benchmark("factory.advanced.create_actuator", _creator(AdvancedDeviceFactory, "create_actuator"), MICRO, number=10000),
+    Benchmark("factory.basic.create_sensor_device", _sensor_device, MICRO, number=10000,
+              description="Flyweight device record creation"),
+    Benchmark("security.adapter_decorator_feed", _start_feed, MICRO, number=2000,
+              description="SecurityFeedDecorator(SecurityCameraAdapter(...)).start_feed()"),
+    Benchmark("proxy.basic_data", _proxy_basic(), MICRO, number=2000),
+    Benchmark("proxy.basic_data_cached", _proxy_basic(cache_ttl=3600), MICRO, number=2000),
+    Benchmark("proxy.sensitive_data_granted", _proxy_sensitive("Admin"), MICRO, number=2000),
+    Benchmark("proxy.sensitive_data_denied", _proxy_sensitive("Citizen"), MICRO, number=2000),
+    Benchmark("builder.full_infrastructure", _builder_full, MICRO, number=2000,
+              description="Director full build on a warm part cache"),
+    Benchmark("builder.full_infrastructure_cold", _builder_cold, MICRO, number=2000,
+              description="Full build with a fresh builder and cache"),
+    Benchmark("builder.incremental_rebuild_10k", _builder_incremental, MACRO, number=1, warmup=2, repeats=20,
+              description="One changed step out of 100 in a 10,000-part plan"),
+    Benchmark("demo.run_system_demonstration", _demonstration, MACRO, number=1, warmup=1, repeats=5,
+              description="main.run_system_demonstration() with output discarded"),
+]
+
+
+def select(pattern=None, kind=None):
+    """Benchmarks whose name contains `pattern` and whose kind matches `kind` (both optional)."""
+    return [benchmark for benchmark in SUITE
+            if (pattern is None or pattern in benchmark.name) and (kind is None or benchmark.kind == kind)]
@@ -1,5 +1,10 @@
 # FIO/core/adapters/adapter.py
 
+import struct
+
+from core.eventlog.event_log import event_log
+from core.streaming.frame_pipeline import BufferPool, Frame
+
 # --- Adaptee (The existing, incompatible class) ---
 
 class LegacySecurityCamera:
@@ -7,9 +12,20 @@ class LegacySecurityCamera:
     The existing class with an incompatible interface.
     It uses a proprietary method name.
     """
+    _pattern_cache = {}
+
     def start_proprietary_feed(self):
         return "Legacy camera feed started: Transmitting video data via proprietary protocol."
 
+    def read_proprietary_frame(self, buffer, sequence):
+        """Fills `buffer` in place with the next raw frame (8-byte sequence header + payload)."""
+        size = len(buffer)
+        pattern = self._pattern_cache.get(size)
+        if pattern is None:
+            pattern = self._pattern_cache[size] = bytes(i % 251 for i in range(size))
+        buffer[:] = pattern
+        struct.pack_into("<Q", buffer, 0, sequence)
+
 # --- Target Interface (The interface the client expects) ---
 
 class ModernSecurityDevice:
@@ -17,6 +33,10 @@ class ModernSecurityDevice:
     def start_feed(self):
         raise NotImplementedError
 
+    def stream_frames(self, count, frame_size=65536):
+        """Yields `count` Frame objects, each valid until the next one is requested (see Frame)."""
+        raise NotImplementedError
+
 # --- Adapter ---
 
 class SecurityCameraAdapter(ModernSecurityDevice):
@@ -31,5 +51,21 @@ class SecurityCameraAdapter(ModernSecurityDevice):
 
     def start_feed(self):
         # The adapter translates the call to the Adaptee's specific method
-        print("Adapter: Translating request to legacy camera protocol...")
+        event_log.info("adapter.translate", "Adapter: Translating request to legacy camera protocol...")
         return self._legacy_camera.start_proprietary_feed()
+
+    def stream_frames(self, count, frame_size=65536, pool_size=8):
+        # Frames are read straight into pooled buffers; no per-frame allocation
+        pool = BufferPool(frame_size, pool_size)
+        frame = None
+        try:
+            for sequence in range(count):
+                if frame is not None:
+                    frame.release()
+                buffer = pool.acquire()
+                self._legacy_camera.read_proprietary_frame(buffer, sequence)
+                frame = Frame(sequence, buffer, pool)
+                yield frame
+        finally:
+            if frame is not None:
+                frame.release()
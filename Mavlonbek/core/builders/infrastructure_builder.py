@@ -2,14 +2,90 @@
 
 from abc import ABC, abstractmethod
 
+from core.builders.part_cache import PartCache, content_digest
+
 # --- Product ---
 class CityInfrastructure:
-    """The complex object being constructed."""
+    """
+    The complex object being constructed.
+    Besides the flat `parts` dict it remembers which build step produced each
+    part and the content digest of that step's inputs, so two results can be
+    diffed by looking only at the steps whose digests differ.
+    """
     def __init__(self):
         self.parts = {}
+        self.step_digests = {}  # step -> content digest of its inputs
+        self.step_parts = {}    # step -> tuple of part names; None -> parts added directly
+        self._owners = {}       # part name -> step that produced it (derived from step_parts)
+
+    def _check_owner(self, name, step):
+        owner = self._owners.get(name, step)
+        if owner != step:
+            raise ValueError(f"Part '{name}' is already produced by step {owner!r}; part names must be unique across steps.")
 
     def add_part(self, name, specification):
+        self._check_owner(name, None)
         self.parts[name] = specification
+        if name not in self._owners:
+            self._owners[name] = None
+            self.step_parts[None] = self.step_parts.get(None, ()) + (name,)
+
+    def set_step(self, step, digest, parts):
+        """Replaces everything `step` produced with `parts` ((name, specification) pairs)."""
+        for name, _ in parts:
+            self._check_owner(name, step)
+        self.remove_step(step)
+        self.parts.update(parts)
+        self.step_parts[step] = tuple(name for name, _ in parts)
+        self._owners.update((name, step) for name, _ in parts)
+        self.step_digests[step] = digest
+
+    def remove_step(self, step):
+        for name in self.step_parts.pop(step, ()):
+            self.parts.pop(name, None)
+            self._owners.pop(name, None)
+        self.step_digests.pop(step, None)
+
+    def copy(self):
+        clone = CityInfrastructure()
+        clone.parts = dict(self.parts)
+        clone.step_digests = dict(self.step_digests)
+        clone.step_parts = dict(self.step_parts)
+        clone._owners = dict(self._owners)
+        return clone
+
+    def to_record(self):
+        """Plain-data form of the product (for snapshots)."""
+        return {"parts": self.parts, "step_digests": self.step_digests,
+                "step_parts": {step: list(names) for step, names in self.step_parts.items()}}
+
+    @classmethod
+    def from_record(cls, record):
+        infrastructure = cls()
+        infrastructure.parts = dict(record["parts"])
+        infrastructure.step_digests = dict(record["step_digests"])
+        infrastructure.step_parts = {step: tuple(names) for step, names in record["step_parts"].items()}
+        infrastructure._owners = {name: step for step, names in infrastructure.step_parts.items() for name in names}
+        return infrastructure
+
+    def diff(self, other):
+        """Changes from this infrastructure to `other`; steps with matching digests are skipped unread."""
+        removed, added = {}, {}
+        for step in self.step_parts.keys() | other.step_parts.keys():
+            digest = self.step_digests.get(step)
+            if digest is not None and digest == other.step_digests.get(step):
+                continue
+            for name in self.step_parts.get(step, ()):
+                removed[name] = self.parts[name]
+            for name in other.step_parts.get(step, ()):
+                added[name] = other.parts[name]
+
+        changed = {}
+        for name in removed.keys() & added.keys():
+            old, new = removed.pop(name), added.pop(name)
+            if old != new:
+                changed[name] = (old, new)
+        return InfrastructureDiff(added, removed, changed)
 
     def show_configuration(self):
         print("\n--- City Infrastructure Configuration ---")
@@ -17,6 +93,23 @@ class CityInfrastructure:
             print(f"- {part}: {spec}")
         print("---------------------------------------")
 
+class InfrastructureDiff:
+    """Parts added, removed ({name: specification}) and changed ({name: (old, new)}) between two builds."""
+    def __init__(self, added, removed, changed):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def __repr__(self):
+        return (f"InfrastructureDiff(added={len(self.added)}, removed={len(self.removed)}, "
+                f"changed={len(self.changed)})")
+
 # --- Builder Interface ---
 class InfrastructureBuilder(ABC):
     @abstractmethod
@@ -46,21 +139,64 @@ class SmartCityBuilder(InfrastructureBuilder):
     Purpose: Separates the construction of a complex object (CityInfrastructure) from its
              representation, allowing the same construction process to create different representations.
     Usage: Used to construct a new city infrastructure project step-by-step.
+
+    Every step is memoized in a content-addressed PartCache keyed by the digest
+    of (step name, inputs), so building the same step with the same specs again
+    reuses the earlier parts instead of producing them anew. Pass one cache to
+    several builders to share results between them.
     """
-    def __init__(self):
+    # Default inputs of each step: {part name: specification}
+    STEPS = {
+        "transport_network": {"Transport Network": "Integrated traffic light system and tram lines."},
+        "smart_grid": {"Smart Grid": "Decentralized energy management with solar integration."},
+        "security_perimeter": {"Security Perimeter": "AI-powered surveillance and rapid response units."},
+    }
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else PartCache()
+        self.steps_executed = 0
         self.reset()
 
-    def reset(self):
-        self._infrastructure = CityInfrastructure()
-
-    def build_transport_network(self):
-        self._infrastructure.add_part("Transport Network", "Integrated traffic light system and tram lines.")
-
-    def build_smart_grid(self):
-        self._infrastructure.add_part("Smart Grid", "Decentralized energy management with solar integration.")
-
-    def build_security_perimeter(self):
-        self._infrastructure.add_part("Security Perimeter", "AI-powered surveillance and rapid response units.")
+    def reset(self, base=None):
+        """Starts a new product, empty or as a copy of the earlier result `base`."""
+        self._infrastructure = base.copy() if base is not None else CityInfrastructure()
+
+    def build_transport_network(self, parts=None):
+        self.build_step("transport_network", parts)
+
+    def build_smart_grid(self, parts=None):
+        self.build_step("smart_grid", parts)
+
+    def build_security_perimeter(self, parts=None):
+        self.build_step("security_perimeter", parts)
+
+    def build_step(self, step, parts=None):
+        """
+        Adds the parts of `step` built from `parts` (default: STEPS[step]).
+        Returns False when the product already holds this step built from the
+        same inputs, True when the step's parts were (re)placed.
+        """
+        if parts is None:
+            parts = self.STEPS[step]
+        digest = self.step_digest(step, parts)
+        if self._infrastructure.step_digests.get(step) == digest:
+            return False
+        built = self.cache.get(digest)
+        if built is None:
+            built = self._produce(step, parts)
+            self.cache.put(digest, built)
+            self.steps_executed += 1
+        self._infrastructure.set_step(step, digest, built)
+        return True
+
+    def step_digest(self, step, parts):
+        return content_digest(step, parts)
+
+    def drop_step(self, step):
+        self._infrastructure.remove_step(step)
+
+    def _produce(self, step, parts):
+        return tuple((name, str(specification)) for name, specification in parts.items())
 
     def get_result(self) -> CityInfrastructure:
         infrastructure = self._infrastructure
@@ -72,6 +208,7 @@ class InfrastructureDirector:
     """The Director knows the steps to build a specific configuration."""
     def __init__(self, builder: InfrastructureBuilder):
         self._builder = builder
+        self.last_rebuilt_steps = []
 
     def build_minimal_infrastructure(self):
         self._builder.build_transport_network()
@@ -80,3 +217,23 @@ class InfrastructureDirector:
         self._builder.build_transport_network()
         self._builder.build_smart_grid()
         self._builder.build_security_perimeter()
+
+    def build_plan(self, plan):
+        """Builds every step of `plan` ({step: {part name: specification}}) in order."""
+        for step, parts in plan.items():
+            self._builder.build_step(step, parts)
+
+    def rebuild_incremental(self, previous, plan):
+        """
+        Builds `plan` starting from the earlier result `previous`: steps whose
+        inputs are unchanged keep their parts, steps missing from the plan are
+        dropped, and only the remaining steps are re-executed (or served from
+        the part cache). The re-executed steps are kept in last_rebuilt_steps.
+        """
+        self._builder.reset(base=previous)
+        # Drop every stale step up front so a part may move between steps in either direction
+        for step, digest in list(previous.step_digests.items()):
+            if step not in plan or self._builder.step_digest(step, plan[step]) != digest:
+                self._builder.drop_step(step)
+        self.last_rebuilt_steps = [step for step, parts in plan.items() if self._builder.build_step(step, parts)]
+        return self._builder.get_result()
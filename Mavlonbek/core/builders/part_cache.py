@@ -0,0 +1,67 @@
+# FIO/core/builders/part_cache.py
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def _canonical(value):
+    """Stable byte encoding of step inputs: dict order does not matter, types do."""
+    if isinstance(value, dict):
+        items = sorted((_canonical(key), _canonical(item)) for key, item in value.items())
+        return b"{" + b",".join(key + b":" + item for key, item in items) + b"}"
+    if isinstance(value, (list, tuple)):
+        return b"[" + b",".join(_canonical(item) for item in value) + b"]"
+    return type(value).__name__.encode() + b"=" + repr(value).encode()
+
+
+def content_digest(step, inputs):
+    """Content address of one build step: identical step name and inputs give an identical digest."""
+    return hashlib.blake2b(_canonical((step, inputs)), digest_size=16).hexdigest()
+
+
+class PartCache:
+    """
+    Content-addressed store of built parts.
+    Maps a step digest to the immutable tuple of (part name, specification)
+    pairs that step produced, so building the same step from the same inputs
+    again reuses the earlier result. Bounded by LRU eviction; thread-safe so
+    one cache can be shared by several builders.
+    """
+    def __init__(self, max_entries=4096):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive.")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, digest):
+        with self._lock:
+            parts = self._entries.get(digest, _MISSING)
+            if parts is _MISSING:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return parts
+
+    def put(self, digest, parts):
+        with self._lock:
+            self._entries[digest] = parts
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
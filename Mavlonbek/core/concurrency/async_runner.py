@@ -0,0 +1,51 @@
+# FIO/core/concurrency/async_runner.py
+
+import functools
+
+# asyncio costs tens of milliseconds to import and every module builds its async
+# twins at import time, so it is only imported once an async method actually runs.
+
+
+def to_async(method):
+    """
+    Builds the async twin of a blocking module method.
+    The blocking body runs in the loop's default executor, so several subsystems
+    waiting on device I/O overlap instead of adding up. Cancelling the awaiting
+    task abandons the result; the worker thread finishes the call on its own.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        import asyncio
+        return await asyncio.to_thread(method, self, *args, **kwargs)
+    wrapper.__name__ = f"{method.__name__}_async"
+    wrapper.__qualname__ = f"{method.__qualname__}_async"
+    return wrapper
+
+
+async def fan_out(calls, timeout=None):
+    """
+    Runs independent subsystem coroutines concurrently.
+    `calls` maps a subsystem name to a coroutine; each one gets its own `timeout`.
+    Returns {name: result}, where a failed or timed-out call maps to its exception
+    so one slow subsystem never hides the others. Cancelling fan_out cancels every call.
+    """
+    import asyncio
+    names = list(calls)
+    awaitables = [asyncio.wait_for(calls[name], timeout) for name in names]
+    results = await asyncio.gather(*awaitables, return_exceptions=True)
+    return dict(zip(names, results))
+
+
+def run_sync(awaitable):
+    """
+    Sync wrapper for the async facade: runs `awaitable` to completion and returns its result.
+    Falls back to a helper thread when called from inside a running event loop.
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(awaitable)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, awaitable).result()
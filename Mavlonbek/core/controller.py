@@ -1,10 +1,22 @@
 # FIO/core/controller.py
 
-from FIO.core.singleton.singleton import Singleton
-from FIO.modules.transport.transport_module import TransportModule
-from FIO.modules.lighting.lighting_module import LightingModule
-from FIO.modules.security.security_module import SecurityModule
-from FIO.modules.energy.energy_module import EnergyModule
+import atexit
+import importlib
+import threading
+
+from core.singleton.singleton import Singleton
+from core.simulation.engine import SimulationEngine, SECONDS_PER_DAY
+from core.eventbus.event_bus import EventBus
+from core.eventlog.event_log import event_log
+from core.metrics.metrics import timed, timed_async
+
+# Subsystems are imported and constructed on first facade use: name -> (module path, class name)
+SUBSYSTEMS = {
+    "transport": ("modules.transport.transport_module", "TransportModule"),
+    "lighting": ("modules.lighting.lighting_module", "LightingModule"),
+    "security": ("modules.security.security_module", "SecurityModule"),
+    "energy": ("modules.energy.energy_module", "EnergyModule"),
+}
 
 class SmartCityController(metaclass=Singleton):
     """
@@ -15,53 +27,318 @@ class SmartCityController(metaclass=Singleton):
     Purpose: Provides a simplified, unified interface to a set of interfaces in the subsystems.
              Clients interact with the controller instead of the complex subsystem logic.
     """
-    def __init__(self):
-        print("SmartCityController initialized (Singleton instance created).")
-        self._transport_module = TransportModule()
-        self._lighting_module = LightingModule()
-        self._security_module = SecurityModule()
-        self._energy_module = EnergyModule()
+    def __init__(self, district=None):
+        self.district = district
+        if district is None:
+            event_log.info("controller.initialized", "SmartCityController initialized (Singleton instance created).")
+        else:
+            event_log.info("controller.initialized", "SmartCityController initialized for district '{district}'.",
+                           district=district)
+        self._subsystems = {}
+        self._subsystem_lock = threading.Lock()
+        self._simulation = SimulationEngine()
+        self.bus = EventBus()
+        self._builder = None
+        self.infrastructure = None
+        self._sensor_ingestion = None
+
+    @classmethod
+    def for_district(cls, name):
+        """Returns the controller dedicated to district `name` (one per district per process)."""
+        return cls.keyed_instance(name, district=name)
+
+    # --- Lazy Subsystems ---
+
+    def _subsystem(self, name):
+        """Imports and constructs a subsystem the first time it is needed."""
+        module = self._subsystems.get(name)
+        if module is None:
+            with self._subsystem_lock:
+                module = self._subsystems.get(name)
+                if module is None:
+                    module_path, class_name = SUBSYSTEMS[name]
+                    module_class = getattr(importlib.import_module(module_path), class_name)
+                    module = module_class()
+                    module.register_events(self._simulation)
+                    module.connect(self.bus)
+                    self._subsystems[name] = module
+        return module
+
+    @property
+    def _transport_module(self):
+        return self._subsystem("transport")
+
+    @property
+    def _lighting_module(self):
+        return self._subsystem("lighting")
+
+    @property
+    def _security_module(self):
+        return self._subsystem("security")
+
+    @property
+    def _energy_module(self):
+        return self._subsystem("energy")
+
+    def loaded_subsystems(self):
+        return list(self._subsystems)
 
     # --- Facade Methods ---
 
+    @timed("controller.start_city_operations")
     def start_city_operations(self):
         """Starts all core city operations."""
-        print("\n--- Starting Smart City Operations ---")
+        event_log.info("controller.section", "\n--- Starting Smart City Operations ---")
         self._transport_module.start_traffic_control()
         self._lighting_module.activate_smart_lighting()
         self._security_module.deploy_security_system()
         self._energy_module.start_monitoring()
-        print("--- All core operations are active. ---")
+        event_log.info("controller.section", "--- All core operations are active. ---")
 
+    @timed("controller.optimize_energy_usage")
     def optimize_energy_usage(self):
-        """Optimizes energy usage across the city."""
-        print("\n--- Optimizing Energy Usage ---")
-        self._lighting_module.adjust_brightness_for_saving()
+        """
+        Optimizes energy usage across the city: the demand-response optimizer
+        schedules street-light dimming and overnight fleet charging against the
+        feeder load forecast, and the lights take the dim level for the current
+        simulated period. Returns the DemandSchedule.
+        """
+        event_log.info("controller.section", "\n--- Optimizing Energy Usage ---")
+        schedule = self._energy_module.optimize_demand(*self._demand_response_inputs())
+        self._lighting_module.apply_dim_level(schedule.dim_level(self._current_period(schedule)))
         self._energy_module.report_usage()
-        print("--- Optimization complete. ---")
+        event_log.info("controller.section", "--- Optimization complete. ---")
+        return schedule
+
+    def _demand_response_inputs(self):
+        """Flexible loads for the optimizer: lighting kW per period, min dim, charging kWh and kW, charging window."""
+        lighting_kw, min_dim = self._lighting_module.flexible_load(self._energy_module.PERIODS_PER_DAY)
+        charging_kwh, charging_kw = self._transport_module.charging_demand()
+        return lighting_kw, min_dim, charging_kwh, charging_kw, self._transport_module.CHARGING_WINDOW_HOURS
+
+    def _current_period(self, schedule):
+        periods = schedule.problem.periods
+        return int(self._simulation.now % SECONDS_PER_DAY * periods // SECONDS_PER_DAY) % periods
 
+    @timed("controller.event_bus_stats")
+    def event_bus_stats(self, prefix=""):
+        """Per-topic throughput, delivery and lag counters of the bus the subsystems publish on."""
+        return self.bus.stats(prefix)
+
+    @timed("controller.get_city_status")
     def get_city_status(self):
         """Retrieves the current status of all major subsystems."""
-        print("\n--- Smart City Status Report ---")
+        event_log.info("controller.section", "\n--- Smart City Status Report ---")
         self._transport_module.get_status()
         self._lighting_module.get_status()
         self._security_module.get_status()
         self._energy_module.get_status()
-        print("--- End of Status Report ---")
+        event_log.info("controller.section", "--- End of Status Report ---")
 
+    @timed("controller.manage_transport")
     def manage_transport(self, vehicle_type):
         """Manages transport operations using the Factory Method."""
-        print(f"\n--- Managing Transport: Creating a {vehicle_type} ---")
+        event_log.info("controller.section", "\n--- Managing Transport: Creating a {vehicle_type} ---", vehicle_type=vehicle_type)
         self._transport_module.create_vehicle(vehicle_type)
 
+    @timed("controller.check_security_feed")
     def check_security_feed(self):
         """Checks the security feed, demonstrating the Adapter pattern."""
-        print("\n--- Checking Security Feed ---")
+        event_log.info("controller.section", "\n--- Checking Security Feed ---")
         self._security_module.check_feed()
 
+    @timed("controller.request_sensitive_energy_data")
     def request_sensitive_energy_data(self, user_role):
         """Requests sensitive energy data, demonstrating the Proxy pattern."""
-        print(f"\n--- Requesting Sensitive Energy Data as {user_role} ---")
+        event_log.info("controller.section", "\n--- Requesting Sensitive Energy Data as {user_role} ---", user_role=user_role)
         self._energy_module.get_sensitive_data(user_role)
 
+    @timed("controller.build_infrastructure")
+    def build_infrastructure(self, plan=None):
+        """Builds the city's infrastructure plan; later calls rebuild only the steps whose inputs changed."""
+        from core.builders.infrastructure_builder import SmartCityBuilder, InfrastructureDirector
+        if self._builder is None:
+            self._builder = SmartCityBuilder()
+        director = InfrastructureDirector(self._builder)
+        plan = plan if plan is not None else SmartCityBuilder.STEPS
+        if self.infrastructure is None:
+            director.build_plan(plan)
+            self.infrastructure = self._builder.get_result()
+            rebuilt = list(plan)
+        else:
+            self.infrastructure = director.rebuild_incremental(self.infrastructure, plan)
+            rebuilt = director.last_rebuilt_steps
+        event_log.info("controller.infrastructure_built", "Controller: Infrastructure has {parts} parts ({steps} steps rebuilt).",
+                       parts=len(self.infrastructure.parts), steps=len(rebuilt))
+        return self.infrastructure
+
+    @timed("controller.run_simulation")
+    def run_simulation(self, duration=SECONDS_PER_DAY, speed=None):
+        """Advances city state through simulated time; headless fast-forward unless `speed` is given."""
+        event_log.info("controller.section", "\n--- Running City Simulation ({duration:.0f}s of simulated time) ---", duration=duration)
+        for name in SUBSYSTEMS:
+            self._subsystem(name)
+        report = self._simulation.run(until=self._simulation.now + duration, speed=speed)
+        event_log.info("controller.simulation_report", "{report}", report=report)
+        return report
+
+    @timed("controller.status_summary")
+    def status_summary(self):
+        """Plain-data summary of this controller's state, suitable for merging across districts."""
+        summary = {
+            "district": self.district,
+            "subsystems": sorted(self._subsystems),
+            "simulated_seconds": self._simulation.now,
+            "simulation_events": self._simulation.events_processed,
+        }
+        transport = self._subsystems.get("transport")
+        if transport is not None:
+            summary["vehicles"] = transport.count_by_type()
+        return summary
+
+    # --- Snapshots ---
+
+    @timed("controller.snapshot")
+    def snapshot(self, path):
+        """
+        Writes the state of every loaded subsystem plus the builder output to one
+        compact binary file (see core.persistence.snapshot). Returns its size in bytes.
+        """
+        from core.persistence.snapshot import SnapshotWriter
+        writer = SnapshotWriter()
+        saved = [name for name, module in list(self._subsystems.items()) if hasattr(module, "save_state")]
+        for name in saved:
+            self._subsystems[name].save_state(writer, name)
+        if self.infrastructure is not None:
+            writer.add_record("builder.infrastructure", self.infrastructure.to_record())
+        writer.add_record("controller", {"district": self.district, "subsystems": saved})
+        size = writer.write(path)
+        event_log.info("controller.snapshot_saved", "Controller: Saved snapshot of {subsystems} to {path} ({size} bytes).",
+                       subsystems=", ".join(saved) or "no subsystems", path=path, size=size)
+        return size
+
+    @timed("controller.restore")
+    def restore(self, path):
+        """Loads a snapshot written by snapshot(); large columns stay memory-mapped until modified."""
+        from core.persistence.snapshot import SnapshotReader
+        from core.builders.infrastructure_builder import CityInfrastructure
+        reader = SnapshotReader(path)
+        state = reader.record("controller")
+        for name in state["subsystems"]:
+            self._subsystem(name).load_state(reader, name)
+        record = reader.record("builder.infrastructure")
+        self.infrastructure = CityInfrastructure.from_record(record) if record is not None else None
+        event_log.info("controller.snapshot_restored", "Controller: Restored {subsystems} from {path}.",
+                       subsystems=", ".join(state["subsystems"]) or "no subsystems", path=path)
+        return state["subsystems"]
+
+    # --- Sensor Ingestion ---
+
+    @property
+    def sensor_ingestion(self):
+        if self._sensor_ingestion is None:
+            from core.ingestion.sensor_ring import SensorIngestion
+            self._sensor_ingestion = SensorIngestion()
+            # Rings are shared-memory segments: remove them at exit if close() was never called
+            atexit.register(self._sensor_ingestion.close)
+        return self._sensor_ingestion
+
+    @timed("controller.open_sensor_ring")
+    def open_sensor_ring(self, capacity=1 << 16, overflow="block"):
+        """Creates a shared-memory ring for one producer process to write sensor readings into."""
+        ring = self.sensor_ingestion.open_ring(capacity, overflow)
+        event_log.info("controller.sensor_ring_opened", "Controller: Opened sensor ring {name} ({capacity} readings, overflow: {overflow}).",
+                       name=ring.name, capacity=capacity, overflow=overflow)
+        return ring
+
+    @timed("controller.drain_sensor_readings")
+    def drain_sensor_readings(self, handler, max_batch=None):
+        """Hands every waiting batch of readings to handler(batch) as zero-copy column views; returns the count."""
+        if self._sensor_ingestion is None:
+            return 0
+        return self._sensor_ingestion.drain(handler, max_batch)
+
+    def close(self):
+        """Closes and removes the sensor rings this controller opened; the controller stays usable."""
+        ingestion, self._sensor_ingestion = self._sensor_ingestion, None
+        if ingestion is not None:
+            atexit.unregister(ingestion.close)
+            ingestion.close()
+
+    # --- Metrics ---
+
+    def serve_metrics(self, port=0, host="127.0.0.1"):
+        """Starts the optional local Prometheus endpoint for all facade and module metrics; returns the server."""
+        from core.metrics.server import MetricsServer
+        server = MetricsServer(host=host, port=port).start()
+        event_log.info("controller.metrics_serving", "Controller: Serving metrics at {url}.", url=server.url)
+        return server
+
+    # --- Async Facade Methods ---
+    # Independent subsystems are called concurrently; `timeout` applies to each subsystem call.
+    # Results map subsystem names to return values or to the exception that call raised.
+    # asyncio is only imported once an async method is used, keeping controller import cheap.
+
+    @timed_async("controller.start_city_operations_async")
+    async def start_city_operations_async(self, timeout=None):
+        from core.concurrency.async_runner import fan_out
+        event_log.info("controller.section", "\n--- Starting Smart City Operations (concurrent) ---")
+        results = await fan_out({
+            "transport": self._transport_module.start_traffic_control_async(),
+            "lighting": self._lighting_module.activate_smart_lighting_async(),
+            "security": self._security_module.deploy_security_system_async(),
+            "energy": self._energy_module.start_monitoring_async(),
+        }, timeout)
+        self._report_failures(results)
+        event_log.info("controller.section", "--- All core operations are active. ---")
+        return results
+
+    @timed_async("controller.optimize_energy_usage_async")
+    async def optimize_energy_usage_async(self, timeout=None):
+        from core.concurrency.async_runner import fan_out
+        event_log.info("controller.section", "\n--- Optimizing Energy Usage (concurrent) ---")
+        # The optimizer runs under the same timeout and failure reporting as the subsystem calls;
+        # without a schedule there is no dim level to apply, so the dependent calls are skipped.
+        planned = await fan_out({"energy": self._energy_module.optimize_demand_async(*self._demand_response_inputs())},
+                                timeout)
+        schedule = planned["energy"]
+        if isinstance(schedule, BaseException):
+            self._report_failures(planned)
+            return planned
+        results = await fan_out({
+            "lighting": self._lighting_module.apply_dim_level_async(schedule.dim_level(self._current_period(schedule))),
+            "energy": self._energy_module.report_usage_async(),
+        }, timeout)
+        self._report_failures(results)
+        event_log.info("controller.section", "--- Optimization complete. ---")
+        return results
+
+    @timed_async("controller.get_city_status_async")
+    async def get_city_status_async(self, timeout=None):
+        from core.concurrency.async_runner import fan_out
+        event_log.info("controller.section", "\n--- Smart City Status Report (concurrent) ---")
+        results = await fan_out({
+            "transport": self._transport_module.get_status_async(),
+            "lighting": self._lighting_module.get_status_async(),
+            "security": self._security_module.get_status_async(),
+            "energy": self._energy_module.get_status_async(),
+        }, timeout)
+        self._report_failures(results)
+        event_log.info("controller.section", "--- End of Status Report ---")
+        return results
+
+    def run_async(self, facade_call):
+        """Sync wrapper: runs one of the async facade coroutines to completion."""
+        from core.concurrency.async_runner import run_sync
+        return run_sync(facade_call)
+
+    @staticmethod
+    def _report_failures(results):
+        import asyncio
+        for name, result in results.items():
+            if isinstance(result, asyncio.TimeoutError):
+                event_log.warning("controller.subsystem_timeout", "Controller Warning: {name} subsystem timed out.", name=name)
+            elif isinstance(result, Exception):
+                event_log.error("controller.subsystem_failed", "Controller Error: {name} subsystem failed: {error}", name=name, error=result)
+
     # Add more facade methods as needed to expose subsystem functionality
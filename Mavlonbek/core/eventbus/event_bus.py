@@ -0,0 +1,380 @@
+# FIO/core/eventbus/event_bus.py
+
+import contextlib
+import threading
+import time
+from collections import deque
+
+from core.eventlog.event_log import event_log
+
+# --- Topics ---
+# Topics are dot-separated words ("energy.feeders.over_capacity"). Subscription
+# patterns may use "*" for exactly one word and a trailing "#" for zero or more
+# words: "energy.*.over_capacity", "transport.#", "#".
+
+SINGLE_WORD = "*"
+ANY_WORDS = "#"
+
+
+class Message:
+    """One published event: topic, keyword payload and publish time (perf_counter, for lag)."""
+    __slots__ = ("topic", "payload", "published_at")
+
+    def __init__(self, topic, payload, published_at):
+        self.topic = topic
+        self.payload = payload
+        self.published_at = published_at
+
+    def __repr__(self):
+        return f"Message({self.topic!r}, {self.payload!r})"
+
+
+class _TrieNode:
+    __slots__ = ("children", "subscriptions")
+
+    def __init__(self):
+        self.children = {}
+        self.subscriptions = []
+
+
+class TopicTrie:
+    """
+    Subscription patterns compiled into a trie of topic words. Matching walks
+    the topic's words once, following the literal child plus any "*" and "#"
+    children, so its cost depends on the topic depth and the wildcards in use,
+    not on how many subscriptions exist.
+    """
+    def __init__(self):
+        self.root = _TrieNode()
+
+    @staticmethod
+    def split(pattern):
+        words = pattern.split(".")
+        if not all(words):
+            raise ValueError(f"Empty word in topic pattern {pattern!r}")
+        if ANY_WORDS in words[:-1]:
+            raise ValueError(f"'{ANY_WORDS}' may only end a topic pattern: {pattern!r}")
+        return words
+
+    def insert(self, pattern, subscription):
+        node = self.root
+        for word in self.split(pattern):
+            child = node.children.get(word)
+            if child is None:
+                child = node.children[word] = _TrieNode()
+            node = child
+        node.subscriptions.append(subscription)
+
+    def remove(self, pattern, subscription):
+        """Removes a subscription and prunes the branches it leaves empty; returns False if it was not there."""
+        path = [self.root]
+        for word in self.split(pattern):
+            node = path[-1].children.get(word)
+            if node is None:
+                return False
+            path.append(node)
+        if subscription not in path[-1].subscriptions:
+            return False
+        path[-1].subscriptions.remove(subscription)
+        for parent, word, node in zip(reversed(path[:-1]), reversed(self.split(pattern)), reversed(path)):
+            if node.subscriptions or node.children:
+                break
+            del parent.children[word]
+        return True
+
+    def match(self, topic):
+        """Subscriptions whose pattern matches `topic`."""
+        words = topic.split(".")
+        depth = len(words)
+        found = []
+        stack = [(self.root, 0)]
+        while stack:
+            node, index = stack.pop()
+            children = node.children
+            rest = children.get(ANY_WORDS)
+            if rest is not None:
+                found.extend(rest.subscriptions)
+            if index == depth:
+                found.extend(node.subscriptions)
+                continue
+            child = children.get(words[index])
+            if child is not None:
+                stack.append((child, index + 1))
+            child = children.get(SINGLE_WORD)
+            if child is not None:
+                stack.append((child, index + 1))
+        return found
+
+# --- Subscriptions ---
+
+class Subscription:
+    """
+    A handler registered for a topic pattern. Synchronous handlers run inside
+    publish(); asynchronous ones run on the bus's executor, in publish order,
+    one delivery at a time per subscription. Batch handlers receive a list of
+    Messages instead of one Message per call.
+    """
+    def __init__(self, bus, number, pattern, handler, asynchronous, batch):
+        self.bus = bus
+        self.number = number  # Subscription order, which is also delivery order
+        self.pattern = pattern
+        self.handler = handler
+        self.asynchronous = asynchronous
+        self.batch = batch
+        self.delivered = 0
+        self._queue = deque()
+        self._scheduled = False
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        mode = "async" if self.asynchronous else "sync"
+        return f"Subscription({self.pattern!r}, {mode}{', batch' if self.batch else ''})"
+
+    def unsubscribe(self):
+        return self.bus.unsubscribe(self)
+
+# --- Statistics ---
+
+class TopicStats:
+    """
+    Per-topic counters: messages published, delivered to a handler that returned
+    normally, handler errors, and lag from publish to the start of delivery.
+    """
+    __slots__ = ("published", "delivered", "errors", "lag_total", "lag_max", "first_published", "last_published")
+
+    def __init__(self, now):
+        self.published = 0
+        self.delivered = 0
+        self.errors = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.first_published = now
+        self.last_published = now
+
+    def to_dict(self):
+        window = self.last_published - self.first_published
+        attempts = self.delivered + self.errors
+        return {"published": self.published, "delivered": self.delivered, "errors": self.errors,
+                "publish_rate": self.published / window if window > 0 else None,
+                "mean_lag": self.lag_total / attempts if attempts else None,
+                "max_lag": self.lag_max}
+
+# --- Event Bus ---
+
+class EventBus:
+    """
+    In-process publish/subscribe bus connecting the city modules.
+    Publishers call publish(topic, **payload); subscribers register a handler
+    for a topic pattern. Patterns are compiled into a TopicTrie, and the
+    matching subscriptions of each published topic are cached until the next
+    (un)subscribe, so a repeat publish costs one dict lookup however many
+    subscribers there are. publish_batch() and the batched() block deliver many
+    messages with one handler call per batch subscriber. Asynchronous handlers
+    run on a thread pool of `workers` threads created on first use. A failing
+    handler is logged and counted; it never reaches the publisher.
+    """
+    def __init__(self, workers=4, max_batch=256, route_cache_size=4096):
+        self.workers = workers
+        self.max_batch = max_batch
+        self.route_cache_size = route_cache_size
+        self._trie = TopicTrie()
+        self._routes = {}
+        self._topics = {}
+        self._subscription_count = 0
+        self._lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = None
+        self._pending = 0  # Asynchronous subscriptions with a delivery scheduled or running
+        self._idle = threading.Condition(threading.Lock())
+
+    # --- Subscribing ---
+
+    def subscribe(self, pattern, handler, asynchronous=False, batch=False):
+        """Registers handler(message) (or handler([messages]) with `batch`) for `pattern`; returns the Subscription."""
+        with self._lock:
+            self._subscription_count += 1
+            subscription = Subscription(self, self._subscription_count, pattern, handler, asynchronous, batch)
+            self._trie.insert(pattern, subscription)
+            self._routes = {}
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            removed = self._trie.remove(subscription.pattern, subscription)
+            self._routes = {}
+        return removed
+
+    def subscribers(self, topic):
+        """Subscriptions a message on `topic` is delivered to, in subscription order."""
+        routes = self._routes.get(topic)
+        if routes is None:
+            with self._lock:
+                routes = tuple(sorted(self._trie.match(topic), key=lambda subscription: subscription.number))
+                if len(self._routes) >= self.route_cache_size:
+                    self._routes = {}
+                self._routes[topic] = routes
+        return routes
+
+    # --- Publishing ---
+
+    def publish(self, topic, /, **payload):
+        """Publishes one message; returns the number of subscriptions it was routed to."""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is not None:
+            buffer.append((topic, payload))
+            return 0
+        now = time.perf_counter()
+        message = Message(topic, payload, now)
+        routes = self.subscribers(topic)
+        with self._stats_lock:
+            stats = self._topics.get(topic)
+            if stats is None:
+                stats = self._topics[topic] = TopicStats(now)
+            stats.published += 1
+            stats.last_published = now
+        for subscription in routes:
+            if subscription.asynchronous:
+                self._enqueue(subscription, (message,))
+            else:
+                self._deliver(subscription, (message,))
+        return len(routes)
+
+    def publish_batch(self, messages):
+        """
+        Publishes (topic, payload dict) pairs together: each subscription receives
+        all of its messages in one delivery (one call for batch handlers), in
+        publish order. Returns the number of messages published.
+        """
+        now = time.perf_counter()
+        batches, counts = {}, {}
+        for topic, payload in messages:
+            message = Message(topic, payload, now)
+            counts[topic] = counts.get(topic, 0) + 1
+            for subscription in self.subscribers(topic):
+                batch = batches.get(subscription)
+                if batch is None:
+                    batch = batches[subscription] = []
+                batch.append(message)
+        if not counts:
+            return 0
+        self._count_published(counts, now)
+        for subscription in sorted(batches, key=lambda subscription: subscription.number):
+            if subscription.asynchronous:
+                self._enqueue(subscription, batches[subscription])
+            else:
+                self._deliver(subscription, batches[subscription])
+        return sum(counts.values())
+
+    @contextlib.contextmanager
+    def batched(self):
+        """Collects this thread's publish() calls in the block and publishes them as one batch on exit."""
+        if getattr(self._local, "buffer", None) is not None:
+            yield self  # Already inside a batched block on this thread
+            return
+        self._local.buffer = buffer = []
+        try:
+            yield self
+        finally:
+            self._local.buffer = None
+            self.publish_batch(buffer)
+
+    # --- Delivery ---
+
+    def _count_published(self, counts, now):
+        with self._stats_lock:
+            topics = self._topics
+            for topic, count in counts.items():
+                stats = topics.get(topic)
+                if stats is None:
+                    stats = topics[topic] = TopicStats(now)
+                stats.published += count
+                stats.last_published = now
+
+    def _deliver(self, subscription, messages):
+        started = time.perf_counter()
+        handler = subscription.handler
+        failed = []
+        if subscription.batch:
+            try:
+                handler(list(messages))
+            except Exception as e:
+                failed.extend(messages)
+                self._report_failure(subscription, messages[0].topic, e)
+        else:
+            for message in messages:
+                try:
+                    handler(message)
+                except Exception as e:
+                    failed.append(message)
+                    self._report_failure(subscription, message.topic, e)
+        subscription.delivered += len(messages) - len(failed)
+        with self._stats_lock:
+            topics = self._topics
+            for message in messages:
+                stats = topics[message.topic]
+                lag = started - message.published_at
+                stats.delivered += 1
+                stats.lag_total += lag
+                if lag > stats.lag_max:
+                    stats.lag_max = lag
+            for message in failed:
+                stats = topics[message.topic]
+                stats.delivered -= 1
+                stats.errors += 1
+
+    @staticmethod
+    def _report_failure(subscription, topic, error):
+        event_log.error("bus.subscriber_failed", "Event Bus Error: Subscriber {pattern} failed on {topic}: {error}",
+                        pattern=subscription.pattern, topic=topic, error=error)
+
+    def _enqueue(self, subscription, messages):
+        with subscription._lock:
+            subscription._queue.extend(messages)
+            if subscription._scheduled:
+                return
+            subscription._scheduled = True
+        with self._idle:
+            self._pending += 1
+        self._get_executor().submit(self._drain, subscription)
+
+    def _drain(self, subscription):
+        """Executor task: delivers an asynchronous subscription's queue in chunks of up to max_batch messages."""
+        queue = subscription._queue
+        while True:
+            with subscription._lock:
+                if not queue:
+                    subscription._scheduled = False
+                    break
+                messages = [queue.popleft() for _ in range(min(len(queue), self.max_batch))]
+            self._deliver(subscription, messages)
+        with self._idle:
+            self._pending -= 1
+            if not self._pending:
+                self._idle.notify_all()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="event-bus")
+        return self._executor
+
+    def join(self, timeout=None):
+        """Waits until every asynchronous delivery queued so far has run; returns False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+    # --- Reporting ---
+
+    def stats(self, prefix=""):
+        """{topic: counters} for the topics starting with `prefix`; see TopicStats.to_dict()."""
+        with self._stats_lock:
+            return {topic: stats.to_dict() for topic, stats in sorted(self._topics.items()) if topic.startswith(prefix)}
+
+    def close(self, wait=True):
+        """Stops the executor; with `wait`, queued asynchronous deliveries finish first."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,177 @@
+# FIO/core/eventlog/event_log.py
+
+import sys
+import threading
+import time
+from collections import deque
+
+# --- Levels ---
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+# --- Event ---
+
+class Event:
+    """
+    A structured log record: level, kind (e.g. "transport.vehicle_created"),
+    timestamp and keyword fields. The human-readable message is only formatted
+    from its template when a sink or caller actually asks for it.
+    """
+    __slots__ = ("level", "kind", "template", "fields", "timestamp", "_message")
+
+    def __init__(self, level, kind, template, fields, timestamp):
+        self.level = level
+        self.kind = kind
+        self.template = template
+        self.fields = fields
+        self.timestamp = timestamp
+        self._message = None
+
+    @property
+    def source(self):
+        return self.kind.partition(".")[0]
+
+    @property
+    def message(self):
+        if self._message is None:
+            self._message = self.template.format(**self.fields) if self.fields else self.template
+        return self._message
+
+    def to_dict(self):
+        return {
+            "ts": self.timestamp,
+            "level": LEVEL_NAMES.get(self.level, str(self.level)),
+            "kind": self.kind,
+            "message": self.message,
+            "fields": {key: value if isinstance(value, (int, float, bool, type(None))) else str(value)
+                       for key, value in self.fields.items()},
+        }
+
+# --- Sinks ---
+
+class EventSink:
+    """Interface for event log outputs."""
+    def write(self, event: Event):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+class ConsoleSink(EventSink):
+    """Prints each event's message, matching the system's original console output."""
+    def __init__(self, stream=None):
+        self._stream = stream
+
+    def write(self, event):
+        print(event.message, file=self._stream or sys.stdout)
+
+class NullSink(EventSink):
+    """Discards events (the ring buffer still keeps them)."""
+    def write(self, event):
+        pass
+
+class JsonLinesSink(EventSink):
+    """
+    Appends events as JSON lines to a file, buffering `buffer_size` events per write.
+    Safe to share between threads: appends and flushes are serialized by one lock.
+    """
+    def __init__(self, path, buffer_size=1000):
+        import json  # Only needed once a file sink is configured
+        self._dumps = json.dumps
+        self._file = open(path, "a", encoding="utf-8")
+        self._buffer = []
+        self._buffer_size = buffer_size
+        self._lock = threading.Lock()
+
+    def write(self, event):
+        line = self._dumps(event.to_dict())
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self._buffer_size:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        lines, self._buffer = self._buffer, []
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._file.close()
+
+# --- Event Log ---
+
+class EventLog:
+    """
+    Structured replacement for print-based output.
+    Events below `level` are dropped before any formatting happens; accepted
+    events are kept in a bounded in-memory ring buffer and handed to every sink.
+    """
+    def __init__(self, level=INFO, capacity=10000, sinks=None):
+        self.level = level
+        self.buffer = deque(maxlen=capacity)
+        self.sinks = [ConsoleSink()] if sinks is None else list(sinks)
+
+    def enabled_for(self, level):
+        return level >= self.level
+
+    def emit(self, level, kind, template, /, **fields):
+        if level < self.level:
+            return None
+        event = Event(level, kind, template, fields, time.time())
+        self.buffer.append(event)
+        for sink in self.sinks:
+            sink.write(event)
+        return event
+
+    def debug(self, kind, template, /, **fields):
+        return self.emit(DEBUG, kind, template, **fields)
+
+    def info(self, kind, template, /, **fields):
+        return self.emit(INFO, kind, template, **fields)
+
+    def warning(self, kind, template, /, **fields):
+        return self.emit(WARNING, kind, template, **fields)
+
+    def error(self, kind, template, /, **fields):
+        return self.emit(ERROR, kind, template, **fields)
+
+    def set_sinks(self, *sinks):
+        """Replaces every sink, flushing the old ones; returns the previous sink list."""
+        previous = self.sinks
+        for sink in previous:
+            sink.flush()
+        self.sinks = list(sinks)
+        return previous
+
+    def recent(self, count=None, kind=None):
+        """Returns buffered events (oldest first), optionally filtered by kind prefix."""
+        events = list(self.buffer)
+        if kind is not None:
+            events = [event for event in events if event.kind.startswith(kind)]
+        return events if count is None else events[-count:]
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+# Shared event log used by the controller and all modules.
+event_log = EventLog()
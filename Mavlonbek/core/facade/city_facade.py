@@ -0,0 +1,65 @@
+# FIO/core/facade/city_facade.py
+
+from concurrent.futures import ProcessPoolExecutor
+
+from core.controller import SmartCityController
+from core.eventlog.event_log import event_log, WARNING
+
+
+def run_district(district, operations, quiet=True):
+    """
+    Runs facade `operations` ([(method_name, args), ...]) on one district's controller
+    and returns (district, per-operation results, status summary). Top-level so that
+    process pool workers can import it.
+    """
+    if quiet:
+        event_log.level = WARNING
+    controller = SmartCityController.for_district(district)
+    results = [getattr(controller, method_name)(*args) for method_name, args in operations]
+    return district, results, controller.status_summary()
+
+
+def merge_summaries(summaries):
+    """Combines per-district status summaries into one city-level summary."""
+    merged = {"districts": sorted(summary["district"] for summary in summaries),
+              "simulation_events": 0, "vehicles": {}}
+    for summary in summaries:
+        merged["simulation_events"] += summary["simulation_events"]
+        for vehicle_type, count in summary.get("vehicles", {}).items():
+            merged["vehicles"][vehicle_type] = merged["vehicles"].get(vehicle_type, 0) + count
+    return merged
+
+
+class CityFacade:
+    """
+    Design Pattern: Facade (Structural)
+    Purpose: City-level entry point over one SmartCityController per district.
+    Usage: Runs the same facade operations in every district, in parallel worker
+           processes (each with its own district controller) or in-process, and merges
+           the per-district results into a single city report.
+    """
+    def __init__(self, districts, max_workers=None, parallel=True, quiet=True):
+        self.districts = list(districts)
+        self.max_workers = max_workers
+        self.parallel = parallel
+        self.quiet = quiet
+
+    def run(self, operations):
+        """Returns {"districts": {name: {"results": [...], "summary": {...}}}, "city": merged summary}."""
+        operations = [(method_name, tuple(args)) for method_name, args in operations]
+        if self.parallel and len(self.districts) > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                outcomes = list(pool.map(run_district, self.districts,
+                                         [operations] * len(self.districts),
+                                         [self.quiet] * len(self.districts)))
+        else:
+            previous_level = event_log.level
+            try:
+                outcomes = [run_district(district, operations, self.quiet) for district in self.districts]
+            finally:
+                event_log.level = previous_level
+
+        report = {"districts": {}, "city": merge_summaries([summary for _, _, summary in outcomes])}
+        for district, results, summary in outcomes:
+            report["districts"][district] = {"results": results, "summary": summary}
+        return report
@@ -1,17 +1,30 @@
 # FIO/core/factories/abstract_factory.py
 
+import time
 from abc import ABC, abstractmethod
+from array import array
+from itertools import repeat
 
 # --- Abstract Products ---
+# Products are flyweights: stateless, immutable per-model behavior objects shared by
+# every physical device of that model. Per-device state lives in DeviceRecord/DeviceFleet.
 
 class Sensor(ABC):
     """Abstract Product A: Sensor"""
+    __slots__ = ()
+
     @abstractmethod
     def monitor(self):
         pass
 
+    def record_reading(self, ring, device_id, value, timestamp=None):
+        """Writes one numeric reading of device `device_id` into a SensorRing (see core.ingestion); False if dropped."""
+        return ring.write(device_id, time.time() if timestamp is None else timestamp, value)
+
 class Actuator(ABC):
     """Abstract Product B: Actuator"""
+    __slots__ = ()
+
     @abstractmethod
     def actuate(self):
         pass
@@ -19,23 +32,95 @@ class Actuator(ABC):
 # --- Concrete Products (Type 1: Basic) ---
 
 class BasicTrafficSensor(Sensor):
+    __slots__ = ()
+
     def monitor(self):
         return "Monitoring basic traffic flow."
 
 class BasicStreetLight(Actuator):
+    __slots__ = ()
+
     def actuate(self):
         return "Adjusting basic street light intensity."
 
 # --- Concrete Products (Type 2: Advanced) ---
 
 class AdvancedTrafficSensor(Sensor):
+    __slots__ = ()
+
     def monitor(self):
         return "Monitoring advanced traffic flow with AI analysis."
 
 class AdvancedStreetLight(Actuator):
+    __slots__ = ()
+
     def actuate(self):
         return "Adjusting advanced street light color and intensity."
 
+# --- Per-Device State ---
+
+DEVICE_OFFLINE = 0
+DEVICE_ONLINE = 1
+
+class DeviceRecord:
+    """Extrinsic state of one physical device; behavior comes from the shared `model` flyweight."""
+    __slots__ = ("device_id", "model", "x", "y", "state")
+
+    def __init__(self, device_id, model, x=0.0, y=0.0, state=DEVICE_ONLINE):
+        self.device_id = device_id
+        self.model = model
+        self.x = x
+        self.y = y
+        self.state = state
+
+class DeviceFleet:
+    """
+    Array-backed per-device records for very large device counts.
+    A device is a row of (model code, x, y, state) columns, roughly 10 bytes,
+    while its behavior is the flyweight looked up through the model code.
+    """
+    def __init__(self):
+        self._models = []
+        self._model_codes = {}
+        self.model_code = array("B")
+        self.x = array("f")
+        self.y = array("f")
+        self.state = array("B")
+
+    def __len__(self):
+        return len(self.model_code)
+
+    def _code(self, model):
+        code = self._model_codes.get(type(model))
+        if code is None:
+            code = self._model_codes[type(model)] = len(self._models)
+            self._models.append(model)
+        return code
+
+    def add(self, model, x=0.0, y=0.0, state=DEVICE_ONLINE):
+        device_id = len(self.model_code)
+        self.model_code.append(self._code(model))
+        self.x.append(x)
+        self.y.append(y)
+        self.state.append(state)
+        return device_id
+
+    def add_many(self, model, count, state=DEVICE_ONLINE):
+        start = len(self.model_code)
+        self.model_code.extend(repeat(self._code(model), count))
+        self.x.extend(repeat(0.0, count))
+        self.y.extend(repeat(0.0, count))
+        self.state.extend(repeat(state, count))
+        return range(start, start + count)
+
+    def model(self, device_id):
+        """The shared flyweight that implements the device's behavior."""
+        return self._models[self.model_code[device_id]]
+
+    def record(self, device_id):
+        return DeviceRecord(device_id, self.model(device_id), self.x[device_id],
+                            self.y[device_id], self.state[device_id])
+
 # --- Abstract Factory ---
 
 class CityDeviceFactory(ABC):
@@ -44,7 +129,20 @@ class CityDeviceFactory(ABC):
     Purpose: Provides an interface for creating families of related or dependent objects
              (Sensors and Actuators) without specifying their concrete classes.
     Usage: Allows the system to switch between 'Basic' and 'Advanced' device configurations easily.
+
+    Design Pattern: Flyweight (Structural)
+    Purpose: Products are shared, immutable per-model objects; every create_* call for the
+             same model returns the same instance, and per-device data is kept separately.
     """
+    _flyweights = {}
+
+    @staticmethod
+    def _shared(product_class):
+        product = CityDeviceFactory._flyweights.get(product_class)
+        if product is None:
+            product = CityDeviceFactory._flyweights[product_class] = product_class()
+        return product
+
     @abstractmethod
     def create_sensor(self) -> Sensor:
         pass
@@ -53,18 +151,31 @@ class CityDeviceFactory(ABC):
     def create_actuator(self) -> Actuator:
         pass
 
+    def create_sensor_device(self, device_id, x=0.0, y=0.0) -> DeviceRecord:
+        return DeviceRecord(device_id, self.create_sensor(), x, y)
+
+    def create_actuator_device(self, device_id, x=0.0, y=0.0) -> DeviceRecord:
+        return DeviceRecord(device_id, self.create_actuator(), x, y)
+
+    def add_sensors(self, fleet: DeviceFleet, count):
+        """Registers `count` sensors of this family in an array-backed fleet; returns their ids."""
+        return fleet.add_many(self.create_sensor(), count)
+
+    def add_actuators(self, fleet: DeviceFleet, count):
+        return fleet.add_many(self.create_actuator(), count)
+
 # --- Concrete Factories ---
 
 class BasicDeviceFactory(CityDeviceFactory):
     def create_sensor(self) -> Sensor:
-        return BasicTrafficSensor()
+        return self._shared(BasicTrafficSensor)
 
     def create_actuator(self) -> Actuator:
-        return BasicStreetLight()
+        return self._shared(BasicStreetLight)
 
 class AdvancedDeviceFactory(CityDeviceFactory):
     def create_sensor(self) -> Sensor:
-        return AdvancedTrafficSensor()
+        return self._shared(AdvancedTrafficSensor)
 
     def create_actuator(self) -> Actuator:
-        return AdvancedStreetLight()
+        return self._shared(AdvancedStreetLight)
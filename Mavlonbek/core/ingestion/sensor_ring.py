@@ -0,0 +1,307 @@
+# FIO/core/ingestion/sensor_ring.py
+
+import os
+import struct
+import time
+from array import array
+from multiprocessing import shared_memory
+
+# --- Shared Memory Layout ---
+# header (3 cache lines) | device id column (uint32) | timestamp column (float64) | value column (float64)
+# line 0: magic, capacity, overflow policy (written once at creation)
+# line 1: write counter, dropped counter   (owned by the producer)
+# line 2: read counter                     (owned by the consumer)
+# Counters only grow; a reading's slot is counter % capacity. Keeping the two
+# sides on separate cache lines stops them from invalidating each other.
+
+MAGIC = b"SCRING01"
+_CACHE_LINE = 64
+_HEADER_SIZE = 3 * _CACHE_LINE
+_META = struct.Struct("<8sQQ")
+_WRITE, _DROPPED, _READ = _CACHE_LINE // 8, _CACHE_LINE // 8 + 1, 2 * _CACHE_LINE // 8  # indexes into the header as uint64s
+READING_SIZE = 4 + 8 + 8  # device id, timestamp, value
+
+# --- Overflow Policies ---
+OVERFLOW_BLOCK = "block"   # Backpressure: the producer waits for the consumer, up to `timeout`
+OVERFLOW_DROP = "drop"     # Readings that do not fit are discarded and counted
+OVERFLOW_ERROR = "error"   # Writing to a full ring raises RingFullError
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP, OVERFLOW_ERROR)
+
+
+def _column(data, typecode):
+    """A memoryview of `data` with the given item format, converting only when needed."""
+    try:
+        view = memoryview(data)
+    except TypeError:
+        return memoryview(array(typecode, data))
+    return view if view.format == typecode else memoryview(array(typecode, view.tolist()))
+
+
+class RingFullError(BufferError):
+    """Raised when a ring stays full: immediately under OVERFLOW_ERROR, after `timeout` under OVERFLOW_BLOCK."""
+
+
+class ReadingBatch:
+    """
+    Zero-copy view of consecutive readings in a ring: `device_ids`, `timestamps`
+    and `values` are memoryviews straight into shared memory. They stay valid
+    until the batch is released; releasing hands the slots back to the producer
+    and releases the views, so copy anything that must outlive the batch.
+    Used as a context manager, the batch releases itself on exit.
+    """
+    __slots__ = ("ring", "start", "count", "device_ids", "timestamps", "values", "released")
+
+    def __init__(self, ring, start, device_ids, timestamps, values):
+        self.ring = ring
+        self.start = start
+        self.count = len(values)
+        self.device_ids = device_ids
+        self.timestamps = timestamps
+        self.values = values
+        self.released = False
+
+    def __len__(self):
+        return self.count
+
+    def release(self):
+        self.ring.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+        return False
+
+
+class SensorRing:
+    """
+    Single-producer, single-consumer ring buffer of fixed-width sensor readings
+    (device id, timestamp, value) in `multiprocessing.shared_memory`.
+    One process creates the ring and another attaches to it by name (a ring can
+    also be passed to a child process directly, it pickles as its name). The
+    producer appends with write()/write_batch(); the consumer drains batches
+    as memoryviews over the shared columns and releases them when done. Batch
+    calls copy whole column slices at once, which is what keeps ingestion at
+    millions of readings per second without NumPy.
+    """
+    def __init__(self, capacity=1 << 16, name=None, overflow=OVERFLOW_BLOCK, timeout=1.0, create=True):
+        if overflow is not None and overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.timeout = timeout
+        if create:
+            if capacity < 2 or capacity & (capacity - 1):
+                raise ValueError("Ring capacity must be a power of two.")
+            overflow = overflow or OVERFLOW_BLOCK
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER_SIZE + capacity * READING_SIZE)
+            self._shm.buf[:_HEADER_SIZE] = bytes(_HEADER_SIZE)
+            _META.pack_into(self._shm.buf, 0, MAGIC, capacity, OVERFLOW_POLICIES.index(overflow))
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            magic, capacity, policy = _META.unpack_from(self._shm.buf, 0)
+            if magic != MAGIC:
+                self._shm.close()
+                raise ValueError(f"Shared memory block {name!r} is not a sensor ring.")
+            overflow = overflow or OVERFLOW_POLICIES[policy]
+        self.overflow = overflow
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._drained = 0  # Consumer side: end of the readings handed out by drain()
+        self._owner_pid = os.getpid() if create else None  # Forked children inherit the object, not ownership
+        buffer = self._shm.buf
+        self._counters = buffer[:_HEADER_SIZE].cast("Q")
+        ids_end = _HEADER_SIZE + 4 * capacity
+        self.device_ids = buffer[_HEADER_SIZE:ids_end].cast("I")
+        self.timestamps = buffer[ids_end:ids_end + 8 * capacity].cast("d")
+        self.values = buffer[ids_end + 8 * capacity:ids_end + 16 * capacity].cast("d")
+
+    @classmethod
+    def attach(cls, name, overflow=None, timeout=1.0):
+        """Opens an existing ring created by another process; `overflow` defaults to the ring's own policy."""
+        return cls(name=name, overflow=overflow, timeout=timeout, create=False)
+
+    def __reduce__(self):
+        return self.__class__.attach, (self.name, self.overflow, self.timeout)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def dropped(self):
+        """Readings discarded under OVERFLOW_DROP since the ring was created."""
+        return self._counters[_DROPPED]
+
+    def __len__(self):
+        """Readings written but not yet released by the consumer."""
+        return self._counters[_WRITE] - self._counters[_READ]
+
+    def free_space(self):
+        return self.capacity - len(self)
+
+    def fill_ratio(self):
+        """How full the ring is (0.0 - 1.0); producers can use it to throttle before the policy kicks in."""
+        return len(self) / self.capacity
+
+    # --- Producer ---
+
+    def _reserve(self, wanted):
+        """Number of slots (<= wanted) the producer may fill now, applying the overflow policy."""
+        counters = self._counters
+        space = self.capacity - (counters[_WRITE] - counters[_READ])
+        if space >= wanted or self.overflow == OVERFLOW_DROP:
+            return min(space, wanted)
+        if self.overflow == OVERFLOW_ERROR:
+            if space:
+                return space
+            raise RingFullError(f"Sensor ring {self.name} is full ({self.capacity} readings).")
+        deadline = None
+        pause = 0.0
+        while not space:
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + self.timeout if self.timeout is not None else float("inf")
+            elif now >= deadline:
+                raise RingFullError(f"Sensor ring {self.name} stayed full for {self.timeout}s.")
+            time.sleep(pause)
+            pause = min(pause * 2 or 1e-5, 1e-3)
+            space = self.capacity - (counters[_WRITE] - counters[_READ])
+        return min(space, wanted)
+
+    def write(self, device_id, timestamp, value):
+        """Appends one reading; returns False if it was dropped."""
+        if not self._reserve(1):
+            self._counters[_DROPPED] += 1
+            return False
+        counters = self._counters
+        position = counters[_WRITE]
+        slot = position & self._mask
+        self.device_ids[slot] = device_id
+        self.timestamps[slot] = timestamp
+        self.values[slot] = value
+        counters[_WRITE] = position + 1  # Publish only after the reading is complete
+        return True
+
+    def write_batch(self, device_ids, timestamps, values):
+        """
+        Appends parallel columns of readings. Buffers with the ring's formats
+        (arrays with typecodes I, d, d, or views of another batch) are copied
+        slice by slice; other sequences are converted first. Returns the number
+        written; under OVERFLOW_DROP the rest are counted as dropped.
+        """
+        device_ids, timestamps, values = _column(device_ids, "I"), _column(timestamps, "d"), _column(values, "d")
+        total = len(device_ids)
+        if len(timestamps) != total or len(values) != total:
+            raise ValueError("Reading columns must have the same length.")
+        counters = self._counters
+        written = 0
+        while written < total:
+            count = self._reserve(total - written)
+            if not count:
+                counters[_DROPPED] += total - written
+                break
+            position = counters[_WRITE]
+            slot = position & self._mask
+            count = min(count, self.capacity - slot)  # Copy up to the end of the ring, then wrap
+            end = written + count
+            self.device_ids[slot:slot + count] = device_ids[written:end]
+            self.timestamps[slot:slot + count] = timestamps[written:end]
+            self.values[slot:slot + count] = values[written:end]
+            counters[_WRITE] = position + count
+            written = end
+        return written
+
+    # --- Consumer ---
+
+    def drain(self, max_count=None):
+        """
+        Returns the oldest unread readings as a ReadingBatch without copying.
+        A batch never wraps around the end of the ring, so a full drain can take
+        two calls; an empty batch means nothing is waiting. Several batches may
+        be outstanding at once; release them in the order they were drained.
+        """
+        counters = self._counters
+        position = max(self._drained, counters[_READ])
+        count = counters[_WRITE] - position
+        slot = position & self._mask
+        count = min(count, self.capacity - slot)
+        if max_count is not None:
+            count = min(count, max_count)
+        end = slot + count
+        self._drained = position + count
+        return ReadingBatch(self, position, self.device_ids[slot:end], self.timestamps[slot:end], self.values[slot:end])
+
+    def release(self, batch):
+        """Hands the slots of a drained batch back to the producer; releasing a batch twice does nothing."""
+        if batch.released:
+            return
+        counters = self._counters
+        if batch.start != counters[_READ]:
+            raise ValueError("Sensor ring batches must be released in the order they were drained.")
+        counters[_READ] = batch.start + len(batch)
+        batch.released = True
+        # The slots are the producer's again; make any later use of the views fail loudly
+        for view in (batch.device_ids, batch.timestamps, batch.values):
+            view.release()
+
+    # --- Lifetime ---
+
+    def close(self):
+        """Detaches from the shared memory (release outstanding batches first); the creating process also removes it."""
+        for view in (self._counters, self.device_ids, self.timestamps, self.values):
+            view.release()
+        self._shm.close()
+        if self._owner_pid == os.getpid():
+            self._shm.unlink()
+
+
+class SensorIngestion:
+    """
+    Consumer side for a set of sensor rings, one per producer process.
+    drain() hands every waiting batch to a handler and releases it afterwards,
+    so handlers get zero-copy column views and must copy anything they keep.
+    """
+    def __init__(self, capacity=1 << 16, overflow=OVERFLOW_BLOCK, timeout=1.0):
+        self.capacity = capacity
+        self.overflow = overflow
+        self.timeout = timeout
+        self.rings = []
+        self.readings_drained = 0
+
+    def open_ring(self, capacity=None, overflow=None, name=None):
+        """Creates a ring for one more producer; pass it (or its name) to the producer process."""
+        ring = SensorRing(capacity or self.capacity, name=name, overflow=overflow or self.overflow,
+                          timeout=self.timeout)
+        self.rings.append(ring)
+        return ring
+
+    def pending(self):
+        return sum(len(ring) for ring in self.rings)
+
+    def dropped(self):
+        return sum(ring.dropped for ring in self.rings)
+
+    def drain(self, handler, max_batch=None):
+        """
+        Passes the batches waiting in every ring to handler(batch); returns the
+        number of readings drained. Readings written meanwhile wait for the next
+        call, so a busy producer cannot keep one drain running forever.
+        """
+        drained = 0
+        for ring in self.rings:
+            waiting = len(ring)
+            while waiting:
+                batch = ring.drain(waiting if max_batch is None else min(max_batch, waiting))
+                waiting -= len(batch)
+                try:
+                    handler(batch)
+                finally:
+                    ring.release(batch)
+                drained += len(batch)
+        self.readings_drained += drained
+        return drained
+
+    def close(self):
+        for ring in self.rings:
+            ring.close()
+        self.rings = []
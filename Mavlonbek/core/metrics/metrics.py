@@ -0,0 +1,197 @@
+# FIO/core/metrics/metrics.py
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# --- Buckets ---
+# HDR-style fixed buckets: four log-spaced buckets per power of two from 1 µs to
+# ~67 s (bucket width ~19%), plus a final +Inf bucket. Bounds are in seconds.
+SUB_BUCKETS = 4
+BUCKET_BOUNDS = tuple(1e-6 * 2 ** (step / SUB_BUCKETS) for step in range(26 * SUB_BUCKETS + 1))
+
+
+class _Shard:
+    """One thread's private counters; only its owner thread ever writes to it."""
+    __slots__ = ("thread_id", "series", "calls")
+
+    def __init__(self):
+        self.thread_id = threading.get_ident()
+        self.series = {}  # name -> [calls, errors, total seconds, bucket counts]
+        self.calls = []   # names of the instrumented calls currently running on this thread
+
+
+class MetricsRegistry:
+    """
+    Call counters, error counters and latency histograms per instrumented method.
+    Every thread accumulates into its own shard, so recording takes no lock; a
+    reader merges the shards when metrics are collected. Set `enabled` to False
+    to turn instrumented methods back into plain calls.
+    """
+    def __init__(self, bounds=BUCKET_BOUNDS):
+        self.bounds = tuple(bounds)
+        self.enabled = True
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _record(self, shard, name, seconds, error):
+        entry = shard.series.get(name)
+        if entry is None:
+            entry = shard.series[name] = [0, 0, 0.0, [0] * (len(self.bounds) + 1)]
+        entry[0] += 1
+        if error:
+            entry[1] += 1
+        entry[2] += seconds
+        entry[3][bisect_left(self.bounds, seconds)] += 1
+
+    def record(self, name, seconds, error=False):
+        """Records one call of `name` that took `seconds`."""
+        self._record(self._shard(), name, seconds, error)
+
+    def timed(self, name):
+        """Decorator that records calls, errors and latency of a function under `name`."""
+        def decorate(function):
+            bounds, bucket_count, clock = self.bounds, len(self.bounds) + 1, time.perf_counter
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                try:
+                    shard = self._local.shard
+                except AttributeError:
+                    shard = self._shard()
+                calls = shard.calls
+                calls.append(name)
+                error = True
+                start = clock()
+                try:
+                    result = function(*args, **kwargs)
+                    error = False
+                    return result
+                finally:
+                    # Same bookkeeping as _record(), inlined to keep the per-call overhead low
+                    seconds = clock() - start
+                    calls.pop()
+                    entry = shard.series.get(name)
+                    if entry is None:
+                        entry = shard.series[name] = [0, 0, 0.0, [0] * bucket_count]
+                    entry[0] += 1
+                    if error:
+                        entry[1] += 1
+                    entry[2] += seconds
+                    entry[3][bisect_left(bounds, seconds)] += 1
+            wrapper.metric_name = name
+            return wrapper
+        return decorate
+
+    def timed_async(self, name):
+        """
+        timed() for coroutine functions: the latency spans the whole await.
+        Coroutines interleave on the loop thread, so they are left out of the
+        per-thread call stack the profiler samples.
+        """
+        def decorate(function):
+            clock = time.perf_counter
+
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await function(*args, **kwargs)
+                error = True
+                start = clock()
+                try:
+                    result = await function(*args, **kwargs)
+                    error = False
+                    return result
+                finally:
+                    self._record(self._shard(), name, clock() - start, error)
+            wrapper.metric_name = name
+            return wrapper
+        return decorate
+
+    # --- Collection ---
+
+    def shards(self):
+        with self._shards_lock:
+            return list(self._shards)
+
+    def collect(self):
+        """Merges every thread's shard: {name: {"calls", "errors", "sum", "buckets"}}."""
+        merged = {}
+        for shard in self.shards():
+            for name, (calls, errors, total, counts) in list(shard.series.items()):
+                entry = merged.get(name)
+                if entry is None:
+                    merged[name] = {"calls": calls, "errors": errors, "sum": total, "buckets": list(counts)}
+                else:
+                    entry["calls"] += calls
+                    entry["errors"] += errors
+                    entry["sum"] += total
+                    entry["buckets"] = [a + b for a, b in zip(entry["buckets"], counts)]
+        return merged
+
+    def quantile(self, name, fraction, collected=None):
+        """Upper bound of the bucket holding the `fraction` quantile of `name` (None if never called)."""
+        entry = (collected if collected is not None else self.collect()).get(name)
+        if entry is None or not entry["calls"]:
+            return None
+        rank = fraction * entry["calls"]
+        seen = 0
+        for index, count in enumerate(entry["buckets"]):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[index] if index < len(self.bounds) else float("inf")
+        return float("inf")
+
+    def hottest(self, count=5, prefix=""):
+        """Names with the largest total time, optionally only those starting with `prefix`."""
+        collected = self.collect()
+        names = [name for name in collected if name.startswith(prefix)]
+        return sorted(names, key=lambda name: collected[name]["sum"], reverse=True)[:count]
+
+    def reset(self):
+        for shard in self.shards():
+            shard.series = {}
+
+    # --- Exposition ---
+
+    def render_prometheus(self, namespace="smartcity"):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        collected = self.collect()
+        names = sorted(collected)
+        lines = [f"# HELP {namespace}_calls_total Calls per instrumented method.",
+                 f"# TYPE {namespace}_calls_total counter"]
+        lines += [f'{namespace}_calls_total{{method="{name}"}} {collected[name]["calls"]}' for name in names]
+        lines += [f"# HELP {namespace}_call_errors_total Calls that raised, per instrumented method.",
+                  f"# TYPE {namespace}_call_errors_total counter"]
+        lines += [f'{namespace}_call_errors_total{{method="{name}"}} {collected[name]["errors"]}' for name in names]
+        lines += [f"# HELP {namespace}_call_duration_seconds Latency per instrumented method.",
+                  f"# TYPE {namespace}_call_duration_seconds histogram"]
+        for name in names:
+            entry = collected[name]
+            cumulative = 0
+            for bound, count in zip(self.bounds, entry["buckets"]):
+                cumulative += count
+                lines.append(f'{namespace}_call_duration_seconds_bucket{{method="{name}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{namespace}_call_duration_seconds_bucket{{method="{name}",le="+Inf"}} {entry["calls"]}')
+            lines.append(f'{namespace}_call_duration_seconds_sum{{method="{name}"}} {entry["sum"]:.9g}')
+            lines.append(f'{namespace}_call_duration_seconds_count{{method="{name}"}} {entry["calls"]}')
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry used by the controller and all modules.
+metrics = MetricsRegistry()
+timed = metrics.timed
+timed_async = metrics.timed_async
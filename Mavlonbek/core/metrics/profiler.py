@@ -0,0 +1,87 @@
+# FIO/core/metrics/profiler.py
+
+import sys
+import threading
+from collections import Counter
+
+from core.metrics.metrics import metrics
+
+
+class SamplingProfiler:
+    """
+    Opt-in statistical profiler for the hottest instrumented calls.
+    A background thread wakes every `interval` seconds, picks the `top` calls
+    with the most total time (names starting with `prefix`, facade methods by
+    default) and records the current stack of every thread that is inside one
+    of them. Stacks are kept in collapsed form ("outer;inner;leaf" -> samples),
+    ready for flame-graph tools. Threads that are not inside a hot call cost nothing.
+    """
+    def __init__(self, registry=None, interval=0.005, top=3, prefix="controller.", max_depth=64):
+        self.registry = registry if registry is not None else metrics
+        self.interval = interval
+        self.top = top
+        self.prefix = prefix
+        self.max_depth = max_depth
+        self.samples = {}  # call name -> Counter of collapsed stacks
+        self.sample_rounds = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        hot, refresh_at = set(), 0
+        while not self._stop.wait(self.interval):
+            if self.sample_rounds >= refresh_at:
+                hot = set(self.registry.hottest(self.top, self.prefix))
+                refresh_at = self.sample_rounds + 20
+            self.sample_once(hot)
+
+    def sample_once(self, hot=None):
+        """Takes one round of samples; `hot` defaults to the current hottest calls."""
+        hot = set(self.registry.hottest(self.top, self.prefix)) if hot is None else hot
+        self.sample_rounds += 1
+        if not hot:
+            return
+        frames = sys._current_frames()
+        for shard in self.registry.shards():
+            active = [name for name in list(shard.calls) if name in hot]
+            frame = frames.get(shard.thread_id)
+            if not active or frame is None:
+                continue
+            stack = self._collapse(frame)
+            for name in set(active):
+                self.samples.setdefault(name, Counter())[stack] += 1
+
+    def _collapse(self, frame):
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def top_stacks(self, name, count=5):
+        """Most frequently sampled stacks of one call: [(collapsed stack, samples)]."""
+        return self.samples.get(name, Counter()).most_common(count)
+
+    def render_collapsed(self):
+        """Every sample as "call;stack count" lines (collapsed-stack format)."""
+        return "\n".join(f"{name};{stack} {count}" for name, stacks in sorted(self.samples.items())
+                         for stack, count in stacks.most_common())
@@ -0,0 +1,221 @@
+# FIO/core/persistence/snapshot.py
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+# --- File Layout ---
+# header | section data (each section 8-byte aligned) | section directory
+# header:    magic, format version, byte order of the array sections, section count, directory offset
+# directory: per section: kind, typecode, item size, name length, offset, length, name (utf-8)
+
+MAGIC = b"SCSNAP"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<6sHcxIQ")
+_ENTRY = struct.Struct("<BcBHQQ")
+_ALIGNMENT = 8
+
+KIND_ARRAY = 0
+KIND_RECORD = 1
+
+_BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+
+
+class SnapshotFormatError(ValueError):
+    """Raised for files that are not snapshots or use an unsupported format version."""
+
+
+# --- Records ---
+# Small structured state (names, settings, cache entries) is stored as a tagged
+# binary encoding of None/bool/int/float/str/bytes/list/tuple/dict values.
+
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+
+
+def _encode(value, out):
+    if value is None:
+        out += b"N"
+    elif value is True or value is False:
+        out += b"T" if value else b"F"
+    elif isinstance(value, int):
+        if -2 ** 63 <= value < 2 ** 63:
+            out += b"i" + _I64.pack(value)
+        else:
+            digits = str(value).encode()
+            out += b"I" + _U32.pack(len(digits)) + digits
+    elif isinstance(value, float):
+        out += b"d" + _F64.pack(value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        out += b"s" + _U32.pack(len(data)) + data
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        out += b"b" + _U32.pack(len(data)) + data
+    elif isinstance(value, (list, tuple)):
+        out += (b"l" if isinstance(value, list) else b"t") + _U32.pack(len(value))
+        for item in value:
+            _encode(item, out)
+    elif isinstance(value, dict):
+        out += b"m" + _U32.pack(len(value))
+        for key, item in value.items():
+            _encode(key, out)
+            _encode(item, out)
+    else:
+        raise TypeError(f"Cannot store {type(value).__name__} values in a snapshot record.")
+
+
+def _decode(data, offset):
+    tag = bytes(data[offset:offset + 1])
+    offset += 1
+    if tag == b"N":
+        return None, offset
+    if tag == b"T" or tag == b"F":
+        return tag == b"T", offset
+    if tag == b"i":
+        return _I64.unpack_from(data, offset)[0], offset + 8
+    if tag == b"d":
+        return _F64.unpack_from(data, offset)[0], offset + 8
+    if tag in (b"I", b"s", b"b"):
+        size = _U32.unpack_from(data, offset)[0]
+        raw = bytes(data[offset + 4:offset + 4 + size])
+        offset += 4 + size
+        if tag == b"I":
+            return int(raw), offset
+        return (raw.decode("utf-8") if tag == b"s" else raw), offset
+    if tag in (b"l", b"t", b"m"):
+        count = _U32.unpack_from(data, offset)[0]
+        offset += 4
+        if tag == b"m":
+            result = {}
+            for _ in range(count):
+                key, offset = _decode(data, offset)
+                result[key], offset = _decode(data, offset)
+            return result, offset
+        items = []
+        for _ in range(count):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        return (items if tag == b"l" else tuple(items)), offset
+    raise SnapshotFormatError(f"Corrupt snapshot record (unknown tag {tag!r}).")
+
+
+def encode_record(value):
+    out = bytearray()
+    _encode(value, out)
+    return out
+
+
+def decode_record(data):
+    value, _ = _decode(data, 0)
+    return value
+
+
+# --- Writer ---
+
+class SnapshotWriter:
+    """
+    Collects named sections and writes them as one snapshot file.
+    Array sections (typed columns) are written as raw native-order bytes so a
+    reader can memory-map them; record sections hold small structured values.
+    """
+    def __init__(self):
+        self._sections = []
+
+    def add_array(self, name, column):
+        """Adds a typed column (array.array or a typed memoryview)."""
+        typecode = getattr(column, "typecode", None) or column.format
+        self._sections.append((name, KIND_ARRAY, typecode, column.itemsize, memoryview(column).cast("B")))
+
+    def add_record(self, name, value):
+        self._sections.append((name, KIND_RECORD, "B", 1, encode_record(value)))
+
+    def write(self, path):
+        """Writes the snapshot atomically (temporary file + rename); returns its size in bytes."""
+        temporary = f"{path}.tmp"
+        entries = []
+        with open(temporary, "wb") as f:
+            f.write(bytes(_HEADER.size))
+            for name, kind, typecode, itemsize, data in self._sections:
+                padding = -f.tell() % _ALIGNMENT
+                f.write(bytes(padding))
+                entries.append((name, kind, typecode, itemsize, f.tell(), len(data)))
+                f.write(data)
+            directory_offset = f.tell()
+            for name, kind, typecode, itemsize, offset, length in entries:
+                encoded_name = name.encode("utf-8")
+                f.write(_ENTRY.pack(kind, typecode.encode(), itemsize, len(encoded_name), offset, length))
+                f.write(encoded_name)
+            size = f.tell()
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, _BYTE_ORDER, len(entries), directory_offset))
+        os.replace(temporary, path)
+        return size
+
+
+# --- Reader ---
+
+class SnapshotReader:
+    """
+    Opens a snapshot by memory-mapping it; only the header and directory are read.
+    Array sections come back as typed memoryviews over copy-on-write pages, so
+    restoring costs the same regardless of column size, and the pages are
+    private to this process: writes never reach the file.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        if len(self._map) < _HEADER.size:
+            raise SnapshotFormatError(f"{path} is not a city snapshot.")
+        magic, version, byte_order, count, directory_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise SnapshotFormatError(f"{path} is not a city snapshot.")
+        if version > FORMAT_VERSION:
+            raise SnapshotFormatError(f"Snapshot format version {version} is newer than supported ({FORMAT_VERSION}).")
+        self.version = version
+        self._swap_bytes = byte_order != _BYTE_ORDER
+        self._sections = {}
+        offset = directory_offset
+        for _ in range(count):
+            kind, typecode, itemsize, name_length, data_offset, length = _ENTRY.unpack_from(self._map, offset)
+            offset += _ENTRY.size
+            name = self._map[offset:offset + name_length].decode("utf-8")
+            offset += name_length
+            self._sections[name] = (kind, typecode.decode(), itemsize, data_offset, length)
+
+    def __contains__(self, name):
+        return name in self._sections
+
+    def names(self):
+        return list(self._sections)
+
+    def _section(self, name, kind):
+        try:
+            entry = self._sections[name]
+        except KeyError:
+            raise KeyError(f"Snapshot has no section '{name}'.") from None
+        if entry[0] != kind:
+            raise SnapshotFormatError(f"Snapshot section '{name}' has an unexpected kind.")
+        return entry
+
+    def array(self, name):
+        """Returns an array section as a writable typed memoryview over the mapping (no copy)."""
+        _, typecode, itemsize, offset, length = self._section(name, KIND_ARRAY)
+        if array(typecode).itemsize != itemsize:
+            raise SnapshotFormatError(f"Snapshot section '{name}' was written with a different '{typecode}' item size.")
+        data = memoryview(self._map)[offset:offset + length]
+        if self._swap_bytes and itemsize > 1:
+            column = array(typecode, data.tobytes())
+            column.byteswap()
+            return column
+        return data.cast(typecode)
+
+    def record(self, name, default=None):
+        if name not in self._sections:
+            return default
+        _, _, _, offset, length = self._section(name, KIND_RECORD)
+        return decode_record(memoryview(self._map)[offset:offset + length])
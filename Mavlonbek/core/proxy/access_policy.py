@@ -0,0 +1,129 @@
+# FIO/core/proxy/access_policy.py
+
+# --- Default City Policy ---
+# Each role lists the roles it inherits from and its own "resource:action" permissions.
+# "resource:*" grants every action declared for that resource anywhere in the policy.
+
+CITY_ROLES = {
+    "Viewer": {"inherits": [], "permissions": ["energy:read_basic", "transport:read_status",
+                                               "security:read_status", "lighting:read_status"]},
+    "Citizen": {"inherits": ["Viewer"], "permissions": []},
+    "Operator": {"inherits": ["Viewer"], "permissions": ["transport:manage", "lighting:adjust"]},
+    "Energy Manager": {"inherits": ["Operator"], "permissions": ["energy:read_sensitive", "energy:record"]},
+    "Security Officer": {"inherits": ["Operator"], "permissions": ["security:view_feed", "security:deploy"]},
+    "Admin": {"inherits": ["Energy Manager", "Security Officer"],
+              "permissions": ["energy:*", "transport:*", "security:*", "lighting:*"]},
+}
+
+# --- Policy Engine ---
+
+class AccessPolicy:
+    """
+    Role-based access policy compiled into bitsets.
+    Every permission gets a bit; every role's effective permission set (its own
+    plus everything it inherits) is folded into one integer mask at construction.
+    A decision is then a dict lookup and a bitwise AND, memoized in a bounded
+    decision cache. Shared by any proxy in core/proxy.
+    """
+    def __init__(self, roles=None, decision_cache_size=4096):
+        self._definitions = CITY_ROLES if roles is None else roles
+        self._permission_bits = {}
+        self._role_masks = {}
+        self._decisions = {}
+        self._decision_cache_size = decision_cache_size
+        self.cache_hits = 0
+        self._compile()
+
+    # --- Compilation ---
+
+    def _compile(self):
+        actions = {}
+        for definition in self._definitions.values():
+            for permission in definition["permissions"]:
+                resource, _, action = self._split(permission)
+                if action != "*":
+                    actions.setdefault(resource, []).append(permission)
+        for resource_permissions in actions.values():
+            for permission in resource_permissions:
+                self._permission_bits.setdefault(permission, 1 << len(self._permission_bits))
+
+        for role in self._definitions:
+            self._resolve(role, actions, ())
+
+    def _resolve(self, role, actions, visiting):
+        if role in self._role_masks:
+            return self._role_masks[role]
+        if role in visiting:
+            raise ValueError(f"Cyclic role inheritance: {' -> '.join(visiting + (role,))}")
+        definition = self._definitions.get(role)
+        if definition is None:
+            raise ValueError(f"Unknown role in inheritance: {role}")
+        mask = 0
+        for parent in definition["inherits"]:
+            mask |= self._resolve(parent, actions, visiting + (role,))
+        for permission in definition["permissions"]:
+            resource, _, action = self._split(permission)
+            if action == "*":
+                for granted in actions.get(resource, ()):
+                    mask |= self._permission_bits[granted]
+            else:
+                mask |= self._permission_bits[permission]
+        self._role_masks[role] = mask
+        return mask
+
+    @staticmethod
+    def _split(permission):
+        resource, separator, action = permission.partition(":")
+        if not separator or not resource or not action:
+            raise ValueError(f"Invalid permission '{permission}'; expected 'resource:action'.")
+        return resource, separator, action
+
+    # --- Decisions ---
+
+    @property
+    def roles(self):
+        return list(self._role_masks)
+
+    def role_mask(self, role):
+        """The compiled permission bitset of a role (0 for unknown roles)."""
+        return self._role_masks.get(role, 0)
+
+    def permission_mask(self, permissions):
+        """Bitset of several permissions; unknown permissions map to no bit."""
+        mask = 0
+        for permission in permissions:
+            mask |= self._permission_bits.get(permission, 0)
+        return mask
+
+    def is_allowed(self, role, permission):
+        key = (role, permission)
+        decision = self._decisions.get(key)
+        if decision is not None:
+            self.cache_hits += 1
+            return decision
+        bit = self._permission_bits.get(permission, 0)
+        decision = bit != 0 and self._role_masks.get(role, 0) & bit == bit
+        if len(self._decisions) >= self._decision_cache_size:
+            self._decisions.clear()
+        self._decisions[key] = decision
+        return decision
+
+    def check_many(self, requests):
+        """Decides a batch of (role, permission) pairs; returns a list of booleans."""
+        is_allowed = self.is_allowed
+        return [is_allowed(role, permission) for role, permission in requests]
+
+    def allows_all(self, role, permissions):
+        """True when `role` holds every permission in `permissions` (single mask test)."""
+        required = self.permission_mask(permissions)
+        if required == 0 or len(set(permissions)) != bin(required).count("1"):
+            return False
+        return self._role_masks.get(role, 0) & required == required
+
+    def permissions_of(self, role):
+        mask = self.role_mask(role)
+        return sorted(permission for permission, bit in self._permission_bits.items() if mask & bit)
+
+
+# Shared policy for the city's proxies.
+city_policy = AccessPolicy()
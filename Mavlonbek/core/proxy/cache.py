@@ -0,0 +1,141 @@
+# FIO/core/proxy/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+# --- Result Cache ---
+
+class ResultCache:
+    """
+    Thread-safe result cache with a per-entry TTL and bounded LRU eviction.
+    Expired entries are dropped lazily when looked up; the least recently used
+    entry is evicted once `max_entries` is exceeded. Every clear() bumps
+    `generation`, so a load started before a clear can be kept out of the
+    cache with put_if_generation().
+    """
+    def __init__(self, ttl=30.0, max_entries=1024, clock=time.monotonic):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive.")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def put_if_generation(self, key, value, generation):
+        """Stores `value` only if the cache has not been cleared since `generation` was read."""
+        with self._lock:
+            if self.generation != generation:
+                return False
+            self._store(key, value)
+            return True
+
+    def _store(self, key, value):
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def export_entries(self):
+        """Live entries as (key, remaining ttl, value), least recently used first."""
+        now = self._clock()
+        with self._lock:
+            return [(key, expires_at - now, value) for key, (expires_at, value) in self._entries.items()
+                    if expires_at > now]
+
+    def import_entries(self, entries):
+        """Re-adds exported entries; remaining ttls restart from this cache's clock."""
+        now = self._clock()
+        with self._lock:
+            for key, remaining, value in entries:
+                self._entries[key] = (now + remaining, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "expirations": self.expirations}
+
+# --- Request Coalescing ---
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the
+    function, later callers block until it finishes and share its result (or error).
+    """
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -1,5 +1,12 @@
 # FIO/core/proxy/proxy.py
 
+import threading
+
+from core.eventlog.event_log import event_log
+from core.proxy.access_policy import city_policy
+from core.proxy.cache import ResultCache, SingleFlight
+from core.timeseries.timeseries_store import TimeSeriesStore
+
 # --- Subject Interface ---
 
 class EnergyDataService:
@@ -10,16 +17,56 @@ class EnergyDataService:
     def get_sensitive_data(self):
         raise NotImplementedError
 
+    def query_basic_data(self, start, end, stat="sum"):
+        raise NotImplementedError
+
+    def query_sensitive_data(self, start, end, stat="sum"):
+        raise NotImplementedError
+
 # --- Real Subject ---
 
 class RealEnergyDataService(EnergyDataService):
-    """The actual service that performs the sensitive operation."""
+    """
+    The actual service that performs the sensitive operation.
+    Readings live in a TimeSeriesStore; summaries cover the hour window holding the latest reading.
+    Until any readings are recorded the service reports its static reference figures.
+    """
+    SUMMARY_WINDOW_SECONDS = 3600
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else TimeSeriesStore()
+
+    def _latest_window(self):
+        bounds = self.store.time_bounds()
+        if bounds is None:
+            return None
+        start = bounds[1] // self.SUMMARY_WINDOW_SECONDS * self.SUMMARY_WINDOW_SECONDS
+        return start, start + self.SUMMARY_WINDOW_SECONDS
+
     def get_basic_data(self):
-        return "Basic Energy Data: Current city-wide consumption is 1500 MWh."
+        window = self._latest_window()
+        if window is None:
+            return "Basic Energy Data: Current city-wide consumption is 1500 MWh."
+        return f"Basic Energy Data: Current city-wide consumption is {self.query_basic_data(*window):.0f} MWh."
 
     def get_sensitive_data(self):
         # Simulate a time-consuming or resource-intensive operation
-        return "Sensitive Energy Data: Detailed breakdown of consumption by critical infrastructure (Power Plant 1: 400 MWh, Data Center: 200 MWh)."
+        window = self._latest_window()
+        if window is None:
+            return "Sensitive Energy Data: Detailed breakdown of consumption by critical infrastructure (Power Plant 1: 400 MWh, Data Center: 200 MWh)."
+        breakdown = ", ".join(f"{name}: {value:.0f} MWh" for name, value in self.query_sensitive_data(*window).items())
+        return f"Sensitive Energy Data: Detailed breakdown of consumption by critical infrastructure ({breakdown})."
+
+    def query_basic_data(self, start, end, stat="sum"):
+        """City-wide aggregate over [start, end)."""
+        return self.store.aggregate_many(self.store.meters(), start, end, stat)
+
+    def query_sensitive_data(self, start, end, stat="sum"):
+        """Per-infrastructure aggregates over [start, end)."""
+        return self.store.aggregate_infrastructure(start, end, stat)
+
+    def record_samples(self, meter, timestamps, values, infrastructure=None):
+        self.store.append(meter, timestamps, values, infrastructure)
 
 # --- Proxy ---
 
@@ -29,33 +76,105 @@ class EnergyDataProxy(EnergyDataService):
     Purpose: Provides a surrogate or placeholder for another object (RealEnergyDataService)
              to control access to it.
     Usage: Implements access control (protection proxy) for sensitive energy data.
+           With `cache_ttl` set it is also a caching proxy: results are cached per query
+           and role class, and concurrent identical requests share one backend call.
     """
-    def __init__(self):
+    _NOT_CACHED = object()
+
+    SENSITIVE_PERMISSION = "energy:read_sensitive"
+
+    def __init__(self, store=None, cache_ttl=None, cache_size=1024, policy=None):
         self._real_service = None
-        self._allowed_roles = ["Admin", "Energy Manager"]
+        self._store = store
+        self._policy = policy if policy is not None else city_policy
+        self._init_lock = threading.Lock()
+        self._cache = ResultCache(cache_ttl, cache_size) if cache_ttl is not None else None
+        self._single_flight = SingleFlight()
 
-    def _check_access(self, user_role):
-        """Pre-check for access control."""
-        print(f"Proxy: Checking access for role '{user_role}'...")
-        if user_role in self._allowed_roles:
-            print("Proxy: Access granted.")
+    def _check_access(self, user_role, permission=SENSITIVE_PERMISSION):
+        """Pre-check for access control against the compiled access policy."""
+        event_log.info("proxy.access_check", "Proxy: Checking access for role '{user_role}'...", user_role=user_role)
+        if self._policy.is_allowed(user_role, permission):
+            event_log.info("proxy.access_granted", "Proxy: Access granted.", user_role=user_role)
             return True
-        print("Proxy: Access denied. Insufficient privileges.")
+        event_log.warning("proxy.access_denied", "Proxy: Access denied. Insufficient privileges.", user_role=user_role)
         return False
 
     def _get_real_service(self):
         """Lazy initialization of the Real Subject."""
         if self._real_service is None:
-            print("Proxy: Initializing RealEnergyDataService...")
-            self._real_service = RealEnergyDataService()
+            with self._init_lock:
+                if self._real_service is None:
+                    event_log.info("proxy.service_initialized", "Proxy: Initializing RealEnergyDataService...")
+                    self._real_service = RealEnergyDataService(self._store)
         return self._real_service
 
+    def _cached(self, key, loader):
+        """Serves `key` from the cache, coalescing concurrent misses into one `loader()` call."""
+        if self._cache is None:
+            return loader()
+        value = self._cache.get(key, self._NOT_CACHED)
+        if value is not self._NOT_CACHED:
+            return value
+
+        generation = self._cache.generation
+
+        def load_and_store():
+            result = loader()
+            # A load that raced an invalidation may hold stale data; hand it back but don't cache it
+            self._cache.put_if_generation(key, result, generation)
+            return result
+
+        # Calls made after an invalidation don't join a flight that started before it
+        return self._single_flight.do((generation, key), load_and_store)
+
+    def cache_stats(self):
+        """Hit/miss/eviction counters of the caching mode (None when caching is off)."""
+        if self._cache is None:
+            return None
+        stats = self._cache.stats()
+        stats["coalesced"] = self._single_flight.coalesced
+        return stats
+
+    def clear_cache(self):
+        if self._cache is not None:
+            self._cache.clear()
+
+    def save_state(self, writer, prefix):
+        """Adds the live cache entries (with their remaining ttl) to a SnapshotWriter."""
+        if self._cache is not None:
+            writer.add_record(f"{prefix}.cache", self._cache.export_entries())
+
+    def load_state(self, reader, prefix):
+        entries = reader.record(f"{prefix}.cache")
+        if self._cache is not None and entries:
+            self._cache.clear()
+            self._cache.import_entries(entries)
+
     def get_basic_data(self):
         # Basic data is always accessible
-        return self._get_real_service().get_basic_data()
+        return self._cached(("basic",), lambda: self._get_real_service().get_basic_data())
 
     def get_sensitive_data(self, user_role):
         if self._check_access(user_role):
-            return self._get_real_service().get_sensitive_data()
+            return self._cached(("sensitive", "privileged"), lambda: self._get_real_service().get_sensitive_data())
         else:
             return "Access Denied: Cannot retrieve sensitive energy data."
+
+    def query_basic_data(self, start, end, stat="sum"):
+        # Aggregated city-wide figures are always accessible
+        return self._cached(("query_basic", start, end, stat),
+                            lambda: self._get_real_service().query_basic_data(start, end, stat))
+
+    def query_sensitive_data(self, user_role, start, end, stat="sum"):
+        if self._check_access(user_role):
+            return self._cached(("query_sensitive", "privileged", start, end, stat),
+                                lambda: self._get_real_service().query_sensitive_data(start, end, stat))
+        else:
+            return "Access Denied: Cannot retrieve sensitive energy data."
+
+    def record_samples(self, meter, timestamps, values, infrastructure=None):
+        """Forwards a chunk of meter readings to the real service's store."""
+        self._get_real_service().record_samples(meter, timestamps, values, infrastructure)
+        # New readings can change any cached answer
+        self.clear_cache()
@@ -0,0 +1,188 @@
+# FIO/core/scenarios/runner.py
+
+import contextlib
+import inspect
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core.controller import SmartCityController
+from core.eventlog.event_log import event_log, EventSink, LEVEL_NAMES, WARNING
+
+# --- Running One Scenario ---
+
+class _CaptureSink(EventSink):
+    """Counts a scenario's warnings and errors and keeps the first `limit` of them for its report."""
+    def __init__(self, limit=20):
+        self.limit = limit
+        self.count = 0
+        self.events = []
+
+    def write(self, event):
+        if event.level < WARNING:
+            return
+        self.count += 1
+        if len(self.events) < self.limit:
+            self.events.append({"level": LEVEL_NAMES.get(event.level, str(event.level)),
+                                "kind": event.kind, "message": event.message})
+
+
+def _plain(value):
+    """JSON-safe form of a step's return value; anything else becomes its str()."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _plain(item) for key, item in value.items()}
+    return str(value)
+
+
+def run_scenario(scenario, quiet=True):
+    """
+    Runs one scenario on a fresh controller of its own and returns a plain-data
+    result: per-step timing, return values and errors, the controller's status
+    summary and the warnings/errors it logged. With `quiet`, event log output
+    and stdout are suppressed. Top-level so that process pool workers can import it.
+    """
+    capture = _CaptureSink()
+    previous_level, previous_sinks = event_log.level, event_log.sinks
+    if quiet:
+        # Only warnings and errors are even formatted, and only into the capture sink
+        event_log.level = WARNING
+        event_log.sinks = [capture]
+    else:
+        event_log.sinks = previous_sinks + [capture]
+    key = ("scenario", scenario.name)
+    steps, status = [], "ok"
+    start = time.perf_counter()
+    try:
+        with contextlib.ExitStack() as stack:
+            if quiet:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            controller = SmartCityController.keyed_instance(key, district=scenario.district)
+            for call, args, kwargs in scenario.steps:
+                step_start = time.perf_counter()
+                step = {"call": call}
+                try:
+                    result = getattr(controller, call)(*args, **kwargs)
+                    if inspect.iscoroutine(result):
+                        result = controller.run_async(result)
+                    step["result"] = _plain(result)
+                except Exception as e:
+                    step["error"] = f"{type(e).__name__}: {e}"
+                    status = "failed"
+                step["seconds"] = time.perf_counter() - step_start
+                steps.append(step)
+                if status == "failed" and scenario.stop_on_error:
+                    break
+            try:
+                summary = _plain(controller.status_summary())
+            except Exception as e:
+                summary = {"error": f"{type(e).__name__}: {e}"}
+                status = "failed"
+    finally:
+        # Discarding also closes the controller, removing any shared-memory rings it opened
+        SmartCityController.discard_instance(key)
+        event_log.level, event_log.sinks = previous_level, previous_sinks
+    return {"name": scenario.name, "district": scenario.district, "status": status,
+            "seconds": time.perf_counter() - start, "steps": steps, "summary": summary,
+            "warnings": capture.count, "events": capture.events, "pid": os.getpid()}
+
+# --- Report ---
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else None
+
+
+class ScenarioReport:
+    """Per-scenario results of one run plus aggregate timing per scenario and per facade call."""
+    def __init__(self, results, wall_seconds, workers):
+        self.results = results
+        self.wall_seconds = wall_seconds
+        self.workers = workers
+
+    @property
+    def failed(self):
+        return [result for result in self.results if result["status"] != "ok"]
+
+    def summary(self):
+        durations = sorted(result["seconds"] for result in self.results)
+        return {
+            "scenarios": len(self.results), "failed": len(self.failed), "workers": self.workers,
+            "wall_seconds": self.wall_seconds, "scenario_seconds": sum(durations),
+            "scenarios_per_second": len(self.results) / self.wall_seconds if self.wall_seconds else None,
+            "p50_seconds": _percentile(durations, 0.5), "p90_seconds": _percentile(durations, 0.9),
+            "p99_seconds": _percentile(durations, 0.99), "max_seconds": durations[-1] if durations else None,
+            "warnings": sum(result["warnings"] for result in self.results),
+        }
+
+    def call_stats(self):
+        """{facade call: {"count", "errors", "total_seconds", "mean_seconds", "max_seconds"}} over every scenario."""
+        stats = {}
+        for step in itertools.chain.from_iterable(result["steps"] for result in self.results):
+            entry = stats.get(step["call"])
+            if entry is None:
+                entry = stats[step["call"]] = {"count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            entry["count"] += 1
+            entry["errors"] += "error" in step
+            entry["total_seconds"] += step["seconds"]
+            entry["max_seconds"] = max(entry["max_seconds"], step["seconds"])
+        for entry in stats.values():
+            entry["mean_seconds"] = entry["total_seconds"] / entry["count"]
+        return stats
+
+    def to_dict(self):
+        return {"summary": self.summary(), "calls": self.call_stats(), "scenarios": self.results}
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def format(self):
+        summary = self.summary()
+        if not summary["scenarios"]:
+            return "No scenarios were run."
+        lines = [f"{summary['scenarios']} scenarios ({summary['failed']} failed, {summary['warnings']} warnings) "
+                 f"on {summary['workers']} worker(s) in {summary['wall_seconds']:.2f}s "
+                 f"({summary['scenarios_per_second']:,.1f}/s); per scenario p50 {summary['p50_seconds'] * 1e3:.1f} ms, "
+                 f"p99 {summary['p99_seconds'] * 1e3:.1f} ms, max {summary['max_seconds'] * 1e3:.1f} ms"]
+        for call, entry in sorted(self.call_stats().items(), key=lambda item: -item[1]["total_seconds"]):
+            lines.append(f"  {call:<32} x{entry['count']:<7} mean {entry['mean_seconds'] * 1e3:8.2f} ms  "
+                         f"max {entry['max_seconds'] * 1e3:8.2f} ms  errors {entry['errors']}")
+        for result in self.failed:
+            error = next((step["error"] for step in result["steps"] if "error" in step), result["summary"].get("error"))
+            lines.append(f"  FAILED {result['name']}: {error}")
+        return "\n".join(lines)
+
+# --- Runner ---
+
+class ScenarioRunner:
+    """
+    Headless runner for independent scenarios. Scenarios fan out over a process
+    pool (`workers` defaults to the CPU count), each on a fresh controller of
+    its own, with output suppressed unless `quiet` is off; `workers=1` runs them
+    in-process. Results come back in input order, aggregated into a ScenarioReport.
+    """
+    def __init__(self, workers=None, quiet=True, chunksize=None):
+        self.workers = workers
+        self.quiet = quiet
+        self.chunksize = chunksize
+
+    def run(self, scenarios):
+        scenarios = list(scenarios)
+        names = {scenario.name for scenario in scenarios}
+        if len(names) != len(scenarios):
+            raise ValueError("Scenario names must be unique within a run.")
+        workers = max(1, min(self.workers or os.cpu_count() or 1, len(scenarios)))
+        start = time.perf_counter()
+        if workers > 1:
+            # Several scenarios per task amortize the pickling round trip of short scenarios
+            chunksize = self.chunksize or max(1, len(scenarios) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(run_scenario, scenarios, itertools.repeat(self.quiet), chunksize=chunksize))
+        else:
+            results = [run_scenario(scenario, self.quiet) for scenario in scenarios]
+        return ScenarioReport(results, time.perf_counter() - start, workers)
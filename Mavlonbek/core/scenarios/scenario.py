@@ -0,0 +1,114 @@
+# FIO/core/scenarios/scenario.py
+
+import json
+import os
+
+from core.controller import SmartCityController
+
+# --- Scenario File Format ---
+# A scenario is a named sequence of facade calls run on its own controller:
+#
+#   {"name": "evening-peak", "district": "north", "repeat": 100, "stop_on_error": true,
+#    "steps": ["start_city_operations",                                    <- call without arguments
+#              ["manage_transport", "bus"],                                <- [call, *args]
+#              {"call": "run_simulation", "kwargs": {"duration": 3600}}]}  <- {"call", "args", "kwargs"}
+#
+# A .json file holds one scenario, a list of them, or {"scenarios": [...]};
+# a .jsonl file holds one scenario per line. "repeat" expands a scenario into
+# copies named "<name>#1" ... "<name>#N". Calls ending in "_async" are run to
+# completion on the scenario's controller.
+
+# Public facade methods a scenario file cannot drive: they take callables, serve forever,
+# hand back shared-memory rings meant for producer processes, or tear the controller down
+HEADLESS_EXCLUDED = {"run_async", "serve_metrics", "drain_sensor_readings", "open_sensor_ring", "close"}
+
+
+class ScenarioError(ValueError):
+    """Raised for scenario definitions that cannot be run."""
+
+
+def facade_calls():
+    """Names of the SmartCityController methods a scenario step may call."""
+    return sorted(name for name, value in vars(SmartCityController).items()
+                  if callable(value) and not name.startswith("_") and name not in HEADLESS_EXCLUDED)
+
+
+class Scenario:
+    """One what-if scenario: `steps` is a list of (call, args, kwargs) facade calls."""
+    def __init__(self, name, steps, district=None, stop_on_error=True):
+        self.name = name
+        self.steps = steps
+        self.district = district
+        self.stop_on_error = stop_on_error
+
+    def __repr__(self):
+        return f"Scenario({self.name!r}, {len(self.steps)} steps)"
+
+    @classmethod
+    def from_dict(cls, data, calls=None):
+        """Builds a scenario from its file form, checking every step against the facade."""
+        if not isinstance(data, dict) or not isinstance(data.get("name"), str) or not isinstance(data.get("steps"), list):
+            raise ScenarioError(f"A scenario needs a name and a list of steps: {data!r}")
+        calls = set(facade_calls()) if calls is None else calls
+        steps = [_parse_step(step, calls, data["name"]) for step in data["steps"]]
+        return cls(data["name"], steps, data.get("district"), data.get("stop_on_error", True))
+
+    def to_dict(self):
+        return {"name": self.name, "district": self.district, "stop_on_error": self.stop_on_error,
+                "steps": [{"call": call, "args": list(args), "kwargs": kwargs} for call, args, kwargs in self.steps]}
+
+
+def _parse_step(step, calls, scenario_name):
+    if isinstance(step, str):
+        call, args, kwargs = step, (), {}
+    elif isinstance(step, list) and step and isinstance(step[0], str):
+        call, args, kwargs = step[0], step[1:], {}
+    elif isinstance(step, dict) and isinstance(step.get("call"), str):
+        call, args, kwargs = step["call"], step.get("args", ()), step.get("kwargs", {})
+    else:
+        raise ScenarioError(f"Scenario {scenario_name!r}: unreadable step {step!r}")
+    if call not in calls:
+        raise ScenarioError(f"Scenario {scenario_name!r}: unknown facade call {call!r}")
+    if not isinstance(args, (list, tuple)) or not isinstance(kwargs, dict):
+        raise ScenarioError(f"Scenario {scenario_name!r}: step {call!r} needs a list of args and a dict of kwargs")
+    return call, tuple(args), dict(kwargs)
+
+
+def parse_scenarios(definitions):
+    """Scenarios from a list of definitions, with "repeat" expanded; names must be unique."""
+    calls = set(facade_calls())
+    scenarios, names = [], set()
+    for data in definitions:
+        scenario = Scenario.from_dict(data, calls)
+        repeat = data.get("repeat", 1)
+        if not isinstance(repeat, int) or repeat < 1:
+            raise ScenarioError(f"Scenario {scenario.name!r}: repeat must be a positive integer")
+        copies = [scenario] if repeat == 1 else [
+            Scenario(f"{scenario.name}#{number}", scenario.steps, scenario.district, scenario.stop_on_error)
+            for number in range(1, repeat + 1)]
+        for copy in copies:
+            if copy.name in names:
+                raise ScenarioError(f"Duplicate scenario name {copy.name!r}")
+            names.add(copy.name)
+        scenarios.extend(copies)
+    return scenarios
+
+
+def load_scenarios(*paths):
+    """Reads and validates scenario files (.json or .jsonl)."""
+    definitions = []
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            try:
+                if os.path.splitext(path)[1] == ".jsonl":
+                    definitions.extend(json.loads(line) for line in file if line.strip())
+                    continue
+                data = json.load(file)
+            except json.JSONDecodeError as e:
+                raise ScenarioError(f"{path}: {e}") from e
+        if isinstance(data, dict):
+            data = data["scenarios"] if "scenarios" in data else [data]
+        if not isinstance(data, list):
+            raise ScenarioError(f"{path}: expected a scenario, a list of scenarios or {{\"scenarios\": [...]}}")
+        definitions.extend(data)
+    return parse_scenarios(definitions)
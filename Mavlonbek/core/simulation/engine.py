@@ -0,0 +1,129 @@
+# FIO/core/simulation/engine.py
+
+import heapq
+import itertools
+import time
+
+SECONDS_PER_MINUTE = 60
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+# --- Run Report ---
+
+class SimulationReport:
+    """Summary of one SimulationEngine.run call."""
+    def __init__(self, events_processed, start_time, end_time, wall_seconds):
+        self.events_processed = events_processed
+        self.start_time = start_time
+        self.end_time = end_time
+        self.wall_seconds = wall_seconds
+
+    @property
+    def simulated_seconds(self):
+        return self.end_time - self.start_time
+
+    @property
+    def events_per_second(self):
+        if self.wall_seconds <= 0:
+            return float("inf") if self.events_processed else 0.0
+        return self.events_processed / self.wall_seconds
+
+    def __str__(self):
+        return (f"Simulated {self.simulated_seconds:.0f}s in {self.wall_seconds:.3f}s wall time: "
+                f"{self.events_processed} events ({self.events_per_second:,.0f} events/sec).")
+
+# --- Event Scheduler ---
+
+class SimulationEngine:
+    """
+    Discrete-event simulation clock with a heap-based event scheduler.
+    Subsystems register one-off and periodic callbacks; run() pops events in time
+    order and advances the clock directly to each event (headless fast-forward),
+    or paces against the wall clock when a real-time speed factor is given.
+    Callbacks receive the current simulation time in seconds.
+    """
+    def __init__(self, start_time=0.0):
+        self.now = float(start_time)
+        self._queue = []
+        self._sequence = itertools.count()
+        self._cancelled = set()
+        self._live = set()  # handles of pending (not yet fired or cancelled) events
+        self.events_processed = 0
+
+    def __len__(self):
+        return len(self._live)
+
+    def schedule_at(self, when, callback, name=None):
+        """Schedules a one-off event at absolute time `when`; returns a handle for cancel()."""
+        if when < self.now:
+            raise ValueError(f"Cannot schedule an event in the past ({when} < {self.now}).")
+        handle = next(self._sequence)
+        heapq.heappush(self._queue, (when, handle, callback, 0.0, name))
+        self._live.add(handle)
+        return handle
+
+    def schedule(self, delay, callback, name=None):
+        """Schedules a one-off event `delay` seconds from now."""
+        return self.schedule_at(self.now + delay, callback, name)
+
+    def schedule_periodic(self, interval, callback, name=None, start=None):
+        """Schedules `callback` every `interval` seconds, first firing at `start` (default: now + interval)."""
+        if interval <= 0:
+            raise ValueError("Periodic interval must be positive.")
+        first = self.now + interval if start is None else start
+        if first < self.now:
+            raise ValueError(f"Cannot schedule an event in the past ({first} < {self.now}).")
+        handle = next(self._sequence)
+        heapq.heappush(self._queue, (first, handle, callback, float(interval), name))
+        self._live.add(handle)
+        return handle
+
+    def cancel(self, handle):
+        """Cancels a pending event (periodic events stop repeating). Removal is lazy."""
+        if handle in self._live:
+            self._live.discard(handle)
+            self._cancelled.add(handle)
+
+    def run(self, until=None, max_events=None, speed=None):
+        """
+        Processes events in time order until the queue is empty, the clock passes
+        `until`, or `max_events` have been handled. With `speed` set, each simulated
+        second takes 1/speed wall seconds; otherwise the run fast-forwards.
+        """
+        queue = self._queue
+        cancelled = self._cancelled
+        live = self._live
+        heappop = heapq.heappop
+        heappush = heapq.heappush
+        start_time = self.now
+        processed = 0
+        wall_start = time.perf_counter()
+
+        while queue:
+            if max_events is not None and processed >= max_events:
+                break
+            when, handle, callback, interval, name = queue[0]
+            if until is not None and when > until:
+                break
+            heappop(queue)
+            if handle in cancelled:
+                cancelled.discard(handle)
+                continue
+            if speed:
+                delay = (when - start_time) / speed - (time.perf_counter() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            self.now = when
+            if interval:
+                # Periodic events keep their handle so cancel() stops the series.
+                heappush(queue, (when + interval, handle, callback, interval, name))
+            else:
+                live.discard(handle)
+            callback(when)
+            processed += 1
+
+        if until is not None and until > self.now:
+            self.now = float(until)
+        wall_seconds = time.perf_counter() - wall_start
+        self.events_processed += processed
+        return SimulationReport(processed, start_time, self.now, wall_seconds)
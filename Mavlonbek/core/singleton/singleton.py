@@ -1,17 +1,80 @@
 # FIO/core/singleton/singleton.py
 
+import os
+import threading
+
 class Singleton(type):
     """
     Design Pattern: Singleton (Creational)
     Purpose: Ensures a class has only one instance and provides a global point of access to it.
     Usage: Used as a metaclass for the SmartCityController to ensure only one central controller exists.
+
+    The registry is keyed: `Cls()` returns the default instance (stored under `Cls`),
+    `Cls.keyed_instance(key)` one instance per key (stored under `(Cls, key)`), e.g. one
+    controller per district. Creation is lock-protected, and a forked child process
+    starts with an empty registry instead of silently sharing its parent's instances.
     """
     _instances = {}
+    _lock = threading.RLock()
+    _pid = os.getpid()
+
+    @classmethod
+    def _reset_after_fork(mcs):
+        mcs._instances = {}
+        mcs._lock = threading.RLock()
+        mcs._pid = os.getpid()
+
+    def _get_or_create(cls, registry_key, args, kwargs):
+        if Singleton._pid != os.getpid():
+            # Fallback for fork paths that bypass os.register_at_fork
+            Singleton._reset_after_fork()
+        instance = Singleton._instances.get(registry_key)
+        if instance is None:
+            with Singleton._lock:
+                instance = Singleton._instances.get(registry_key)
+                if instance is None:
+                    instance = super(Singleton, cls).__call__(*args, **kwargs)
+                    Singleton._instances[registry_key] = instance
+        return instance
 
     def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
+        return cls._get_or_create(cls, args, kwargs)
+
+    def keyed_instance(cls, key, *args, **kwargs):
+        """Returns the instance registered under `key`, creating it with `args` on first use."""
+        return cls._get_or_create((cls, key), args, kwargs)
+
+    def registered_keys(cls):
+        """Keys of this class's keyed instances."""
+        return [key[1] for key in list(Singleton._instances) if isinstance(key, tuple) and key[0] is cls]
+
+    @staticmethod
+    def _close(instance):
+        close = getattr(instance, "close", None)
+        if close is not None:
+            close()
+
+    def discard_instance(cls, key):
+        """
+        Drops the instance registered under `key`, calling its close() if it has
+        one; the next keyed_instance(key) creates a fresh one.
+        """
+        with Singleton._lock:
+            instance = Singleton._instances.pop((cls, key), None)
+        Singleton._close(instance)
+        return instance
+
+    def clear_instances(cls):
+        """Drops the default and every keyed instance of this class, closing each like discard_instance()."""
+        with Singleton._lock:
+            dropped = [Singleton._instances.pop(key) for key in list(Singleton._instances)
+                       if key is cls or (isinstance(key, tuple) and key[0] is cls)]
+        for instance in dropped:
+            Singleton._close(instance)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=Singleton._reset_after_fork)
 
 # Make the directory a package
 __all__ = ['Singleton']
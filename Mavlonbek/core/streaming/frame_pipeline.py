@@ -0,0 +1,225 @@
+# FIO/core/streaming/frame_pipeline.py
+
+import queue
+import threading
+import time
+import zlib
+
+from core.eventlog.event_log import event_log
+
+# --- Frames and Buffers ---
+
+class BufferPool:
+    """
+    Fixed set of reusable frame buffers.
+    acquire() blocks while every buffer is in flight, which throttles the camera
+    to the pace of the slowest consumer instead of allocating new buffers.
+    """
+    def __init__(self, frame_size, count):
+        self.frame_size = frame_size
+        self._free = queue.Queue()
+        self.lock = threading.Lock()
+        for _ in range(count):
+            self._free.put(bytearray(frame_size))
+
+    def acquire(self):
+        return self._free.get()
+
+    def release(self, buffer):
+        self._free.put(buffer)
+
+class Frame:
+    """
+    A captured frame: a memoryview over a pooled buffer plus per-frame metadata.
+    Frame sources yield frames that stay valid until the next one is requested;
+    a consumer that keeps a frame longer calls retain() and later release().
+    The buffer returns to its pool when the last holder releases it.
+    """
+    __slots__ = ("sequence", "data", "captured_at", "checksum", "_buffer", "_pool", "_holders")
+
+    def __init__(self, sequence, buffer, pool):
+        self.sequence = sequence
+        self.data = memoryview(buffer)
+        self.captured_at = time.perf_counter()
+        self.checksum = None
+        self._buffer = buffer
+        self._pool = pool
+        self._holders = 1
+
+    def retain(self):
+        with self._pool.lock:
+            self._holders += 1
+
+    def release(self):
+        """Drops one hold; once none remain `data` must not be used again."""
+        with self._pool.lock:
+            if self._buffer is None:
+                return
+            self._holders -= 1
+            if self._holders:
+                return
+            buffer, self._buffer = self._buffer, None
+        self.data.release()
+        self._pool.release(buffer)
+
+# --- Stages ---
+# A stage is any callable that processes a Frame in place.
+
+class XorCipherStage:
+    """
+    Symmetric XOR stream cipher; the same stage encrypts and decrypts.
+    The result is written back into the frame's own buffer.
+    """
+    def __init__(self, key=b"SmartCity"):
+        if not key:
+            raise ValueError("Cipher key must not be empty.")
+        self._key = bytes(key)
+        self._keystreams = {}
+
+    def _keystream(self, size):
+        keystream = self._keystreams.get(size)
+        if keystream is None:
+            repeated = (self._key * (size // len(self._key) + 1))[:size]
+            keystream = self._keystreams[size] = int.from_bytes(repeated, "little")
+        return keystream
+
+    def __call__(self, frame):
+        data = frame.data
+        size = len(data)
+        data[:] = (int.from_bytes(data, "little") ^ self._keystream(size)).to_bytes(size, "little")
+
+class FrameLogStage:
+    """Counts frames and bytes passing through; emits a DEBUG event per frame."""
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    def __call__(self, frame):
+        self.frames += 1
+        self.bytes += len(frame.data)
+        event_log.debug("security.frame", "Frame {sequence} logged ({size} bytes).",
+                        sequence=frame.sequence, size=len(frame.data))
+
+class ChecksumStage:
+    """Stores a CRC32 of the frame payload on `frame.checksum`."""
+    def __call__(self, frame):
+        frame.checksum = zlib.crc32(frame.data)
+
+# --- Pipeline ---
+
+_END = object()
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+class FramePipeline:
+    """
+    Runs frames from `source` through `stages`, one worker thread per stage,
+    connected by bounded queues (`queue_size`) so a slow stage applies
+    backpressure all the way back to the camera. Iterating the pipeline yields
+    processed frames in order; each yielded frame stays valid until the next one
+    is requested, then its buffer returns to the pool.
+    """
+    POLL_SECONDS = 0.05
+
+    def __init__(self, source, stages, queue_size=4):
+        self._source = source
+        self._stages = list(stages)
+        self._queue_size = queue_size
+        self._stop = threading.Event()
+
+    def _put(self, target, item):
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=self.POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source):
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=self.POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return None
+
+    def _produce(self, output):
+        source = iter(self._source)
+        try:
+            for frame in source:
+                # The source reclaims the frame when asked for the next one; hold it until delivered
+                frame.retain()
+                if not self._put(output, frame):
+                    frame.release()
+                    return
+        except Exception as e:
+            self._put(output, _Failure(e))
+            return
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+        self._put(output, _END)
+
+    def _work(self, stage, source, output):
+        while True:
+            item = self._get(source)
+            if item is None:
+                return
+            if item is _END or isinstance(item, _Failure):
+                self._put(output, item)
+                return
+            try:
+                stage(item)
+            except Exception as e:
+                item.release()
+                self._put(output, _Failure(e))
+                return
+            if not self._put(output, item):
+                item.release()
+                return
+
+    def __iter__(self):
+        queues = [queue.Queue(self._queue_size) for _ in range(len(self._stages) + 1)]
+        workers = [threading.Thread(target=self._work, args=(stage, queues[i], queues[i + 1]), daemon=True)
+                   for i, stage in enumerate(self._stages)]
+        producer = threading.Thread(target=self._produce, args=(queues[0],), daemon=True)
+        for thread in workers + [producer]:
+            thread.start()
+
+        previous = None
+        try:
+            while True:
+                item = queues[-1].get()
+                if previous is not None:
+                    previous.release()
+                    previous = None
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                previous = item
+                yield item
+        finally:
+            if previous is not None:
+                previous.release()
+            self._stop.set()
+            for thread in workers:
+                thread.join(timeout=1)
+            self._drain(queues)
+            producer.join(timeout=1)
+            self._drain(queues)
+
+    @staticmethod
+    def _drain(queues):
+        for pending in queues:
+            while True:
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, Frame):
+                    item.release()
@@ -0,0 +1,265 @@
+# FIO/core/timeseries/timeseries_store.py
+
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+
+# Rollup window sizes in seconds, coarsest first.
+ROLLUP_RESOLUTIONS = (3600, 900, 60)
+STATS = ("sum", "min", "max", "mean", "count")
+
+# --- Rollup ---
+
+class Rollup:
+    """
+    Precomputed per-window aggregates for one series at one resolution.
+    Columns: window start, sum, min, max and sample count.
+    """
+    COLUMNS = (("start", "q"), ("sum", "d"), ("min", "d"), ("max", "d"), ("count", "q"))
+
+    def __init__(self, resolution):
+        self.resolution = resolution
+        self.start = array("q")
+        self.sum = array("d")
+        self.min = array("d")
+        self.max = array("d")
+        self.count = array("q")
+
+    def add(self, timestamp, value):
+        window = int(timestamp // self.resolution) * self.resolution
+        if self.start and self.start[-1] == window:
+            self.sum[-1] += value
+            if value < self.min[-1]:
+                self.min[-1] = value
+            if value > self.max[-1]:
+                self.max[-1] = value
+            self.count[-1] += 1
+        else:
+            self.start.append(window)
+            self.sum.append(value)
+            self.min.append(value)
+            self.max.append(value)
+            self.count.append(1)
+
+    def window_slice(self, start, end):
+        """Index range of the windows starting in [start, end)."""
+        return bisect_left(self.start, start), bisect_left(self.start, end)
+
+# --- Series ---
+
+class Series:
+    """Raw samples (timestamp, value) of one meter plus its rollups."""
+    def __init__(self, infrastructure=None):
+        self.infrastructure = infrastructure
+        self.timestamps = array("d")
+        self.values = array("d")
+        self.rollups = {resolution: Rollup(resolution) for resolution in ROLLUP_RESOLUTIONS}
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def append_many(self, timestamps, values):
+        timestamps = array("d", timestamps)
+        values = array("d", values)
+        if len(timestamps) != len(values):
+            raise ValueError("Timestamps and values must have the same length.")
+        last = self.timestamps[-1] if self.timestamps else float("-inf")
+        for timestamp in timestamps:
+            if timestamp < last:
+                raise ValueError("Samples must be appended in time order.")
+            last = timestamp
+        self._ensure_writable()
+        self.timestamps.extend(timestamps)
+        self.values.extend(values)
+        rollups = tuple(self.rollups.values())
+        for timestamp, value in zip(timestamps, values):
+            for rollup in rollups:
+                rollup.add(timestamp, value)
+
+    def _ensure_writable(self):
+        # Series restored from disk hold read-only memoryviews over mmapped files;
+        # copy them into arrays the first time new samples arrive.
+        if not isinstance(self.timestamps, array):
+            self.timestamps = array("d", self.timestamps)
+            self.values = array("d", self.values)
+            for rollup in self.rollups.values():
+                for column, typecode in Rollup.COLUMNS:
+                    setattr(rollup, column, array(typecode, getattr(rollup, column)))
+
+# --- Store ---
+
+class TimeSeriesStore:
+    """
+    Columnar time-series store for energy meters.
+    Samples are appended in chunks per meter; every append also updates 1m/15m/1h
+    rollups, so range and aggregate queries combine a handful of precomputed
+    windows instead of scanning raw samples. Query bounds are aligned to whole
+    minutes (start rounded down, end rounded up).
+    """
+    def __init__(self):
+        self._series = {}
+        self._mmaps = []
+
+    def meters(self, infrastructure=None):
+        if infrastructure is None:
+            return list(self._series)
+        return [meter for meter, series in self._series.items() if series.infrastructure == infrastructure]
+
+    def infrastructures(self):
+        return sorted({series.infrastructure for series in self._series.values() if series.infrastructure})
+
+    def __len__(self):
+        return sum(len(series) for series in self._series.values())
+
+    def series(self, meter):
+        try:
+            return self._series[meter]
+        except KeyError:
+            raise KeyError(f"Unknown meter: {meter}") from None
+
+    def append(self, meter, timestamps, values, infrastructure=None):
+        """Appends a chunk of samples for `meter`, registering it on first use."""
+        series = self._series.get(meter)
+        if series is None:
+            series = self._series[meter] = Series(infrastructure)
+        series.append_many(timestamps, values)
+
+    # --- Queries ---
+
+    def aggregate(self, meter, start, end, stat="sum"):
+        """Aggregates one meter over [start, end) using only rollup windows."""
+        totals = self._combine([self.series(meter)], start, end)
+        return self._finish(totals, stat)
+
+    def aggregate_many(self, meters, start, end, stat="sum"):
+        """Aggregates several meters together over [start, end)."""
+        totals = self._combine([self.series(meter) for meter in meters], start, end)
+        return self._finish(totals, stat)
+
+    def aggregate_infrastructure(self, start, end, stat="sum"):
+        """Returns {infrastructure: aggregate} over [start, end) for every tagged meter group."""
+        return {name: self.aggregate_many(self.meters(name), start, end, stat) for name in self.infrastructures()}
+
+    def range(self, meter, start, end, resolution=60):
+        """Returns [(window_start, sum, min, max, mean)] for the rollup windows in [start, end)."""
+        rollup = self.series(meter).rollups.get(resolution)
+        if rollup is None:
+            raise ValueError(f"Unsupported resolution {resolution}; choose from {ROLLUP_RESOLUTIONS}.")
+        i, j = rollup.window_slice(start, end)
+        return [(rollup.start[k], rollup.sum[k], rollup.min[k], rollup.max[k], rollup.sum[k] / rollup.count[k])
+                for k in range(i, j)]
+
+    def time_bounds(self):
+        """Returns (first, last) sample timestamps across all meters, or None when empty."""
+        bounds = [(s.timestamps[0], s.timestamps[-1]) for s in self._series.values() if len(s)]
+        if not bounds:
+            return None
+        return min(b[0] for b in bounds), max(b[1] for b in bounds)
+
+    @staticmethod
+    def _cover(start, end):
+        """Splits [start, end) into the fewest (resolution, start, end) rollup spans."""
+        for resolution in ROLLUP_RESOLUTIONS:
+            inner_start = -(-start // resolution) * resolution
+            inner_end = end // resolution * resolution
+            if inner_start < inner_end:
+                return (TimeSeriesStore._cover(start, inner_start)
+                        + [(resolution, inner_start, inner_end)]
+                        + TimeSeriesStore._cover(inner_end, end))
+        return []
+
+    def _combine(self, series_list, start, end):
+        finest = ROLLUP_RESOLUTIONS[-1]
+        start = int(start // finest) * finest
+        end = int(-(-end // finest)) * finest
+        total, low, high, count = 0.0, float("inf"), float("-inf"), 0
+        for resolution, span_start, span_end in self._cover(start, end):
+            for series in series_list:
+                rollup = series.rollups[resolution]
+                i, j = rollup.window_slice(span_start, span_end)
+                if i == j:
+                    continue
+                total += sum(rollup.sum[i:j])
+                low = min(low, min(rollup.min[i:j]))
+                high = max(high, max(rollup.max[i:j]))
+                count += sum(rollup.count[i:j])
+        return total, low, high, count
+
+    @staticmethod
+    def _finish(totals, stat):
+        total, low, high, count = totals
+        if stat == "sum":
+            return total
+        if stat == "count":
+            return count
+        if count == 0:
+            return None
+        if stat == "min":
+            return low
+        if stat == "max":
+            return high
+        if stat == "mean":
+            return total / count
+        raise ValueError(f"Unknown statistic '{stat}'. Choose from {STATS}.")
+
+    # --- Persistence ---
+
+    def save(self, directory):
+        """Writes every column as a raw binary file plus a JSON index."""
+        import json  # Persistence-only dependency, kept off the import path
+        os.makedirs(directory, exist_ok=True)
+        index = {}
+        for number, (meter, series) in enumerate(self._series.items()):
+            prefix = f"series_{number}"
+            columns = {"timestamps": series.timestamps, "values": series.values}
+            for resolution, rollup in series.rollups.items():
+                for column, _ in Rollup.COLUMNS:
+                    columns[f"r{resolution}_{column}"] = getattr(rollup, column)
+            for name, column in columns.items():
+                _write_atomic(os.path.join(directory, f"{prefix}.{name}.bin"), memoryview(column).cast("B"))
+            index[meter] = {"prefix": prefix, "infrastructure": series.infrastructure}
+        _write_atomic(os.path.join(directory, "index.json"), json.dumps(index).encode("utf-8"))
+
+    @classmethod
+    def load(cls, directory):
+        """Restores a store by memory-mapping its column files (no up-front copy)."""
+        import json
+        store = cls()
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        for meter, entry in index.items():
+            prefix = entry["prefix"]
+            series = Series(entry["infrastructure"])
+            series.timestamps = store._map(directory, f"{prefix}.timestamps.bin", "d")
+            series.values = store._map(directory, f"{prefix}.values.bin", "d")
+            for resolution, rollup in series.rollups.items():
+                for column, typecode in Rollup.COLUMNS:
+                    setattr(rollup, column, store._map(directory, f"{prefix}.r{resolution}_{column}.bin", typecode))
+            store._series[meter] = series
+        return store
+
+    def close(self):
+        """Copies memory-mapped columns into memory and releases the file mappings; the store stays usable."""
+        for series in self._series.values():
+            series._ensure_writable()
+        mmaps, self._mmaps = self._mmaps, []
+        for mapped in mmaps:
+            mapped.close()
+
+    def _map(self, directory, filename, typecode):
+        path = os.path.join(directory, filename)
+        if os.path.getsize(path) == 0:
+            return array(typecode)
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mmaps.append(mapped)
+        return memoryview(mapped).cast(typecode)
+
+
+def _write_atomic(path, data):
+    # A loaded store may still be reading `path` through an mmap: never truncate it in place
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
@@ -1,5 +1,6 @@
 # FIO/main.py
 
+import argparse
 import sys
 import os
 
@@ -73,6 +74,48 @@ def run_system_demonstration():
     minimal_infra = builder.get_result()
     minimal_infra.show_configuration()
 
+    # --- 7. Discrete-Event Simulation ---
+    print("\n[7. Discrete-Event Simulation (One Simulated Day)]")
+    controller1.run_simulation()
 
-if __name__ == "__main__":
+
+def run_scenarios(paths, workers=None, output=None, verbose=False):
+    """
+    Runs scenario files headless (see core/scenarios/scenario.py for the format)
+    and prints the aggregated report. Returns the exit status: 1 if any scenario failed.
+    """
+    # The runner pulls in multiprocessing; keep it off the startup path of the other commands
+    from core.scenarios.runner import ScenarioRunner
+    from core.scenarios.scenario import ScenarioError, load_scenarios
+    try:
+        scenarios = load_scenarios(*paths)
+    except (OSError, ScenarioError) as e:
+        print(f"Cannot load scenarios: {e}", file=sys.stderr)
+        return 2
+    report = ScenarioRunner(workers=workers, quiet=not verbose).run(scenarios)
+    print(report.format())
+    if output:
+        report.save(output)
+        print(f"Report written to {output}")
+    return 1 if report.failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Smart city system: design pattern demonstration and scenario runner.")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("demo", help="run the design pattern demonstration (the default)")
+    run = commands.add_parser("run", help="run what-if scenario files headless")
+    run.add_argument("paths", nargs="+", metavar="SCENARIO_FILE", help=".json or .jsonl scenario file")
+    run.add_argument("-j", "--workers", type=int, help="worker processes (default: CPU count, 1 runs in-process)")
+    run.add_argument("-o", "--output", help="write the JSON report to this path")
+    run.add_argument("-v", "--verbose", action="store_true", help="show scenario output instead of suppressing it")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        return run_scenarios(args.paths, args.workers, args.output, args.verbose)
     run_system_demonstration()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+# FIO/modules/energy/demand_response.py
+
+import time
+from operator import add, itemgetter, mul, sub
+
+# --- Problem ---
+
+class DemandResponseProblem:
+    """
+    Peak-shaving problem over `periods` equal time steps for many feeders.
+    Per feeder: a forecast of inflexible load and a capacity limit, plus two
+    flexible loads:
+
+    - street lighting: `lighting_load` at full brightness, which may be dimmed
+      down to `min_dim` (a share of full brightness) in any period;
+    - transport charging: `charging_energy` (kWh) that must be delivered at up
+      to `charging_power` (kW) inside the charging window [start, end) of
+      periods (a window with start > end wraps past the end of the horizon).
+
+    Loads are in kW. Time series are given per feeder (one row per feeder) and
+    stored period-major: one column per period holding every feeder's value,
+    so the solver can work on all feeders at once with map/zip.
+    """
+    def __init__(self, base_load, capacity, lighting_load=None, min_dim=1.0, charging_energy=0.0,
+                 charging_power=0.0, charging_window=None, period_hours=0.25):
+        rows = [list(row) for row in base_load]
+        self.feeders = len(rows)
+        self.periods = len(rows[0]) if rows else 0
+        self.period_hours = period_hours
+        self.base = [list(column) for column in zip(*rows)]
+        self.capacity = self._per_feeder(capacity)
+        if lighting_load is None:
+            self.lighting = [[0.0] * self.feeders for _ in range(self.periods)]
+        else:
+            self.lighting = [list(column) for column in zip(*lighting_load)]
+        if len(self.lighting) != self.periods or len(self.base) != self.periods:
+            raise ValueError("Load forecasts must cover the same periods for every feeder.")
+        self.min_dim = self._per_feeder(min_dim)
+        if any(not 0.0 <= level <= 1.0 for level in self.min_dim):
+            raise ValueError("Minimum dim levels must be between 0.0 and 1.0.")
+        self.charging_energy = self._per_feeder(charging_energy)
+        self.charging_power = self._per_feeder(charging_power)
+        windows = charging_window if isinstance(charging_window, list) else [charging_window] * self.feeders
+        # Charging rate limit per period and feeder: charging_power inside the window, 0 outside
+        self.rate_limit = [[power if self._in_window(period, window) else 0.0
+                            for power, window in zip(self.charging_power, windows)]
+                           for period in range(self.periods)]
+        self.charging_periods = [period for period, column in enumerate(self.rate_limit) if any(column)]
+
+    def _per_feeder(self, value):
+        values = [float(value)] * self.feeders if isinstance(value, (int, float)) else [float(item) for item in value]
+        if len(values) != self.feeders:
+            raise ValueError("Per-feeder settings need one value per feeder.")
+        return values
+
+    def _in_window(self, period, window):
+        if window is None:
+            return True
+        start, end = window
+        return start <= period < end if start <= end else period >= start or period < end
+
+    def unmanaged_load(self):
+        """Load per period (columns) with lights at full brightness and charging at full power as early as allowed."""
+        remaining = [energy / self.period_hours for energy in self.charging_energy]  # in kW-periods
+        columns = []
+        for base, light, limit_column in zip(self.base, self.lighting, self.rate_limit):
+            charging = [limit if limit < left else left for limit, left in zip(limit_column, remaining)]
+            remaining = list(map(sub, remaining, charging))
+            columns.append(list(map(add, map(add, base, light), charging)))
+        return columns
+
+
+class DemandSchedule:
+    """Solution of a DemandResponseProblem: per-period dim levels, charging and resulting load (period-major)."""
+    def __init__(self, problem, peak, dim, charging, load, iterations, solve_seconds):
+        self.problem = problem
+        self.peak = peak
+        self.dim = dim
+        self.charging = charging
+        self.load = load
+        self.iterations = iterations
+        self.solve_seconds = solve_seconds
+
+    def over_capacity(self):
+        """Feeders whose optimized peak still exceeds their capacity."""
+        return [feeder for feeder, (peak, limit) in enumerate(zip(self.peak, self.problem.capacity)) if peak > limit]
+
+    def unmanaged_peak(self):
+        columns = self.problem.unmanaged_load()
+        return [max(loads) for loads in zip(*columns)] if columns else []
+
+    def peak_reduction(self):
+        """Share of the summed feeder peaks removed compared with unmanaged operation."""
+        before = sum(self.unmanaged_peak())
+        return 1.0 - sum(self.peak) / before if before > 0 else 0.0
+
+    def dim_level(self, period):
+        """Lighting-load-weighted mean dim level over all feeders in `period`."""
+        lighting = self.problem.lighting[period]
+        total = sum(lighting)
+        return sum(map(mul, self.dim[period], lighting)) / total if total > 0 else 1.0
+
+    def __str__(self):
+        return (f"Demand response: {self.problem.feeders} feeders x {self.problem.periods} periods solved in "
+                f"{self.solve_seconds * 1e3:.1f} ms ({self.iterations} iterations); peak reduced "
+                f"{self.peak_reduction():.1%}, {len(self.over_capacity())} feeders over capacity.")
+
+# --- Optimizer ---
+
+class DemandResponseOptimizer:
+    """
+    Minimizes each feeder's peak load by dimming street lights and moving
+    charging into the lowest-load periods of its window.
+
+    For a peak target z, a feeder is feasible when the headroom under z with
+    lights fully dimmed, capped by the charging rate, can absorb its charging
+    energy: g(z) = sum_t min(rate_t, max(0, z - base_t - min_dim * light_t)) >= E.
+    g is piecewise linear and nondecreasing, so the smallest feasible z is found
+    by a bracketed false-position (Illinois) search run on every feeder at once.
+    The schedule then charges in the full-brightness headroom under z first
+    and dims lights only in the periods where that is not enough.
+
+    The peaks of the last solve are kept and, when the next problem has the
+    same feeders, narrow the starting bracket, so re-optimizing a slightly
+    changed forecast needs only a few iterations.
+    """
+    WARM_START_SPAN = 0.005  # Probe the previous peaks +/- 0.5% first
+
+    def __init__(self, tolerance=0.01, max_iterations=60, warm_start=True):
+        self.tolerance = tolerance  # kW
+        self.max_iterations = max_iterations
+        self.warm_start = warm_start
+        self.previous_peak = None
+        self.last_iterations = 0
+        self._energy = []
+
+    def _headroom(self, problem, floor, target, feeders=None):
+        """
+        g(target) - E for every feeder, or only for the `feeders` listed (in
+        that order): charging that fits under `target` above the floor columns,
+        minus the energy to deliver.
+        """
+        periods = problem.charging_periods  # Elsewhere nothing can charge, so g gets no contribution
+        floor, limits, energy = [floor[p] for p in periods], [problem.rate_limit[p] for p in periods], self._energy
+        if feeders is not None:
+            pick = itemgetter(*feeders) if len(feeders) > 1 else lambda column: (column[feeders[0]],)
+            floor, limits, energy = map(pick, floor), map(pick, limits), pick(energy)
+        total = [-e for e in energy]
+        for floor_column, limit_column in zip(floor, limits):
+            total = list(map(add, total, [0.0 if z <= f else (z - f if z - f < c else c)
+                                          for z, f, c in zip(target, floor_column, limit_column)]))
+        return total
+
+    def _bracket(self, problem, floor):
+        """
+        Per-feeder peak targets (low, high) with g - E at both ends, and the
+        feeders that still need a search: those whose lower bound (the highest
+        dimmed floor) cannot absorb their charging. Their low end is infeasible
+        and their high end feasible.
+        """
+        lower = [max(loads) for loads in zip(*floor)]
+        g_lower = self._headroom(problem, floor, lower)
+        low, g_low, high, g_high = list(lower), list(g_lower), list(lower), list(g_lower)
+        searching = [feeder for feeder, value in enumerate(g_lower) if value < 0.0]
+        power = problem.charging_power
+        unbracketed = searching
+        previous = self.previous_peak
+        if searching and self.warm_start and previous is not None and len(previous) == problem.feeders:
+            # Warm start: probe just around the previous peaks and keep each probe that is on the right side
+            step = [max(abs(previous[feeder]) * self.WARM_START_SPAN, self.tolerance * 4) for feeder in searching]
+            below = [max(lower[feeder], previous[feeder] - delta) for feeder, delta in zip(searching, step)]
+            above = [min(lower[feeder] + power[feeder], previous[feeder] + delta) for feeder, delta in zip(searching, step)]
+            for feeder, target, value in zip(searching, below, self._headroom(problem, floor, below, searching)):
+                if value < 0.0:
+                    low[feeder], g_low[feeder] = target, value
+            for feeder, target, value in zip(searching, above, self._headroom(problem, floor, above, searching)):
+                high[feeder], g_high[feeder] = target, value
+            unbracketed = [feeder for feeder in searching if g_high[feeder] < 0.0]
+        if unbracketed:
+            # Charging at full power on top of the highest floor always fits
+            upper = [lower[feeder] + power[feeder] for feeder in unbracketed]
+            for feeder, target, value in zip(unbracketed, upper, self._headroom(problem, floor, upper, unbracketed)):
+                high[feeder], g_high[feeder] = target, value
+        return low, high, g_low, g_high, searching
+
+    def solve(self, problem):
+        """Computes the minimum-peak DemandSchedule for a DemandResponseProblem."""
+        start = time.perf_counter()
+        hours = problem.period_hours
+        # Energy in kW-periods, capped at what the window can deliver at all
+        deliverable = [sum(column) for column in zip(*problem.rate_limit)] if problem.periods else []
+        self._energy = [min(wanted / hours, limit) for wanted, limit in zip(problem.charging_energy, deliverable)]
+        floor = [list(map(add, base, map(mul, light, problem.min_dim)))
+                 for base, light in zip(problem.base, problem.lighting)]
+
+        low, high, g_low, g_high, searching = self._bracket(problem, floor)
+        # Feeders that need their whole window at full rate have a closed-form peak: the highest
+        # period with full charging on top of the dimmed floor (limit is 0 outside the window)
+        capped = {feeder for feeder in searching if problem.charging_energy[feeder] / hours >= deliverable[feeder]}
+        for feeder in capped:
+            low[feeder] = high[feeder] = max(column[feeder] + limit_column[feeder]
+                                             for column, limit_column in zip(floor, problem.rate_limit))
+        side = [0] * problem.feeders  # Which end moved last, for the Illinois correction
+        tolerance = self.tolerance
+        iterations = 0
+        active = [feeder for feeder in searching if feeder not in capped and high[feeder] - low[feeder] > tolerance]
+        while active and iterations < self.max_iterations:
+            iterations += 1
+            # False position; bisect where the feasible end sits exactly on E, which would pin the probe there
+            probe = [low[feeder] - (high[feeder] - low[feeder]) * g_low[feeder] / (g_high[feeder] - g_low[feeder])
+                     if g_high[feeder] > 0.0 else (low[feeder] + high[feeder]) * 0.5 for feeder in active]
+            for feeder, target, value in zip(active, probe, self._headroom(problem, floor, probe, active)):
+                if value >= 0.0:
+                    high[feeder], g_high[feeder] = target, value
+                    if side[feeder] == 1:
+                        g_low[feeder] *= 0.5
+                    side[feeder] = 1
+                else:
+                    low[feeder], g_low[feeder] = target, value
+                    if side[feeder] == -1:
+                        g_high[feeder] *= 0.5
+                    side[feeder] = -1
+            active = [feeder for feeder in active if high[feeder] - low[feeder] > tolerance]
+        # `high` is feasible everywhere, and equals the lower bound wherever no search was needed
+        schedule = self._schedule(problem, floor, self._energy, high)
+        self.previous_peak = list(schedule.peak)
+        self.last_iterations = iterations
+        schedule.iterations = iterations
+        schedule.solve_seconds = time.perf_counter() - start
+        return schedule
+
+    def _schedule(self, problem, floor, energy, peak):
+        feeders = problem.feeders
+        idle, bright_lights = [0.0] * feeders, [1.0] * feeders  # Shared columns for periods with nothing to schedule
+        # 1. Charge into the headroom under the peak with lights at full brightness
+        bright, extra = [], []
+        bright_total, extra_total = [0.0] * feeders, [0.0] * feeders
+        for base, light, floor_column, limit_column in zip(problem.base, problem.lighting, floor, problem.rate_limit):
+            if not any(limit_column):
+                bright.append(idle)
+                extra.append(idle)
+                continue
+            column = [0.0 if z <= f else (z - f if z - f < c else c)
+                      for z, f, c in zip(peak, map(add, base, light), limit_column)]
+            # 2. ...and keep the extra headroom that dimming frees for whatever does not fit there
+            spare = [0.0 if z <= f else (z - f if z - f < c else c) - b
+                     for z, f, c, b in zip(peak, floor_column, limit_column, column)]
+            bright.append(column)
+            extra.append(spare)
+            bright_total = list(map(add, bright_total, column))
+            extra_total = list(map(add, extra_total, spare))
+        bright_share = [e / t if t > e else 1.0 for e, t in zip(energy, bright_total)]
+        extra_share = [0.0 if t >= e or x <= 0.0 else ((e - t) / x if e - t < x else 1.0)
+                       for e, t, x in zip(energy, bright_total, extra_total)]
+        charging = [idle if bright_column is idle else
+                    list(map(add, map(mul, bright_column, bright_share), map(mul, extra_column, extra_share)))
+                    for bright_column, extra_column in zip(bright, extra)]
+        # 3. Lights keep as much brightness as fits under the peak
+        dim, load = [], []
+        actual_peak = [0.0] * feeders
+        for base, light, charge in zip(problem.base, problem.lighting, charging):
+            if not any(light):
+                column = bright_lights
+                total = base if charge is idle else list(map(add, base, charge))
+            else:
+                column = [1.0 if l <= 0.0 else (1.0 if r >= 1.0 else (m if r < m else r))
+                          for l, m, r in zip(light, problem.min_dim,
+                                             [(z - b - c) / l if l > 0.0 else 1.0
+                                              for z, b, c, l in zip(peak, base, charge, light)])]
+                total = list(map(add, map(add, base, map(mul, column, light)), charge))
+            dim.append(column)
+            load.append(total)
+            actual_peak = [t if t > p else p for t, p in zip(total, actual_peak)]
+        return DemandSchedule(problem, actual_peak, dim, charging, load, 0, 0.0)
@@ -1,27 +1,143 @@
 # FIO/modules/energy/energy_module.py
 
-from FIO.core.proxy.proxy import EnergyDataProxy
+import math
+
+from core.concurrency.async_runner import to_async
+from core.eventbus.event_bus import EventBus
+from core.eventlog.event_log import event_log
+from core.metrics.metrics import timed
+from core.proxy.proxy import EnergyDataProxy
+from core.simulation.engine import SECONDS_PER_DAY
+from modules.energy.demand_response import DemandResponseOptimizer, DemandResponseProblem
+
+
+def daily_load_profile(hour):
+    """Typical share of a feeder's peak load by hour of day: morning shoulder and evening peak."""
+    return 0.55 + 0.35 * math.exp(-((hour - 19.0) / 2.5) ** 2) + 0.15 * math.exp(-((hour - 8.0) / 2.0) ** 2)
+
 
 class EnergyModule:
     """
     Integrates the Proxy pattern for controlled access to energy data.
     """
-    def __init__(self):
+    def __init__(self, cache_ttl=None):
         # The module interacts with the Proxy, not the Real Subject directly
-        self._data_proxy = EnergyDataProxy()
-        print("Energy Module: Initialized with EnergyDataProxy for access control.")
+        self._data_proxy = EnergyDataProxy(cache_ttl=cache_ttl)
+        self.meter_readings = 0
+        self.daily_reports = 0
+        self.optimizer = DemandResponseOptimizer()
+        self.schedule = None
+        self.bus = EventBus()  # Private until the controller connects the module to its bus
+        event_log.info("energy.initialized", "Energy Module: Initialized with EnergyDataProxy for access control.")
 
+    @timed("energy.start_monitoring")
     def start_monitoring(self):
-        print("Energy Module: Energy monitoring started.")
-        print(self._data_proxy.get_basic_data())
+        event_log.info("energy.monitoring_started", "Energy Module: Energy monitoring started.")
+        event_log.info("energy.basic_data", "{data}", data=self._data_proxy.get_basic_data())
+        self.bus.publish("energy.monitoring.started")
 
+    @timed("energy.report_usage")
     def report_usage(self):
-        print("Energy Module: Generating basic usage report.")
-        print(self._data_proxy.get_basic_data())
+        event_log.info("energy.usage_report", "Energy Module: Generating basic usage report.")
+        event_log.info("energy.basic_data", "{data}", data=self._data_proxy.get_basic_data())
+        self.bus.publish("energy.usage.reported")
 
+    @timed("energy.get_sensitive_data")
     def get_sensitive_data(self, user_role):
         """Accesses sensitive data via the Proxy."""
-        print(self._data_proxy.get_sensitive_data(user_role))
+        event_log.info("energy.sensitive_data", "{data}", data=self._data_proxy.get_sensitive_data(user_role), user_role=user_role)
+        self.bus.publish("energy.sensitive_data.requested", user_role=user_role)
+
+    # --- Demand Response ---
+    FEEDERS = 24
+    FEEDER_PEAK_KW = 4000.0
+    FEEDER_CAPACITY_KW = 4600.0
+    PERIODS_PER_DAY = 96
 
+    def forecast_load(self, feeders=None, periods=None):
+        """Day-ahead inflexible load forecast (kW), one row of `periods` values per feeder."""
+        feeders = self.FEEDERS if feeders is None else feeders
+        periods = self.PERIODS_PER_DAY if periods is None else periods
+        profile = [daily_load_profile(24.0 * period / periods) for period in range(periods)]
+        # Feeders differ in size by a fixed pseudo-random spread of 70% - 130%
+        return [[self.FEEDER_PEAK_KW * (0.7 + 0.6 * (feeder * 37 % 100) / 100) * share for share in profile]
+                for feeder in range(feeders)]
+
+    @timed("energy.optimize_demand")
+    def optimize_demand(self, lighting_kw, min_dim, charging_kwh, charging_kw, charging_window_hours=(22, 6),
+                        base_load=None, capacity=None):
+        """
+        Schedules city-wide flexible loads (street lighting kW per period, fleet
+        charging energy and power) across the feeders to minimize each feeder's
+        peak under its capacity. Flexible loads are spread evenly over the
+        feeders. Returns the DemandSchedule; the optimizer is warm-started from
+        the previous solve.
+        """
+        base_load = self.forecast_load(periods=len(lighting_kw)) if base_load is None else base_load
+        feeders, periods = len(base_load), len(lighting_kw)
+        per_hour = periods / 24
+        start, end = (int(hour * per_hour) for hour in charging_window_hours)
+        problem = DemandResponseProblem(
+            base_load, self.FEEDER_CAPACITY_KW if capacity is None else capacity,
+            lighting_load=[[kw / feeders for kw in lighting_kw]] * feeders, min_dim=min_dim,
+            charging_energy=charging_kwh / feeders, charging_power=charging_kw / feeders,
+            charging_window=(start, end), period_hours=24 / periods)
+        self.schedule = self.optimizer.solve(problem)
+        event_log.info("energy.demand_response", "Energy Module: {schedule}", schedule=self.schedule)
+        overloaded = self.schedule.over_capacity()
+        if overloaded:
+            event_log.warning("energy.over_capacity", "Energy Module Warning: {count} feeders stay above capacity.",
+                              count=len(overloaded), feeders=overloaded)
+        with self.bus.batched():
+            self.bus.publish("energy.demand_response.scheduled", schedule=self.schedule,
+                             peak_reduction=self.schedule.peak_reduction())
+            if overloaded:
+                self.bus.publish("energy.feeders.over_capacity", feeders=overloaded)
+        return self.schedule
+
+    @timed("energy.get_status")
     def get_status(self):
-        print("Energy Module Status: Monitoring active. Basic data available.")
+        event_log.info("energy.status", "Energy Module Status: Monitoring active. Basic data available.")
+
+    # --- Async API ---
+    start_monitoring_async = to_async(start_monitoring)
+    report_usage_async = to_async(report_usage)
+    get_sensitive_data_async = to_async(get_sensitive_data)
+    get_status_async = to_async(get_status)
+    optimize_demand_async = to_async(optimize_demand)
+
+    # --- Snapshots ---
+
+    def save_state(self, writer, prefix):
+        writer.add_record(f"{prefix}.meta", {"meter_readings": self.meter_readings,
+                                              "daily_reports": self.daily_reports})
+        self._data_proxy.save_state(writer, f"{prefix}.proxy")
+
+    def load_state(self, reader, prefix):
+        state = reader.record(f"{prefix}.meta")
+        self.meter_readings = state["meter_readings"]
+        self.daily_reports = state["daily_reports"]
+        self._data_proxy.load_state(reader, f"{prefix}.proxy")
+
+    # --- Event Bus ---
+
+    def connect(self, bus):
+        """Publishes this module's events on `bus` (the controller's shared bus) from now on."""
+        self.bus = bus
+
+    # --- Simulation ---
+    METER_READING_SECONDS = 15 * 60
+
+    def register_events(self, engine):
+        """Registers meter sampling and the end-of-day report on a SimulationEngine."""
+        engine.schedule_periodic(self.METER_READING_SECONDS, self._on_meter_reading, "energy.meter_reading")
+        end_of_day = engine.now - engine.now % SECONDS_PER_DAY + SECONDS_PER_DAY
+        engine.schedule_periodic(SECONDS_PER_DAY, self._on_daily_report, "energy.daily_report", start=end_of_day)
+
+    def _on_meter_reading(self, now):
+        self.meter_readings += 1
+        self.bus.publish("energy.meter.reading", now=now)
+
+    def _on_daily_report(self, now):
+        self.daily_reports += 1
+        self.bus.publish("energy.report.daily", now=now)
@@ -0,0 +1,163 @@
+# FIO/modules/lighting/brightness_controller.py
+
+import time
+from array import array
+
+LEVELS = 256  # Inputs and outputs are quantized to one byte
+
+# Share of the base brightness kept on an empty street; full traffic gets 100%.
+MIN_TRAFFIC_SHARE = 0.4
+
+
+def time_of_day_factor(hour):
+    """Base brightness demand by hour: full at night, ramped at dusk/dawn, off by day."""
+    if 7 <= hour < 18:
+        return 0.0
+    if hour == 18 or hour == 6:
+        return 0.5
+    return 1.0
+
+
+def _quantize(value):
+    return 0 if value <= 0.0 else LEVELS - 1 if value >= 1.0 else int(value * (LEVELS - 1) + 0.5)
+
+
+class BrightnessController:
+    """
+    Adaptive brightness engine for every street light at once.
+    Ambient light and traffic are kept as byte columns and packed into a 16-bit
+    key per light; for each time-of-day factor a 65536-entry table maps a key
+    to the target brightness, so a full recompute is a single C-level map over
+    the key column. Input updates mark lights in a dirty mask, and tick()
+    recomputes only those lights unless the hour moved to a different table.
+    """
+    def __init__(self, light_count, hour=0):
+        self.light_count = light_count
+        self.ambient = array("B", bytes(light_count))
+        self.traffic = array("B", bytes(light_count))
+        self._keys = array("H", bytes(2 * light_count))
+        self.target = array("B", bytes(light_count))
+        self._dirty_mask = bytearray(light_count)
+        self._dirty = []
+        self._tables = {}
+        self.set_hour(hour)
+        self._computed_table = None
+        self.last_tick_seconds = 0.0
+        self.last_tick_updated = 0
+
+    def _table(self, hour):
+        base = time_of_day_factor(hour)
+        table = self._tables.get(base)
+        if table is None:
+            table = []
+            for ambient in range(LEVELS):
+                need = base * (1.0 - ambient / (LEVELS - 1))
+                for traffic in range(LEVELS):
+                    share = MIN_TRAFFIC_SHARE + (1.0 - MIN_TRAFFIC_SHARE) * traffic / (LEVELS - 1)
+                    table.append(_quantize(need * share))
+            table = self._tables[base] = bytes(table)
+        return table
+
+    # --- Inputs ---
+
+    def _mark(self, light_ids):
+        mask, dirty = self._dirty_mask, self._dirty
+        for light_id in light_ids:
+            if not mask[light_id]:
+                mask[light_id] = 1
+                dirty.append(light_id)
+
+    def update(self, light_ids, ambient=None, traffic=None):
+        """Sets ambient and/or traffic readings (0.0-1.0) for the given lights and marks them dirty."""
+        light_ids = list(light_ids)
+        if ambient is not None:
+            column = self.ambient
+            for light_id, value in zip(light_ids, ambient):
+                column[light_id] = _quantize(value)
+        if traffic is not None:
+            column = self.traffic
+            for light_id, value in zip(light_ids, traffic):
+                column[light_id] = _quantize(value)
+        keys, ambient_column, traffic_column = self._keys, self.ambient, self.traffic
+        for light_id in light_ids:
+            keys[light_id] = ambient_column[light_id] << 8 | traffic_column[light_id]
+        self._mark(light_ids)
+
+    def load(self, ambient, traffic):
+        """Replaces every light's readings from full-length byte sequences (0-255) and forces a full recompute."""
+        self.ambient = array("B", ambient)
+        self.traffic = array("B", traffic)
+        if len(self.ambient) != self.light_count or len(self.traffic) != self.light_count:
+            raise ValueError("Sensor arrays must have one entry per light.")
+        self._keys = array("H", map(int.__or__, map((256).__mul__, self.ambient), self.traffic))
+        self._dirty = []
+        self._dirty_mask = bytearray(self.light_count)
+        self._computed_table = None
+
+    def add_lights(self, count):
+        """Appends `count` lights (no ambient light, no traffic yet); the next tick computes them."""
+        first = self.light_count
+        for name, typecode in (("ambient", "B"), ("traffic", "B"), ("_keys", "H"), ("target", "B")):
+            column = getattr(self, name)
+            if not isinstance(column, array):
+                column = array(typecode, column)  # Snapshot views are read-only
+            column.extend(array(typecode, bytes(column.itemsize * count)))
+            setattr(self, name, column)
+        self._dirty_mask.extend(bytes(count))
+        self.light_count += count
+        self._mark(range(first, self.light_count))
+
+    def set_hour(self, hour):
+        self.hour = hour % 24
+
+    # --- Control Tick ---
+
+    def tick(self):
+        """
+        Recomputes target brightness and returns the ids that were recomputed
+        (None when every light was). Timing is kept in last_tick_seconds.
+        """
+        start = time.perf_counter()
+        table = self._table(self.hour)
+        if table is not self._computed_table:
+            self.target = array("B", map(table.__getitem__, self._keys))
+            self._computed_table = table
+            updated = None
+            self.last_tick_updated = self.light_count
+        else:
+            updated = self._dirty
+            target, keys = self.target, self._keys
+            for light_id in updated:
+                target[light_id] = table[keys[light_id]]
+            self.last_tick_updated = len(updated)
+        self._dirty = []
+        self._dirty_mask = bytearray(self.light_count) if updated is None else self._clear_mask(updated)
+        self.last_tick_seconds = time.perf_counter() - start
+        return updated
+
+    def _clear_mask(self, light_ids):
+        mask = self._dirty_mask
+        for light_id in light_ids:
+            mask[light_id] = 0
+        return mask
+
+    def brightness(self, light_id):
+        return self.target[light_id] / (LEVELS - 1)
+
+    # --- Snapshots ---
+
+    def save_state(self, writer, prefix):
+        for name in ("ambient", "traffic", "_keys", "target"):
+            writer.add_array(f"{prefix}.{name.lstrip('_')}", getattr(self, name))
+        writer.add_record(f"{prefix}.meta", {"light_count": self.light_count, "hour": self.hour})
+
+    @classmethod
+    def load_state(cls, reader, prefix):
+        """Restores the input and output columns as views over the snapshot mapping; the next tick recomputes every light."""
+        state = reader.record(f"{prefix}.meta")
+        controller = cls(0, state["hour"])
+        controller.light_count = state["light_count"]
+        for name in ("ambient", "traffic", "_keys", "target"):
+            setattr(controller, name, reader.array(f"{prefix}.{name.lstrip('_')}"))
+        controller._dirty_mask = bytearray(controller.light_count)
+        return controller
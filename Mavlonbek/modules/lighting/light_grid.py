@@ -0,0 +1,306 @@
+# FIO/modules/lighting/light_grid.py
+
+import heapq
+import math
+from array import array
+from itertools import groupby
+
+
+def _runs(slots):
+    """Compresses slot numbers into sorted (start, end) runs of consecutive slots."""
+    runs = []
+    for _, group in groupby(enumerate(sorted(slots)), key=lambda pair: pair[1] - pair[0]):
+        group = list(group)
+        runs.append((group[0][1], group[-1][1] + 1))
+    return runs
+
+
+def _bounds(cells):
+    """(min cx, min cy, max cx, max cy) over the occupied cell keys, or None for an empty grid."""
+    if not cells:
+        return None
+    xs = [key[0] for key in cells]
+    ys = [key[1] for key in cells]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class LightGrid:
+    """
+    Uniform-grid spatial index over columnar street-light records.
+    Lights are stored sorted by grid cell, so every cell (and usually every
+    district or street) is a contiguous slot range: an area command becomes a
+    few slice assignments on the brightness column instead of a per-light loop.
+    Lights keep a stable id (insertion order) while their storage slot may
+    change whenever build() re-sorts the columns after new lights are added.
+    """
+    COLUMNS = (("x", "d"), ("y", "d"), ("brightness", "f"), ("light_id", "I"), ("_slot_of", "I"))
+
+    def __init__(self, cell_size=100.0):
+        self.cell_size = float(cell_size)
+        self.x = array("d")
+        self.y = array("d")
+        self.brightness = array("f")
+        self.light_id = array("I")  # slot -> id
+        self._slot_of = array("I")  # id -> slot
+        self._cells = {}  # (cx, cy) -> (start, end) slot range
+        self._cell_bounds = None  # (min cx, min cy, max cx, max cy) of the occupied cells
+        self._zones = {}  # zone name -> array of light ids
+        self._zone_runs = {}
+        self._cell_columns = None
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.x)
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    # --- Construction ---
+
+    def _ensure_writable(self):
+        # Grids restored from a snapshot hold memoryviews over mapped pages; appends need arrays
+        if not isinstance(self.x, array):
+            for name, typecode in self.COLUMNS:
+                setattr(self, name, array(typecode, getattr(self, name)))
+
+    def _zone_array(self, zone):
+        ids = self._zones.get(zone)
+        if not isinstance(ids, array):
+            ids = self._zones[zone] = array("I", ids or ())
+        return ids
+
+    def add_lights(self, positions, brightness=1.0, zones=()):
+        """Adds lights at (x, y) positions; returns their ids. `zones` names groups such as a district or street."""
+        self._ensure_writable()
+        first = len(self.x)
+        for x, y in positions:
+            self.x.append(x)
+            self.y.append(y)
+        count = len(self.x) - first
+        self.brightness.extend(array("f", [brightness]) * count)
+        self.light_id.extend(range(first, first + count))
+        self._slot_of.extend(range(first, first + count))
+        ids = range(first, first + count)
+        for zone in zones:
+            self._zone_array(zone).extend(ids)
+        self._dirty = True
+        return ids
+
+    def assign_zone(self, zone, light_ids):
+        self._zone_array(zone).extend(light_ids)
+        self._zone_runs.pop(zone, None)
+
+    def build(self):
+        """Re-sorts the columns by grid cell and rebuilds the cell ranges (only when lights were added)."""
+        if self._cells is None:
+            self._cells = {(cx, cy): (start, end) for cx, cy, start, end in zip(*self._cell_columns)}
+            self._cell_columns = None
+            self._cell_bounds = _bounds(self._cells)
+        if not self._dirty:
+            return
+        cell = self._cell
+        order = sorted(range(len(self.x)), key=lambda slot: cell(self.x[slot], self.y[slot]))
+        self.x = array("d", (self.x[slot] for slot in order))
+        self.y = array("d", (self.y[slot] for slot in order))
+        self.brightness = array("f", (self.brightness[slot] for slot in order))
+        self.light_id = array("I", (self.light_id[slot] for slot in order))
+        for slot, light_id in enumerate(self.light_id):
+            self._slot_of[light_id] = slot
+        self._cells = {}
+        for key, group in groupby(range(len(self.x)), key=lambda slot: cell(self.x[slot], self.y[slot])):
+            group = list(group)
+            self._cells[key] = (group[0], group[-1] + 1)
+        self._cell_bounds = _bounds(self._cells)
+        self._zone_runs = {}
+        self._dirty = False
+
+    # --- Queries ---
+
+    def _radius_slots(self, x, y, radius):
+        """Returns (full_runs, partial_slots): whole cells inside the circle plus individually matched lights."""
+        self.build()
+        size = self.cell_size
+        r2 = radius * radius
+        min_cx, min_cy = self._cell(x - radius, y - radius)
+        max_cx, max_cy = self._cell(x + radius, y + radius)
+        full, partial = [], []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                cell_range = self._cells.get((cx, cy))
+                if cell_range is None:
+                    continue
+                # Farthest cell corner from the centre decides whether the whole cell is covered
+                far_x = max(abs(cx * size - x), abs((cx + 1) * size - x))
+                far_y = max(abs(cy * size - y), abs((cy + 1) * size - y))
+                if far_x * far_x + far_y * far_y <= r2:
+                    full.append(cell_range)
+                    continue
+                xs, ys = self.x, self.y
+                partial.extend(slot for slot in range(*cell_range)
+                               if (xs[slot] - x) ** 2 + (ys[slot] - y) ** 2 <= r2)
+        return full, partial
+
+    def in_radius(self, x, y, radius):
+        """Ids of all lights within `radius` of (x, y)."""
+        full, partial = self._radius_slots(x, y, radius)
+        ids = self.light_id
+        result = array("I")
+        for start, end in full:
+            result.extend(ids[start:end])
+        result.extend(ids[slot] for slot in partial)
+        return result
+
+    def in_rect(self, min_x, min_y, max_x, max_y):
+        """Ids of all lights inside the axis-aligned rectangle."""
+        self.build()
+        min_cx, min_cy = self._cell(min_x, min_y)
+        max_cx, max_cy = self._cell(max_x, max_y)
+        xs, ys, ids = self.x, self.y, self.light_id
+        result = array("I")
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                cell_range = self._cells.get((cx, cy))
+                if cell_range is not None:
+                    result.extend(ids[slot] for slot in range(*cell_range)
+                                  if min_x <= xs[slot] <= max_x and min_y <= ys[slot] <= max_y)
+        return result
+
+    def nearest(self, x, y, k=1):
+        """Ids of the `k` lights closest to (x, y), nearest first (expanding ring search)."""
+        self.build()
+        if not self._cells:
+            return []
+        k = min(k, len(self.x))
+        cx, cy = self._cell(x, y)
+        xs, ys = self.x, self.y
+        best = []  # max-heap of (-distance², id)
+        # Every occupied cell lies inside the bounding box: rings closer than it are empty,
+        # and the ring through its farthest corner ends the search
+        bounds = min_cx, min_cy, max_cx, max_cy = self._cell_bounds
+        ring = max(min_cx - cx, cx - max_cx, min_cy - cy, cy - max_cy, 0)
+        max_ring = max(abs(min_cx - cx), abs(max_cx - cx), abs(min_cy - cy), abs(max_cy - cy))
+        while ring <= max_ring:
+            for key in self._ring_cells(cx, cy, ring, bounds):
+                cell_range = self._cells.get(key)
+                if cell_range is None:
+                    continue
+                for slot in range(*cell_range):
+                    d2 = (xs[slot] - x) ** 2 + (ys[slot] - y) ** 2
+                    if len(best) < k:
+                        heapq.heappush(best, (-d2, self.light_id[slot]))
+                    elif d2 < -best[0][0]:
+                        heapq.heapreplace(best, (-d2, self.light_id[slot]))
+            # Cells beyond this ring are at least `ring` cells away from the query point
+            if len(best) == k and ring * self.cell_size >= math.sqrt(-best[0][0]):
+                break
+            ring += 1
+        return [light_id for _, light_id in sorted((-neg_d2, light_id) for neg_d2, light_id in best)]
+
+    @staticmethod
+    def _ring_cells(cx, cy, ring, bounds):
+        """Cells at Chebyshev distance `ring` from (cx, cy) that lie inside `bounds`."""
+        min_cx, min_cy, max_cx, max_cy = bounds
+        if ring == 0:
+            yield cx, cy
+            return
+        low_x, high_x = max(cx - ring, min_cx), min(cx + ring, max_cx)
+        for row in (cy - ring, cy + ring):
+            if min_cy <= row <= max_cy:
+                for column in range(low_x, high_x + 1):
+                    yield column, row
+        low_y, high_y = max(cy - ring + 1, min_cy), min(cy + ring - 1, max_cy)
+        for column in (cx - ring, cx + ring):
+            if min_cx <= column <= max_cx:
+                for row in range(low_y, high_y + 1):
+                    yield column, row
+
+    def zone_ids(self, zone):
+        try:
+            return self._zones[zone]
+        except KeyError:
+            raise KeyError(f"Unknown lighting zone: {zone}") from None
+
+    # --- Batched Actuation ---
+
+    def _fill(self, runs, level):
+        column = self.brightness
+        value = array("f", [level])
+        count = 0
+        for start, end in runs:
+            column[start:end] = value * (end - start)
+            count += end - start
+        return count
+
+    def set_all(self, level):
+        self.build()
+        return self._fill([(0, len(self.x))], level)
+
+    def set_zone(self, zone, level):
+        """Sets every light of a zone; the zone's slot runs are cached between commands."""
+        self.build()
+        runs = self._zone_runs.get(zone)
+        if runs is None:
+            slot_of = self._slot_of
+            runs = self._zone_runs[zone] = _runs(slot_of[light_id] for light_id in self.zone_ids(zone))
+        return self._fill(runs, level)
+
+    def set_radius(self, x, y, radius, level):
+        full, partial = self._radius_slots(x, y, radius)
+        return self._fill(full + _runs(partial), level)
+
+    def set_lights(self, light_ids, level):
+        self.build()
+        slot_of = self._slot_of
+        return self._fill(_runs(slot_of[light_id] for light_id in light_ids), level)
+
+    def set_levels(self, light_ids, levels):
+        """Sets an individual level per light (e.g. controller output for changed lights)."""
+        self.build()
+        column, slot_of = self.brightness, self._slot_of
+        for light_id, level in zip(light_ids, levels):
+            column[slot_of[light_id]] = level
+
+    def load_levels(self, levels_by_id):
+        """Replaces every light's level from a sequence indexed by light id."""
+        self.build()
+        self.brightness = array("f", map(levels_by_id.__getitem__, self.light_id))
+
+    def brightness_of(self, light_id):
+        self.build()
+        return self.brightness[self._slot_of[light_id]]
+
+    # --- Snapshots ---
+
+    def save_state(self, writer, prefix):
+        """Adds the (built) columns, cell ranges and zones to a SnapshotWriter under `prefix`."""
+        self.build()
+        for name, _ in self.COLUMNS:
+            writer.add_array(f"{prefix}.{name.lstrip('_')}", getattr(self, name))
+        cells = list(self._cells.items())
+        writer.add_array(f"{prefix}.cell_x", array("q", (key[0] for key, _ in cells)))
+        writer.add_array(f"{prefix}.cell_y", array("q", (key[1] for key, _ in cells)))
+        writer.add_array(f"{prefix}.cell_start", array("I", (cell_range[0] for _, cell_range in cells)))
+        writer.add_array(f"{prefix}.cell_end", array("I", (cell_range[1] for _, cell_range in cells)))
+        zone_ids, zone_ends = array("I"), array("Q")
+        for ids in self._zones.values():
+            zone_ids.extend(ids)
+            zone_ends.append(len(zone_ids))
+        writer.add_array(f"{prefix}.zone_ids", zone_ids)
+        writer.add_array(f"{prefix}.zone_ends", zone_ends)
+        writer.add_record(f"{prefix}.meta", {"cell_size": self.cell_size, "zones": list(self._zones)})
+
+    @classmethod
+    def load_state(cls, reader, prefix):
+        """Restores a grid whose columns (and zone id lists) are views over the snapshot mapping."""
+        state = reader.record(f"{prefix}.meta")
+        grid = cls(state["cell_size"])
+        for name, _ in cls.COLUMNS:
+            setattr(grid, name, reader.array(f"{prefix}.{name.lstrip('_')}"))
+        # The cell dict is rebuilt from its columns on first use (see build())
+        grid._cells = None
+        grid._cell_columns = tuple(reader.array(f"{prefix}.{name}") for name in ("cell_x", "cell_y", "cell_start", "cell_end"))
+        zone_ids, start = reader.array(f"{prefix}.zone_ids"), 0
+        for zone, end in zip(state["zones"], reader.array(f"{prefix}.zone_ends")):
+            grid._zones[zone] = zone_ids[start:end]
+            start = end
+        return grid
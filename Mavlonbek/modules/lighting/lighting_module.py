@@ -1,6 +1,13 @@
 # FIO/modules/lighting/lighting_module.py
 
-from FIO.core.factories.abstract_factory import BasicDeviceFactory, AdvancedDeviceFactory
+from core.factories.abstract_factory import BasicDeviceFactory, AdvancedDeviceFactory
+from core.concurrency.async_runner import to_async
+from core.eventbus.event_bus import EventBus
+from core.eventlog.event_log import event_log
+from core.metrics.metrics import timed
+from core.simulation.engine import SECONDS_PER_DAY, SECONDS_PER_HOUR
+from modules.lighting.brightness_controller import BrightnessController, LEVELS, time_of_day_factor
+from modules.lighting.light_grid import LightGrid
 
 class LightingModule:
     """
@@ -10,7 +17,13 @@ class LightingModule:
         self.factory = self._get_factory(factory_type)
         self.sensor = self.factory.create_sensor()
         self.actuator = self.factory.create_actuator()
-        print(f"Lighting Module: Initialized with {factory_type.capitalize()} devices.")
+        self.lights_on = False
+        self.lights = LightGrid()
+        self.controller = None
+        self.bus = EventBus()  # Private until the controller connects the module to its bus
+        self._subscriptions = []
+        self._traffic_level = None  # Last city-wide traffic level (0-255) applied from transport events
+        event_log.info("lighting.initialized", "Lighting Module: Initialized with {factory_type} devices.", factory_type=factory_type.capitalize())
 
     def _get_factory(self, factory_type):
         if factory_type.lower() == "basic":
@@ -20,15 +33,176 @@ class LightingModule:
         else:
             raise ValueError("Invalid factory type. Choose 'basic' or 'advanced'.")
 
+    @timed("lighting.activate_smart_lighting")
     def activate_smart_lighting(self):
-        print("Lighting Module: Smart lighting system activated.")
-        print(f"Sensor Action: {self.sensor.monitor()}")
-        print(f"Actuator Action: {self.actuator.actuate()}")
+        event_log.info("lighting.activated", "Lighting Module: Smart lighting system activated.")
+        event_log.info("lighting.sensor_action", "Sensor Action: {action}", action=self.sensor.monitor())
+        event_log.info("lighting.actuator_action", "Actuator Action: {action}", action=self.actuator.actuate())
+        if self.controller is not None:
+            self.run_control_tick()
+        self.bus.publish("lighting.activated", lights=len(self.lights))
 
+    SAVING_BRIGHTNESS = 0.6
+
+    @timed("lighting.adjust_brightness_for_saving")
     def adjust_brightness_for_saving(self):
-        print("Lighting Module: Adjusting brightness for energy saving.")
+        event_log.info("lighting.energy_saving", "Lighting Module: Adjusting brightness for energy saving.")
         # This is where the actuator would be commanded to a lower setting
-        print(f"Actuator Action: {self.actuator.actuate()} (Energy Saving Mode)")
+        event_log.info("lighting.actuator_action", "Actuator Action: {action} (Energy Saving Mode)", action=self.actuator.actuate())
+        if len(self.lights):
+            self.lights.set_all(self.SAVING_BRIGHTNESS)
+        self.bus.publish("lighting.brightness.changed", level=self.SAVING_BRIGHTNESS, reason="energy_saving")
+
+    # --- Demand Response ---
+    WATTS_PER_LIGHT = 100
+
+    def flexible_load(self, periods=96):
+        """Street lighting load (kW) at full brightness for each of `periods` slots of a day, and the lowest allowed dim level."""
+        full_kw = len(self.lights) * self.WATTS_PER_LIGHT / 1000.0
+        return [full_kw * time_of_day_factor(period * 24 // periods) for period in range(periods)], self.SAVING_BRIGHTNESS
+
+    @timed("lighting.apply_dim_level")
+    def apply_dim_level(self, level):
+        """Sets every street light to the dim level chosen by the demand-response optimizer."""
+        event_log.info("lighting.demand_response", "Lighting Module: Demand response sets street lights to {level:.0%} brightness.", level=level)
+        event_log.info("lighting.actuator_action", "Actuator Action: {action}", action=self.actuator.actuate())
+        if len(self.lights):
+            self.lights.set_all(level)
+        self.bus.publish("lighting.brightness.changed", level=level, reason="demand_response")
+
+    @timed("lighting.add_street_lights")
+    def add_street_lights(self, positions, district=None, street=None, brightness=1.0):
+        """Registers street lights at (x, y) positions, optionally tagged with a district and street."""
+        zones = [zone for zone in (district, street) if zone is not None]
+        ids = self.lights.add_lights(positions, brightness, zones)
+        if self.controller is not None:
+            self.controller.add_lights(len(ids))
+        event_log.info("lighting.lights_added", "Lighting Module: Registered {count} street lights.", count=len(ids))
+        return ids
+
+    @timed("lighting.adjust_brightness")
+    def adjust_brightness(self, level, zone=None, center=None, radius=None):
+        """
+        Sets brightness for an area in one batched update: a named zone (district or
+        street), a circle (`center` and `radius`), or the whole city. Returns lights updated.
+        """
+        if not 0.0 <= level <= 1.0:
+            raise ValueError("Brightness level must be between 0.0 and 1.0.")
+        if zone is not None:
+            updated = self.lights.set_zone(zone, level)
+        elif center is not None and radius is not None:
+            updated = self.lights.set_radius(center[0], center[1], radius, level)
+        else:
+            updated = self.lights.set_all(level)
+        event_log.info("lighting.brightness_adjusted", "Lighting Module: Set {count} lights to {level:.0%} brightness.",
+                       count=updated, level=level)
+        self.bus.publish("lighting.brightness.changed", level=level, reason="manual", zone=zone, lights=updated)
+        return updated
+
+    def enable_adaptive_control(self, hour=0):
+        """Attaches a BrightnessController covering every registered street light."""
+        self.controller = BrightnessController(len(self.lights), hour)
+        self._traffic_level = None
+        return self.controller
+
+    @timed("lighting.run_control_tick")
+    def run_control_tick(self, hour=None):
+        """Runs one adaptive control tick and pushes the recomputed levels to the light grid."""
+        controller = self.controller
+        if hour is not None:
+            controller.set_hour(hour)
+        updated = controller.tick()
+        scale = 1.0 / (LEVELS - 1)
+        if updated is None:
+            self.lights.load_levels([level * scale for level in controller.target])
+        else:
+            self.lights.set_levels(updated, [controller.target[light_id] * scale for light_id in updated])
+        event_log.debug("lighting.control_tick", "Lighting Module: Control tick updated {count} lights in {seconds:.4f}s.",
+                        count=controller.last_tick_updated, seconds=controller.last_tick_seconds)
+        return updated
 
+    @timed("lighting.get_status")
     def get_status(self):
-        print(f"Lighting Module Status: Active with {self.factory.__class__.__name__} devices.")
+        event_log.info("lighting.status", "Lighting Module Status: Active with {factory} devices.", factory=self.factory.__class__.__name__)
+
+    # --- Async API ---
+    activate_smart_lighting_async = to_async(activate_smart_lighting)
+    adjust_brightness_for_saving_async = to_async(adjust_brightness_for_saving)
+    apply_dim_level_async = to_async(apply_dim_level)
+    get_status_async = to_async(get_status)
+
+    # --- Snapshots ---
+
+    def save_state(self, writer, prefix):
+        """Adds device family, street lights and adaptive controller state to a SnapshotWriter."""
+        factory_type = "advanced" if isinstance(self.factory, AdvancedDeviceFactory) else "basic"
+        writer.add_record(f"{prefix}.meta", {"factory_type": factory_type, "lights_on": self.lights_on,
+                                              "adaptive": self.controller is not None})
+        self.lights.save_state(writer, f"{prefix}.lights")
+        if self.controller is not None:
+            self.controller.save_state(writer, f"{prefix}.controller")
+
+    def load_state(self, reader, prefix):
+        state = reader.record(f"{prefix}.meta")
+        self.factory = self._get_factory(state["factory_type"])
+        self.sensor = self.factory.create_sensor()
+        self.actuator = self.factory.create_actuator()
+        self.lights_on = state["lights_on"]
+        self.lights = LightGrid.load_state(reader, f"{prefix}.lights")
+        self.controller = BrightnessController.load_state(reader, f"{prefix}.controller") if state["adaptive"] else None
+        self._traffic_level = None
+
+    # --- Simulation ---
+    SUNRISE_SECONDS = 7 * SECONDS_PER_HOUR
+    SUNSET_SECONDS = 19 * SECONDS_PER_HOUR
+
+    def register_events(self, engine):
+        """Registers the daily sunset/sunrise switching on a SimulationEngine."""
+        time_of_day = engine.now % SECONDS_PER_DAY
+        self.lights_on = not (self.SUNRISE_SECONDS <= time_of_day < self.SUNSET_SECONDS)
+        engine.schedule_periodic(SECONDS_PER_DAY, self._on_sunset, "lighting.sunset",
+                                 start=self._next_time_of_day(engine.now, self.SUNSET_SECONDS))
+        engine.schedule_periodic(SECONDS_PER_DAY, self._on_sunrise, "lighting.sunrise",
+                                 start=self._next_time_of_day(engine.now, self.SUNRISE_SECONDS))
+
+    @staticmethod
+    def _next_time_of_day(now, offset):
+        when = now - now % SECONDS_PER_DAY + offset
+        return when if when >= now else when + SECONDS_PER_DAY
+
+    def _on_sunset(self, now):
+        self.lights_on = True
+        self.bus.publish("lighting.lights.switched", lights_on=True, now=now)
+
+    def _on_sunrise(self, now):
+        self.lights_on = False
+        self.bus.publish("lighting.lights.switched", lights_on=False, now=now)
+
+    # --- Event Bus ---
+    # Queued vehicles per road at which the streets count as fully busy for adaptive control
+    TRAFFIC_SATURATION = 20.0
+
+    def connect(self, bus):
+        """Publishes this module's events on `bus` and reacts to transport traffic cycles published there."""
+        for subscription in self._subscriptions:
+            subscription.unsubscribe()
+        self.bus = bus
+        self._subscriptions = [bus.subscribe("transport.traffic.cycle", self._on_traffic_cycle)]
+
+    def _on_traffic_cycle(self, message):
+        """
+        Feeds city-wide congestion into the adaptive controller's traffic input.
+        Nothing happens while the quantized level is unchanged; otherwise only
+        lights whose reading differs are updated, so the next tick stays incremental.
+        """
+        controller = self.controller
+        if controller is None or not controller.light_count:
+            return
+        busy = min(1.0, message.payload["queued_per_road"] / self.TRAFFIC_SATURATION)
+        level = int(busy * (LEVELS - 1) + 0.5)
+        if level == self._traffic_level:
+            return
+        self._traffic_level = level
+        changed = [light_id for light_id, reading in enumerate(controller.traffic) if reading != level]
+        if changed:
+            controller.update(changed, traffic=[busy] * len(changed))
@@ -0,0 +1,142 @@
+# FIO/modules/security/camera_registry.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+HEALTHY = "healthy"
+TIMED_OUT = "timed_out"
+FAILED = "failed"
+DROPPED = "dropped"
+
+# --- Camera Health ---
+
+class CameraHealth:
+    """Rolling health record of one registered camera."""
+    __slots__ = ("status", "polls", "failures", "consecutive_timeouts", "last_latency", "total_latency")
+
+    def __init__(self):
+        self.status = HEALTHY
+        self.polls = 0
+        self.failures = 0
+        self.consecutive_timeouts = 0
+        self.last_latency = None
+        self.total_latency = 0.0
+
+    @property
+    def mean_latency(self):
+        successes = self.polls - self.failures
+        return self.total_latency / successes if successes else None
+
+# --- Registry ---
+
+class CameraRegistry:
+    """
+    Registry of city cameras (any ModernSecurityDevice) polled concurrently.
+    poll_all() submits every active camera to a bounded thread pool; each poll
+    gets `timeout` seconds from the moment a worker starts it. Cameras that
+    time out `drop_after` polls in a row are dropped from future polls until
+    re-enabled with restore().
+    """
+    def __init__(self, max_concurrency=32, timeout=2.0, drop_after=3):
+        self.timeout = timeout
+        self.drop_after = drop_after
+        self._cameras = {}
+        self._health = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="camera-poll")
+        self.not_polled = []  # Cameras the last poll_all() never reached
+
+    def __len__(self):
+        return len(self._cameras)
+
+    def register(self, camera_id, device):
+        with self._lock:
+            self._cameras[camera_id] = device
+            self._health[camera_id] = CameraHealth()
+
+    def unregister(self, camera_id):
+        with self._lock:
+            self._cameras.pop(camera_id, None)
+            self._health.pop(camera_id, None)
+
+    def health(self, camera_id=None):
+        if camera_id is not None:
+            return self._health[camera_id]
+        return dict(self._health)
+
+    def active_cameras(self):
+        return [camera_id for camera_id, health in self._health.items() if health.status != DROPPED]
+
+    def restore(self, camera_id):
+        """Re-enables a dropped camera."""
+        health = self._health[camera_id]
+        health.status = HEALTHY
+        health.consecutive_timeouts = 0
+
+    @staticmethod
+    def _poll(device, started, camera_id):
+        start = started[camera_id] = time.perf_counter()
+        return device.start_feed(), time.perf_counter() - start
+
+    def poll_all(self, timeout=None):
+        """
+        Polls every active camera concurrently.
+        Returns {camera_id: feed result or the exception raised}; timed-out cameras map to TimeoutError.
+        A camera times out when its own poll runs longer than `timeout` after a
+        worker picked it up. Cameras still queued behind busy workers once the
+        batch wait ends are not polled at all: they are left out of the result
+        (see `not_polled`), keep their health, and go first on the next poll.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            active = self.active_cameras()
+            active_set, skipped = set(active), set(self.not_polled)
+            ordered = [camera_id for camera_id in self.not_polled if camera_id in active_set]
+            ordered += [camera_id for camera_id in active if camera_id not in skipped]
+            cameras = [(camera_id, self._cameras[camera_id]) for camera_id in ordered]
+        started = {}
+        futures = {self._executor.submit(self._poll, device, started, camera_id): camera_id for camera_id, device in cameras}
+        done, pending = wait(futures, timeout=timeout)
+
+        not_polled, timed_out = set(), set()
+        for future in pending:
+            camera_id = futures[future]
+            if future.cancel():
+                not_polled.add(camera_id)
+                continue
+            # Already running: give it the rest of its own `timeout`
+            remaining = started.get(camera_id, time.perf_counter()) + timeout - time.perf_counter()
+            if not wait((future,), timeout=max(remaining, 0.0)).done:
+                timed_out.add(future)  # The worker keeps running; only its result is discarded
+        with self._lock:
+            self.not_polled = [camera_id for camera_id in ordered if camera_id in not_polled]
+
+        results = {}
+        for future, camera_id in futures.items():
+            health = self._health.get(camera_id)
+            if health is None or future.cancelled():
+                continue
+            health.polls += 1
+            if future in timed_out:
+                health.failures += 1
+                health.consecutive_timeouts += 1
+                health.status = DROPPED if health.consecutive_timeouts >= self.drop_after else TIMED_OUT
+                results[camera_id] = TimeoutError(f"Camera {camera_id} did not respond within {timeout}s.")
+                continue
+            error = future.exception()
+            if error is not None:
+                health.failures += 1
+                health.status = FAILED
+                results[camera_id] = error
+                continue
+            feed, latency = future.result()
+            health.status = HEALTHY
+            health.consecutive_timeouts = 0
+            health.last_latency = latency
+            health.total_latency += latency
+            results[camera_id] = feed
+        return results
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,12 @@
 # FIO/modules/security/security_module.py
 
-from FIO.core.adapters.adapter import LegacySecurityCamera, SecurityCameraAdapter, ModernSecurityDevice
+from core.adapters.adapter import LegacySecurityCamera, SecurityCameraAdapter, ModernSecurityDevice
+from core.concurrency.async_runner import to_async
+from core.eventbus.event_bus import EventBus
+from core.eventlog.event_log import event_log
+from core.metrics.metrics import timed
+from modules.security.camera_registry import CameraRegistry
+from core.streaming.frame_pipeline import ChecksumStage, FrameLogStage, FramePipeline, XorCipherStage
 
 # --- Decorator Implementation ---
 
@@ -10,37 +16,184 @@ class SecurityFeedDecorator(ModernSecurityDevice):
     Purpose: Attaches additional responsibilities to an object dynamically.
     Usage: Adds logging and encryption features to the base security feed object.
     """
-    def __init__(self, device: ModernSecurityDevice):
+    def __init__(self, device: ModernSecurityDevice, key=b"SmartCity"):
         self._device = device
+        self.cipher = XorCipherStage(key)
+        self.frame_log = FrameLogStage()
+        self.checksum = ChecksumStage()
 
-    def start_feed(self):
+    # Text this layer prepends to the wrapped device's feed result
+    feed_prefix = "Encrypted and Logged: "
+
+    def before_feed(self):
         # Pre-operation: Add encryption
-        print("Decorator: Encrypting security feed...")
-        result = self._device.start_feed()
+        event_log.info("security.feed_encrypt", "Decorator: Encrypting security feed...")
+
+    def after_feed(self):
         # Post-operation: Add logging
-        print("Decorator: Logging feed activity...")
-        return f"Encrypted and Logged: {result}"
+        event_log.info("security.feed_logged", "Decorator: Logging feed activity...")
+
+    def frame_stages(self):
+        """The per-frame stages this layer applies, in order."""
+        return [self.cipher, self.frame_log, self.checksum]
+
+    def start_feed(self):
+        self.before_feed()
+        result = self._device.start_feed()
+        self.after_feed()
+        return f"{self.feed_prefix}{result}"
+
+    def stream_frames(self, count, frame_size=65536, queue_size=4):
+        """Streams frames through the encrypt -> log -> checksum stages, each in its own thread."""
+        return FramePipeline(self._device.stream_frames(count, frame_size), self.frame_stages(), queue_size)
+
+# --- Fused Decorator Chains ---
+
+class FusedSecurityFeed(ModernSecurityDevice):
+    """
+    A stack of SecurityFeedDecorators compiled into one flat callable.
+    Hooks are gathered into two flat lists (outermost layer first before the
+    feed, innermost first after it) and the layers' prefixes are joined once at
+    compile time, so a feed costs one dispatch per hook instead of one nested
+    call and one string rebuild per layer. Frames run through every layer's
+    stages in a single worker on the shared frame buffer.
+    Output and event order match the nested decorators exactly.
+    """
+    def __init__(self, device: ModernSecurityDevice):
+        layers = []
+        while isinstance(device, SecurityFeedDecorator):
+            layers.append(device)
+            device = device._device
+        self._base = device
+        self.depth = len(layers)
+        self._before_hooks = [layer.before_feed for layer in layers]
+        self._after_hooks = [layer.after_feed for layer in reversed(layers)]
+        self._prefix = "".join(layer.feed_prefix for layer in layers)
+        # Inner layers see each frame first, as in the nested pipelines
+        self._stages = [stage for layer in reversed(layers) for stage in layer.frame_stages()]
+
+    def start_feed(self):
+        for hook in self._before_hooks:
+            hook()
+        result = self._base.start_feed()
+        for hook in self._after_hooks:
+            hook()
+        return self._prefix + result
+
+    def _process_frame(self, frame):
+        for stage in self._stages:
+            stage(frame)
+
+    def stream_frames(self, count, frame_size=65536, queue_size=4):
+        return FramePipeline(self._base.stream_frames(count, frame_size), [self._process_frame], queue_size)
+
+class FeedChain:
+    """
+    Declares a decorator pipeline once: FeedChain(camera).add(SecurityFeedDecorator, key=b"...").
+    build() returns the equivalent nested decorators; compile() returns the fused version.
+    """
+    def __init__(self, device: ModernSecurityDevice):
+        self._device = device
+        self._layers = []
+
+    def add(self, decorator_class, **options):
+        """Adds a layer; the first layer added wraps the device directly (innermost)."""
+        self._layers.append((decorator_class, options))
+        return self
+
+    def build(self):
+        device = self._device
+        for decorator_class, options in self._layers:
+            device = decorator_class(device, **options)
+        return device
+
+    def compile(self):
+        return FusedSecurityFeed(self.build())
 
 # --- Security Module ---
 
 class SecurityModule:
     """
     Integrates the Adapter and Decorator patterns.
+    Every camera is registered in a CameraRegistry and polled concurrently.
     """
-    def __init__(self):
+    PRIMARY_CAMERA = "camera-0"
+
+    def __init__(self, max_concurrency=32, poll_timeout=2.0):
         # 1. Adapter Usage: Integrate the legacy camera
         legacy_camera = LegacySecurityCamera()
         adapted_camera = SecurityCameraAdapter(legacy_camera)
         
         # 2. Decorator Usage: Decorate the adapted camera with extra features
         self.security_feed = SecurityFeedDecorator(adapted_camera)
-        print("Security Module: Initialized with an adapted and decorated camera feed.")
+        self.cameras = CameraRegistry(max_concurrency, poll_timeout)
+        self.cameras.register(self.PRIMARY_CAMERA, self.security_feed)
+        self.feed_checks = 0
+        self.bus = EventBus()  # Private until the controller connects the module to its bus
+        event_log.info("security.initialized", "Security Module: Initialized with an adapted and decorated camera feed.")
 
+    @timed("security.deploy_security_system")
     def deploy_security_system(self):
-        print("Security Module: City-wide security system deployed.")
+        event_log.info("security.deployed", "Security Module: City-wide security system deployed.")
+        self.bus.publish("security.system.deployed", cameras=len(self.cameras))
+
+    def add_camera(self, camera_id, legacy_camera=None):
+        """Registers another legacy camera behind its own adapter and decorator."""
+        device = SecurityFeedDecorator(SecurityCameraAdapter(legacy_camera or LegacySecurityCamera()))
+        self.cameras.register(camera_id, device)
+        return device
+
+    @timed("security.check_feed")
+    def check_feed(self, timeout=None):
+        """Polls all registered cameras concurrently; slow cameras time out instead of blocking the rest."""
+        results = self.cameras.poll_all(timeout)
+        unavailable = []
+        for camera_id, result in results.items():
+            if isinstance(result, Exception):
+                event_log.warning("security.camera_unavailable", "Security Module: Camera {camera_id} unavailable: {error}",
+                                  camera_id=camera_id, error=result)
+                unavailable.append(camera_id)
+            else:
+                event_log.info("security.feed", "{feed}", feed=result, camera_id=camera_id)
+        with self.bus.batched():
+            for camera_id in unavailable:
+                self.bus.publish("security.camera.unavailable", camera_id=camera_id, error=str(results[camera_id]))
+            self.bus.publish("security.feed.checked", cameras=len(results), unavailable=len(unavailable))
+        return results
 
-    def check_feed(self):
-        print(self.security_feed.start_feed())
+    @timed("security.stream_feed")
+    def stream_feed(self, count, frame_size=65536):
+        """Consumes `count` encrypted frames from the feed; returns (frames, bytes) received."""
+        frames = received = 0
+        for frame in self.security_feed.stream_frames(count, frame_size):
+            frames += 1
+            received += len(frame.data)
+        event_log.info("security.stream", "Security Module: Streamed {frames} frames ({size} bytes).",
+                       frames=frames, size=received)
+        self.bus.publish("security.feed.streamed", frames=frames, size=received)
+        return frames, received
 
+    @timed("security.get_status")
     def get_status(self):
-        print("Security Module Status: Security feed is active and monitored.")
+        event_log.info("security.status", "Security Module Status: Security feed is active and monitored.")
+
+    # --- Async API ---
+    deploy_security_system_async = to_async(deploy_security_system)
+    check_feed_async = to_async(check_feed)
+    get_status_async = to_async(get_status)
+
+    # --- Event Bus ---
+
+    def connect(self, bus):
+        """Publishes this module's events on `bus` (the controller's shared bus) from now on."""
+        self.bus = bus
+
+    # --- Simulation ---
+    FEED_CHECK_SECONDS = 10
+
+    def register_events(self, engine):
+        """Registers the periodic feed health check on a SimulationEngine."""
+        engine.schedule_periodic(self.FEED_CHECK_SECONDS, self._on_feed_check, "security.feed_check")
+
+    def _on_feed_check(self, now):
+        self.feed_checks += 1
@@ -0,0 +1,307 @@
+# FIO/modules/transport/dispatch.py
+
+import math
+import threading
+import time
+from collections import deque
+
+from modules.transport.fleet_store import STATE_IN_SERVICE, STATE_ON_TRIP
+
+# --- Spatial Index ---
+
+class TaxiIndex:
+    """
+    Uniform-grid index over the positions of available taxis.
+    Cells map vehicle ids to their (x, y) as read from the fleet's pos_x/pos_y
+    columns, so adding, removing and moving a taxi are O(1) updates instead of
+    a rebuild, and a search never goes back to the columns. `cell_size` should
+    hold a handful of taxis per cell; rebuild() picks one from the fleet's
+    extent when none is given. The index also keeps the bounds of every cell
+    it has filed a taxi in (they only grow until the next rebuild), which
+    limits a search to the cells that can hold taxis.
+    """
+    TAXIS_PER_CELL = 2
+
+    def __init__(self, fleet, cell_size=None):
+        self.fleet = fleet
+        self.cell_size = cell_size
+        self._cells = {}
+        self._cell_of = {}
+        self._bounds = None  # (min cx, min cy, max cx, max cy)
+
+    def __len__(self):
+        return len(self._cell_of)
+
+    def __contains__(self, vehicle_id):
+        return vehicle_id in self._cell_of
+
+    def _cell(self, x, y):
+        size = self.cell_size
+        return int(math.floor(x / size)), int(math.floor(y / size))
+
+    def rebuild(self, vehicle_ids):
+        """Indexes exactly `vehicle_ids` from scratch."""
+        vehicle_ids = list(vehicle_ids)
+        pos_x, pos_y = self.fleet.pos_x, self.fleet.pos_y
+        if self.cell_size is None:
+            if vehicle_ids:
+                xs = [pos_x[vehicle_id] for vehicle_id in vehicle_ids]
+                ys = [pos_y[vehicle_id] for vehicle_id in vehicle_ids]
+                area = max(max(xs) - min(xs), 1.0) * max(max(ys) - min(ys), 1.0)
+                self.cell_size = max(math.sqrt(area * self.TAXIS_PER_CELL / len(vehicle_ids)), 1.0)
+            else:
+                self.cell_size = 100.0
+        self._cells, self._cell_of, self._bounds = {}, {}, None
+        for vehicle_id in vehicle_ids:
+            self.add(vehicle_id)
+
+    def add(self, vehicle_id):
+        x, y = self.fleet.pos_x[vehicle_id], self.fleet.pos_y[vehicle_id]
+        cell = self._cell(x, y)
+        self._cell_of[vehicle_id] = cell
+        bounds = self._bounds
+        if bounds is None:
+            self._bounds = cell + cell
+        elif not (bounds[0] <= cell[0] <= bounds[2] and bounds[1] <= cell[1] <= bounds[3]):
+            self._bounds = (min(bounds[0], cell[0]), min(bounds[1], cell[1]),
+                            max(bounds[2], cell[0]), max(bounds[3], cell[1]))
+        members = self._cells.get(cell)
+        if members is None:
+            members = self._cells[cell] = {}
+        members[vehicle_id] = (x, y)
+
+    def remove(self, vehicle_id):
+        cell = self._cell_of.pop(vehicle_id, None)
+        if cell is None:
+            return False
+        members = self._cells[cell]
+        del members[vehicle_id]
+        if not members:
+            del self._cells[cell]
+        return True
+
+    def moved(self, vehicle_id):
+        """Re-files a taxi whose fleet position changed."""
+        if vehicle_id in self._cell_of:
+            self.remove(vehicle_id)
+            self.add(vehicle_id)
+
+    def nearest(self, x, y, k=1):
+        """Up to `k` (squared distance, id) pairs for the indexed taxis closest to (x, y), nearest first."""
+        if not self._cells:
+            return []
+        cx, cy = self._cell(x, y)
+        cells = self._cells
+        found = []
+        size = self.cell_size
+        bounds = min_cx, min_cy, max_cx, max_cy = self._bounds
+        # Rings closer than the bounds are empty; rings past max_ring lie wholly outside them
+        ring = max(min_cx - cx, cx - max_cx, min_cy - cy, cy - max_cy, 0)
+        max_ring = max(cx - min_cx, max_cx - cx, cy - min_cy, max_cy - cy)
+        while True:
+            for key in self._ring_cells(cx, cy, ring, bounds):
+                members = cells.get(key)
+                if members:
+                    found += [((px - x) * (px - x) + (py - y) * (py - y), vehicle_id)
+                              for vehicle_id, (px, py) in members.items()]
+            if len(found) >= k:
+                found.sort()
+                # Taxis outside the searched square are at least `reach` away from (x, y)
+                reach = min(x - (cx - ring) * size, (cx + ring + 1) * size - x,
+                            y - (cy - ring) * size, (cy + ring + 1) * size - y)
+                if found[k - 1][0] <= reach * reach:
+                    return found[:k]
+            if len(found) >= len(self._cell_of) or ring >= max_ring:
+                found.sort()
+                return found[:k]
+            ring += 1
+
+    @staticmethod
+    def _ring_cells(cx, cy, ring, bounds):
+        """Cells at Chebyshev distance `ring` from (cx, cy) that lie inside `bounds`."""
+        min_cx, min_cy, max_cx, max_cy = bounds
+        if ring == 0:
+            yield cx, cy
+            return
+        low_x, high_x = max(cx - ring, min_cx), min(cx + ring, max_cx)
+        for row in (cy - ring, cy + ring):
+            if min_cy <= row <= max_cy:
+                for column in range(low_x, high_x + 1):
+                    yield column, row
+        low_y, high_y = max(cy - ring + 1, min_cy), min(cy + ring - 1, max_cy)
+        for column in (cx - ring, cx + ring):
+            if min_cx <= column <= max_cx:
+                for row in range(low_y, high_y + 1):
+                    yield column, row
+
+# --- Dispatch ---
+
+class RideRequest:
+    __slots__ = ("request_id", "x", "y", "submitted_at")
+
+    def __init__(self, request_id, x, y, submitted_at):
+        self.request_id = request_id
+        self.x = x
+        self.y = y
+        self.submitted_at = submitted_at
+
+
+class Assignment:
+    __slots__ = ("request_id", "taxi_id", "distance", "latency")
+
+    def __init__(self, request_id, taxi_id, distance, latency):
+        self.request_id = request_id
+        self.taxi_id = taxi_id  # None when no taxi was available
+        self.distance = distance
+        self.latency = latency
+
+    def __repr__(self):
+        return f"Assignment(request={self.request_id}, taxi={self.taxi_id}, distance={self.distance:.1f})"
+
+
+class DispatchEngine:
+    """
+    Matches ride requests to available taxis in short batching windows.
+    Requests collect for up to `window_seconds` (or `max_batch` requests); each
+    batch is matched as a whole: the `candidates` nearest free taxis of every
+    request are pooled and assigned shortest-pickup-first, so two nearby
+    requests do not both grab the same taxi while a slightly farther one sits
+    idle. Requests left over fall back to their nearest remaining taxi.
+    Dispatch latency (submission to assignment) is kept for p50/p99 reporting.
+    """
+    def __init__(self, fleet, taxi_code, window_seconds=0.02, max_batch=512, candidates=4,
+                 cell_size=None, clock=time.perf_counter, on_dispatch=None, latency_samples=100000):
+        self.fleet = fleet
+        self.taxi_code = taxi_code
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.candidates = candidates
+        self.clock = clock
+        self.on_dispatch = on_dispatch
+        self.index = TaxiIndex(fleet, cell_size)
+        self._pending = []
+        self._window_opened = None
+        self._lock = threading.Lock()
+        self._next_request_id = 0
+        self.latencies = deque(maxlen=latency_samples)
+        self.dispatched = 0
+        self.unmatched = 0
+        self.batches = 0
+        self.rebuild_index()
+
+    def rebuild_index(self):
+        """Indexes every taxi that is in service (on duty and not on a trip)."""
+        fleet, code = self.fleet, self.taxi_code
+        available = [vehicle_id for vehicle_id in fleet.ids_with_state(STATE_IN_SERVICE) if fleet.type_code[vehicle_id] == code]
+        self.index.rebuild(available)
+
+    # --- Requests ---
+
+    def submit(self, x, y):
+        """Queues a ride request at (x, y); returns its request id. Closes the window when it is due."""
+        now = self.clock()
+        with self._lock:
+            request_id = self._next_request_id
+            self._next_request_id += 1
+            if not self._pending:
+                self._window_opened = now
+            self._pending.append(RideRequest(request_id, x, y, now))
+            due = len(self._pending) >= self.max_batch or now - self._window_opened >= self.window_seconds
+        if due:
+            self.flush()
+        return request_id
+
+    def poll(self):
+        """Dispatches the pending batch if its window has expired; returns its assignments."""
+        with self._lock:
+            due = self._pending and self.clock() - self._window_opened >= self.window_seconds
+        return self.flush() if due else []
+
+    def flush(self):
+        """Dispatches every pending request now; returns the assignments."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return []
+            assignments = self._match(batch)
+        if self.on_dispatch is not None:
+            self.on_dispatch(assignments)
+        return assignments
+
+    def _match(self, batch):
+        index = self.index
+        pairs = []
+        for order, request in enumerate(batch):
+            pairs.extend((distance2, order, taxi_id) for distance2, taxi_id in index.nearest(request.x, request.y, self.candidates))
+        pairs.sort()
+        matched, taken = {}, set()
+        for distance2, order, taxi_id in pairs:
+            if order not in matched and taxi_id not in taken:
+                matched[order] = (taxi_id, distance2)
+                taken.add(taxi_id)
+        for taxi_id in taken:
+            index.remove(taxi_id)
+        for order, request in enumerate(batch):
+            if order not in matched:
+                nearest = index.nearest(request.x, request.y, 1)
+                if nearest:
+                    distance2, taxi_id = nearest[0]
+                    index.remove(taxi_id)
+                    matched[order] = (taxi_id, distance2)
+
+        now = self.clock()
+        assignments = []
+        set_state = self.fleet.state
+        for order, request in enumerate(batch):
+            latency = now - request.submitted_at
+            match = matched.get(order)
+            if match is None:
+                assignments.append(Assignment(request.request_id, None, float("inf"), latency))
+                self.unmatched += 1
+                continue
+            taxi_id, distance2 = match
+            set_state[taxi_id] = STATE_ON_TRIP
+            assignments.append(Assignment(request.request_id, taxi_id, math.sqrt(distance2), latency))
+            self.latencies.append(latency)
+            self.dispatched += 1
+        self.batches += 1
+        return assignments
+
+    # --- Taxis ---
+
+    def complete_trip(self, taxi_id, x, y):
+        """Drops a passenger off at (x, y); the taxi becomes available again."""
+        with self._lock:
+            self.fleet.move(taxi_id, x, y)
+            self.fleet.state[taxi_id] = STATE_IN_SERVICE
+            self.index.remove(taxi_id)
+            self.index.add(taxi_id)
+
+    def add_taxis(self, vehicle_ids):
+        """Indexes newly created vehicles that are in-service taxis; returns how many were added."""
+        fleet, code = self.fleet, self.taxi_code
+        added = 0
+        with self._lock:
+            for vehicle_id in vehicle_ids:
+                if fleet.type_code[vehicle_id] == code and fleet.state[vehicle_id] == STATE_IN_SERVICE:
+                    self.index.add(vehicle_id)
+                    added += 1
+        return added
+
+    def taxi_moved(self, taxi_id):
+        with self._lock:
+            self.index.moved(taxi_id)
+
+    # --- Reporting ---
+
+    def latency_percentiles(self, fractions=(0.5, 0.99)):
+        """Dispatch latency in seconds at each fraction (nearest rank); None before any dispatch."""
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return {fraction: None for fraction in fractions}
+        return {fraction: ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] for fraction in fractions}
+
+    def stats(self):
+        percentiles = self.latency_percentiles()
+        return {"dispatched": self.dispatched, "unmatched": self.unmatched, "batches": self.batches,
+                "available_taxis": len(self.index), "p50_latency": percentiles[0.5], "p99_latency": percentiles[0.99]}
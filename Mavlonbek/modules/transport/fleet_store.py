@@ -0,0 +1,145 @@
+# FIO/modules/transport/fleet_store.py
+
+from array import array
+from collections.abc import Sequence
+from itertools import compress, repeat
+
+# --- Vehicle States ---
+STATE_IDLE = 0
+STATE_IN_SERVICE = 1
+STATE_MAINTENANCE = 2
+STATE_ON_TRIP = 3
+
+STATE_NAMES = ("idle", "in_service", "maintenance", "on_trip")
+
+
+class FleetStore:
+    """
+    Array-backed (columnar) storage for the whole vehicle fleet.
+    Each vehicle is a row id; its attributes live in compact typed columns:
+    type code, state, position (x, y) and route id. A vehicle costs ~14 bytes
+    instead of a full Python object, and bulk operations run on whole columns.
+    Columns may also be writable memoryviews over a memory-mapped snapshot
+    (see from_columns); they are copied into arrays on the first append.
+    """
+    COLUMNS = (("type_code", "B"), ("state", "B"), ("pos_x", "f"), ("pos_y", "f"), ("route_id", "I"))
+
+    def __init__(self, vehicle_types):
+        self.vehicle_types = tuple(vehicle_types)
+        self._type_codes = {name: code for code, name in enumerate(self.vehicle_types)}
+        self.type_code = array("B")
+        self.state = array("B")
+        self.pos_x = array("f")
+        self.pos_y = array("f")
+        self.route_id = array("I")
+
+    @classmethod
+    def from_columns(cls, vehicle_types, columns):
+        """Builds a store over existing columns ({name: array or memoryview}) without copying them."""
+        store = cls(vehicle_types)
+        for name, _ in cls.COLUMNS:
+            setattr(store, name, columns[name])
+        if len({len(column) for column in store.columns().values()}) > 1:
+            raise ValueError("Fleet columns must all have the same length.")
+        return store
+
+    def columns(self):
+        return {name: getattr(self, name) for name, _ in self.COLUMNS}
+
+    def _ensure_writable(self):
+        if not isinstance(self.type_code, array):
+            for name, typecode in self.COLUMNS:
+                setattr(self, name, array(typecode, getattr(self, name)))
+
+    def __len__(self):
+        return len(self.type_code)
+
+    def code_for(self, vehicle_type):
+        """Returns the numeric type code for a vehicle type name."""
+        try:
+            return self._type_codes[vehicle_type]
+        except KeyError:
+            raise ValueError(f"Unknown vehicle type: {vehicle_type}") from None
+
+    def add(self, type_code, state=STATE_IN_SERVICE, x=0.0, y=0.0, route_id=0):
+        """Appends a single vehicle and returns its id."""
+        self._ensure_writable()
+        vehicle_id = len(self.type_code)
+        self.type_code.append(type_code)
+        self.state.append(state)
+        self.pos_x.append(x)
+        self.pos_y.append(y)
+        self.route_id.append(route_id)
+        return vehicle_id
+
+    def add_many(self, type_code, count, state=STATE_IN_SERVICE, route_id=0):
+        """Appends `count` vehicles of one type at once and returns their id range."""
+        if count < 0:
+            raise ValueError("Vehicle count must be non-negative.")
+        self._ensure_writable()
+        start = len(self.type_code)
+        self.type_code.extend(repeat(type_code, count))
+        self.state.extend(repeat(state, count))
+        self.pos_x.extend(repeat(0.0, count))
+        self.pos_y.extend(repeat(0.0, count))
+        self.route_id.extend(repeat(route_id, count))
+        return range(start, start + count)
+
+    # --- Queries ---
+
+    def count_by_type(self):
+        """Returns a {vehicle_type: count} mapping computed over the type column."""
+        type_codes = self.type_code.tobytes()
+        return {name: type_codes.count(code) for name, code in self._type_codes.items()}
+
+    def count_by_state(self):
+        """Returns a {state_name: count} mapping computed over the state column."""
+        states = self.state.tobytes()
+        return {name: states.count(code) for code, name in enumerate(STATE_NAMES)}
+
+    def ids_with_state(self, state):
+        """Returns the ids of all vehicles in the given state."""
+        return array("I", compress(range(len(self.state)), map(state.__eq__, self.state)))
+
+    def ids_with_type(self, vehicle_type):
+        """Returns the ids of all vehicles of the given type."""
+        code = self.code_for(vehicle_type)
+        return array("I", compress(range(len(self.type_code)), map(code.__eq__, self.type_code)))
+
+    # --- Updates ---
+
+    def set_state(self, vehicle_ids, state):
+        """Sets the state of every vehicle in `vehicle_ids`."""
+        column = self.state
+        for vehicle_id in vehicle_ids:
+            column[vehicle_id] = state
+
+    def move(self, vehicle_id, x, y):
+        self.pos_x[vehicle_id] = x
+        self.pos_y[vehicle_id] = y
+
+    def move_many(self, vehicle_ids, xs, ys):
+        """Sets the positions of many vehicles from parallel id/x/y sequences."""
+        pos_x, pos_y = self.pos_x, self.pos_y
+        for vehicle_id, x, y in zip(vehicle_ids, xs, ys):
+            pos_x[vehicle_id] = x
+            pos_y[vehicle_id] = y
+
+
+class FleetView(Sequence):
+    """
+    Read-only list-like view over a FleetStore.
+    Indexing returns the shared Vehicle instance for the row's type, so code that
+    iterates `TransportModule.vehicles` and calls `operate()` keeps working.
+    """
+    def __init__(self, store: FleetStore, prototypes):
+        self._store = store
+        self._prototypes = prototypes
+
+    def __len__(self):
+        return len(self._store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._prototypes[code] for code in self._store.type_code[index]]
+        return self._prototypes[self._store.type_code[index]]
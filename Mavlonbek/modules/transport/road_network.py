@@ -0,0 +1,87 @@
+# FIO/modules/transport/road_network.py
+
+from array import array
+from itertools import accumulate
+
+# --- Signal Phases ---
+# Every road approaching an intersection belongs to one of two signal phases.
+PHASE_NORTH_SOUTH = 0
+PHASE_EAST_WEST = 1
+
+DEFAULT_SATURATION_FLOW = 0.5  # vehicles per second a green approach can discharge (1800/hour)
+
+
+def _offsets(keys, count):
+    """CSR offsets (count + 1 entries) for road ids already sorted by `keys`."""
+    sizes = [0] * count
+    for key in keys:
+        sizes[key] += 1
+    return array("I", accumulate(sizes, initial=0))
+
+
+class RoadNetwork:
+    """
+    Directed road graph in compressed sparse row (CSR) form.
+    Intersections are ids 0..n-1 and roads are ids 0..m-1. Roads are numbered
+    in order of the intersection they lead into, so the approaches of
+    intersection v are the contiguous range in_offsets[v]:in_offsets[v + 1];
+    outgoing roads are listed per intersection in out_roads via out_offsets.
+    Per-road attributes (source, target, signal phase, saturation flow) are
+    typed columns indexed by road id.
+    """
+    def __init__(self, intersection_count, edges, phases=None, saturation_flow=DEFAULT_SATURATION_FLOW):
+        edges = list(edges)
+        for source, target in edges:
+            if not (0 <= source < intersection_count and 0 <= target < intersection_count):
+                raise ValueError(f"Road ({source}, {target}) references an unknown intersection.")
+        if phases is not None and len(phases) != len(edges):
+            raise ValueError("Phases must have one entry per road.")
+        order = sorted(range(len(edges)), key=lambda index: edges[index][1])
+        self.intersection_count = intersection_count
+        self.road_source = array("I", (edges[index][0] for index in order))
+        self.road_target = array("I", (edges[index][1] for index in order))
+        self.in_offsets = _offsets(self.road_target, intersection_count)
+        if phases is None:
+            # Alternate the approaches of each intersection between the two phases
+            offsets = self.in_offsets
+            self.road_phase = array("B", ((road - offsets[target]) % 2 for road, target in enumerate(self.road_target)))
+        else:
+            self.road_phase = array("B", (phases[index] for index in order))
+        if isinstance(saturation_flow, (int, float)):
+            self.saturation_flow = array("d", [float(saturation_flow)]) * len(edges)
+        else:
+            self.saturation_flow = array("d", (saturation_flow[index] for index in order))
+
+        out_order = sorted(range(len(edges)), key=self.road_source.__getitem__)
+        self.out_roads = array("I", out_order)
+        self.out_offsets = _offsets(self.road_source, intersection_count)
+
+    @classmethod
+    def grid(cls, width, height, saturation_flow=DEFAULT_SATURATION_FLOW):
+        """Manhattan grid with two-way streets; north-south roads form phase 0, east-west roads phase 1."""
+        edges, phases = [], []
+        for y in range(height):
+            for x in range(width):
+                node = y * width + x
+                if x + 1 < width:
+                    edges += [(node, node + 1), (node + 1, node)]
+                    phases += [PHASE_EAST_WEST, PHASE_EAST_WEST]
+                if y + 1 < height:
+                    edges += [(node, node + width), (node + width, node)]
+                    phases += [PHASE_NORTH_SOUTH, PHASE_NORTH_SOUTH]
+        return cls(width * height, edges, phases, saturation_flow)
+
+    @property
+    def road_count(self):
+        return len(self.road_target)
+
+    def approaches(self, intersection):
+        """Road ids leading into an intersection."""
+        return range(self.in_offsets[intersection], self.in_offsets[intersection + 1])
+
+    def exits(self, intersection):
+        """Road ids leaving an intersection."""
+        return self.out_roads[self.out_offsets[intersection]:self.out_offsets[intersection + 1]]
+
+    def out_degree(self, intersection):
+        return self.out_offsets[intersection + 1] - self.out_offsets[intersection]
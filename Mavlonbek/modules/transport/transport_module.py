@@ -2,6 +2,15 @@
 
 from abc import ABC, abstractmethod
 
+from core.concurrency.async_runner import to_async
+from core.eventbus.event_bus import EventBus
+from core.eventlog.event_log import event_log
+from core.metrics.metrics import timed
+from modules.transport.dispatch import DispatchEngine
+from modules.transport.fleet_store import FleetStore, FleetView
+from modules.transport.road_network import RoadNetwork
+from modules.transport.traffic_engine import TrafficEngine
+
 # --- Product Interface ---
 class Vehicle(ABC):
     @abstractmethod
@@ -29,32 +38,196 @@ class TransportModule:
              (or a method within the class) decide which class to instantiate.
     Usage: The create_vehicle method acts as the factory, allowing the system to easily
            add new vehicle types without modifying the core module logic.
+           create_vehicle and create_vehicles resolve the type through _factory_method,
+           which returns the shared prototype of the registered Vehicle class; the fleet
+           store then only records that class's type code per vehicle.
     """
+    # Registry used by the factory method; insertion order defines the fleet type codes.
+    _vehicle_classes = {"bus": Bus, "tram": Tram, "taxi": Taxi}
+
     def __init__(self):
-        self.vehicles = []
+        self._vehicle_types = tuple(self._vehicle_classes)
+        self._prototypes = tuple(cls() for cls in self._vehicle_classes.values())
+        self._type_codes = {type(prototype): code for code, prototype in enumerate(self._prototypes)}
+        self.fleet = FleetStore(self._vehicle_types)
+        self.vehicles = FleetView(self.fleet, self._prototypes)
+        self.traffic_cycles = 0
+        self.traffic = None
+        self.dispatch = None
+        self.bus = EventBus()  # Private until the controller connects the module to its bus
 
     def _factory_method(self, vehicle_type: str) -> Vehicle:
-        """The actual factory method."""
-        if vehicle_type.lower() == "bus":
-            return Bus()
-        elif vehicle_type.lower() == "tram":
-            return Tram()
-        elif vehicle_type.lower() == "taxi":
-            return Taxi()
-        else:
+        """The actual factory method: the fleet's shared instance of the registered vehicle class."""
+        vehicle_class = self._vehicle_classes.get(vehicle_type.lower())
+        if vehicle_class is None:
             raise ValueError(f"Unknown vehicle type: {vehicle_type}")
+        return self._prototypes[self._type_codes[vehicle_class]]
 
+    @timed("transport.create_vehicle")
     def create_vehicle(self, vehicle_type: str):
         try:
             vehicle = self._factory_method(vehicle_type)
-            self.vehicles.append(vehicle)
-            print(f"Transport Module: Created and deployed a new {vehicle_type.capitalize()}.")
-            print(f"Operation: {vehicle.operate()}")
         except ValueError as e:
-            print(f"Transport Module Error: {e}")
+            event_log.error("transport.unknown_vehicle_type", "Transport Module Error: {error}", error=e)
+            return None
+        code = self._type_codes[type(vehicle)]
+        vehicle_id = self.fleet.add(code)
+        event_log.info("transport.vehicle_created", "Transport Module: Created and deployed a new {vehicle_type}.",
+                       vehicle_type=vehicle_type.capitalize(), vehicle_id=vehicle_id)
+        event_log.info("transport.vehicle_operation", "Operation: {operation}",
+                       operation=vehicle.operate(), vehicle_id=vehicle_id)
+        self.bus.publish("transport.vehicle.created", vehicle_id=vehicle_id, vehicle_type=self._vehicle_types[code])
+        if self.dispatch is not None:
+            self.dispatch.add_taxis((vehicle_id,))
+        return vehicle_id
+
+    @timed("transport.create_vehicles")
+    def create_vehicles(self, vehicle_type: str, count: int):
+        """Bulk variant of create_vehicle: deploys `count` vehicles in one columnar append."""
+        code = self._type_codes[type(self._factory_method(vehicle_type))]
+        vehicle_ids = self.fleet.add_many(code, count)
+        event_log.info("transport.vehicles_created", "Transport Module: Created and deployed {count} new {vehicle_type} vehicles.",
+                       vehicle_type=vehicle_type.capitalize(), count=count)
+        self.bus.publish("transport.vehicles.created", vehicle_type=self._vehicle_types[code], count=count)
+        if self.dispatch is not None:
+            self.dispatch.add_taxis(vehicle_ids)
+        return vehicle_ids
+
+    def count_by_type(self):
+        return self.fleet.count_by_type()
+
+    def vehicles_in_state(self, state):
+        return self.fleet.ids_with_state(state)
+
+    # Road network used when traffic control starts without one: a small downtown grid
+    DEFAULT_GRID = (10, 10)
+    DEFAULT_DEMAND = 0.02  # vehicles per second entering each road
+
+    @timed("transport.start_traffic_control")
+    def start_traffic_control(self, network=None):
+        """
+        Activates the traffic control engine on `network` (default: DEFAULT_GRID).
+        Each simulated traffic cycle then re-times every signal and serves the queues.
+        """
+        event_log.info("transport.traffic_control", "Transport Module: Traffic control system activated.")
+        if network is not None or self.traffic is None:
+            network = network if network is not None else RoadNetwork.grid(*self.DEFAULT_GRID)
+            self.traffic = TrafficEngine(network, tick_seconds=self.TRAFFIC_CYCLE_SECONDS)
+            self.traffic.add_demand(self.DEFAULT_DEMAND)
+        event_log.debug("transport.traffic_engine", "Transport Module: Traffic engine controls {intersections} intersections ({roads} roads).",
+                        intersections=self.traffic.network.intersection_count, roads=self.traffic.network.road_count)
+        self.bus.publish("transport.traffic.started", intersections=self.traffic.network.intersection_count,
+                         roads=self.traffic.network.road_count)
+        return self.traffic
+
+    @timed("transport.run_traffic")
+    def run_traffic(self, cycles):
+        """Runs `cycles` signal cycles of the traffic engine immediately and reports throughput."""
+        if self.traffic is None:
+            raise RuntimeError("Traffic control has not been started.")
+        report = self.traffic.run(cycles)
+        event_log.info("transport.traffic_report", "{report}", report=report)
+        return report
+
+    # --- Charging ---
+    # Electric vehicles charge at their depots overnight: vehicle type -> (kWh per night, charger kW)
+    CHARGING_PROFILES = {"bus": (250.0, 150.0), "taxi": (40.0, 11.0)}
+    CHARGING_WINDOW_HOURS = (22, 6)
+
+    def charging_demand(self):
+        """Overnight charging energy (kWh) and total charger power (kW) of the electric fleet."""
+        counts = self.count_by_type()
+        energy = sum(counts[name] * per_vehicle for name, (per_vehicle, _) in self.CHARGING_PROFILES.items())
+        power = sum(counts[name] * charger for name, (_, charger) in self.CHARGING_PROFILES.items())
+        return energy, power
+
+    # --- Ride Dispatch ---
+
+    @timed("transport.enable_dispatch")
+    def enable_dispatch(self, window_seconds=0.02, max_batch=512, candidates=4, cell_size=None):
+        """
+        Starts batched taxi dispatch over every in-service taxi in the fleet.
+        Requests are matched in windows of `window_seconds` (or `max_batch` requests);
+        every assignment is published on the bus as "transport.ride.assigned".
+        """
+        self.dispatch = DispatchEngine(self.fleet, self.fleet.code_for("taxi"), window_seconds=window_seconds,
+                                       max_batch=max_batch, candidates=candidates, cell_size=cell_size,
+                                       on_dispatch=self._on_rides_assigned)
+        event_log.info("transport.dispatch_enabled", "Transport Module: Taxi dispatch enabled for {taxis} available taxis.",
+                       taxis=len(self.dispatch.index))
+        return self.dispatch
 
-    def start_traffic_control(self):
-        print("Transport Module: Traffic control system activated.")
+    @timed("transport.request_ride")
+    def request_ride(self, x, y):
+        """Queues a ride request at (x, y) and returns its request id; assignments follow per batch."""
+        if self.dispatch is None:
+            self.enable_dispatch()
+        return self.dispatch.submit(x, y)
 
+    def _on_rides_assigned(self, assignments):
+        with self.bus.batched():
+            for assignment in assignments:
+                self.bus.publish("transport.ride.assigned", request_id=assignment.request_id, taxi_id=assignment.taxi_id,
+                                 distance=assignment.distance, latency=assignment.latency)
+
+    def dispatch_stats(self):
+        """Dispatch counters and p50/p99 latency; None until dispatch is enabled."""
+        return None if self.dispatch is None else self.dispatch.stats()
+
+    @timed("transport.get_status")
     def get_status(self):
-        print(f"Transport Module Status: {len(self.vehicles)} vehicles currently deployed.")
+        event_log.info("transport.status", "Transport Module Status: {count} vehicles currently deployed.", count=len(self.vehicles))
+
+    # --- Async API ---
+    start_traffic_control_async = to_async(start_traffic_control)
+    get_status_async = to_async(get_status)
+
+    # --- Snapshots ---
+
+    def save_state(self, writer, prefix):
+        """Adds the fleet columns and counters to a SnapshotWriter under `prefix`."""
+        for name, column in self.fleet.columns().items():
+            writer.add_array(f"{prefix}.{name}", column)
+        writer.add_record(f"{prefix}.meta", {"vehicle_types": list(self._vehicle_types),
+                                              "traffic_cycles": self.traffic_cycles})
+
+    def load_state(self, reader, prefix):
+        """Replaces the fleet with the memory-mapped columns of a SnapshotReader."""
+        state = reader.record(f"{prefix}.meta")
+        if tuple(state["vehicle_types"]) != self._vehicle_types:
+            raise ValueError("Snapshot fleet uses different vehicle types.")
+        columns = {name: reader.array(f"{prefix}.{name}") for name, _ in FleetStore.COLUMNS}
+        self.fleet = FleetStore.from_columns(self._vehicle_types, columns)
+        self.vehicles = FleetView(self.fleet, self._prototypes)
+        self.traffic_cycles = state["traffic_cycles"]
+        if self.dispatch is not None:
+            # Re-index the restored fleet; requests pending against the old one are dropped
+            previous = self.dispatch
+            self.enable_dispatch(previous.window_seconds, previous.max_batch, previous.candidates, previous.index.cell_size)
+
+    # --- Event Bus ---
+
+    def connect(self, bus):
+        """Publishes this module's events on `bus` (the controller's shared bus) from now on."""
+        self.bus = bus
+
+    # --- Simulation ---
+    TRAFFIC_CYCLE_SECONDS = 90
+    DISPATCH_CYCLE_SECONDS = 30
+
+    def register_events(self, engine):
+        """Registers the traffic signal cycle and the ride dispatch cycle on a SimulationEngine."""
+        engine.schedule_periodic(self.TRAFFIC_CYCLE_SECONDS, self._on_traffic_cycle, "transport.traffic_cycle")
+        engine.schedule_periodic(self.DISPATCH_CYCLE_SECONDS, self._on_dispatch_cycle, "transport.dispatch_cycle")
+
+    def _on_dispatch_cycle(self, now):
+        """Dispatches requests whose batching window has expired, so the tail of a quiet burst is not left waiting."""
+        if self.dispatch is not None:
+            self.dispatch.poll()
+
+    def _on_traffic_cycle(self, now):
+        self.traffic_cycles += 1
+        if self.traffic is not None:
+            self.traffic.step()
+            self.bus.publish("transport.traffic.cycle", now=now,
+                             queued_per_road=self.traffic.total_queued() / (self.traffic.network.road_count or 1))
@@ -1,6 +1,13 @@
 # FIO/test.py
 
+import asyncio
+import json
+import struct
+import tempfile
+import threading
+import time
 import unittest
+import zlib
 import sys
 import os
 
@@ -11,11 +18,38 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from core.controller import SmartCityController
 from core.singleton.singleton import Singleton
 from core.factories.abstract_factory import BasicTrafficSensor, AdvancedTrafficSensor, BasicStreetLight, AdvancedStreetLight, BasicDeviceFactory, AdvancedDeviceFactory
+from core.factories.abstract_factory import DeviceFleet, DEVICE_OFFLINE
 from core.adapters.adapter import LegacySecurityCamera, SecurityCameraAdapter
 from core.proxy.proxy import EnergyDataProxy
-from core.builders.infrastructure_builder import SmartCityBuilder, InfrastructureDirector
-from modules.transport.transport_module import Bus, Tram, Taxi, TransportModule
-from modules.security.security_module import SecurityFeedDecorator
+from core.proxy.cache import ResultCache, SingleFlight
+from core.proxy.access_policy import AccessPolicy
+from core.streaming.frame_pipeline import XorCipherStage
+from core.facade.city_facade import CityFacade
+from benchmarks.harness import Benchmark, compare, measure, percentile, run_all, REGRESSION, IMPROVEMENT, UNCHANGED
+from benchmarks.suite import SUITE
+from core.metrics.metrics import MetricsRegistry, metrics
+from core.metrics.profiler import SamplingProfiler
+from core.eventbus.event_bus import EventBus, TopicTrie
+from core.ingestion.sensor_ring import SensorRing, RingFullError, OVERFLOW_BLOCK, OVERFLOW_DROP, OVERFLOW_ERROR
+from core.scenarios.runner import ScenarioRunner, run_scenario
+from core.scenarios.scenario import Scenario, ScenarioError, load_scenarios, parse_scenarios
+from core.persistence.snapshot import SnapshotWriter, SnapshotReader, SnapshotFormatError
+from core.builders.infrastructure_builder import CityInfrastructure, SmartCityBuilder, InfrastructureDirector
+from modules.lighting.lighting_module import LightingModule
+from modules.lighting.brightness_controller import BrightnessController
+from modules.transport.transport_module import Bus, Tram, Taxi, TransportModule, Vehicle
+from modules.transport.road_network import RoadNetwork, PHASE_EAST_WEST, PHASE_NORTH_SOUTH
+from modules.transport.traffic_engine import TrafficEngine
+from modules.transport.fleet_store import STATE_IN_SERVICE, STATE_MAINTENANCE, STATE_ON_TRIP
+from modules.transport.dispatch import DispatchEngine, TaxiIndex
+from modules.energy.demand_response import DemandResponseOptimizer, DemandResponseProblem
+from core.simulation.engine import SimulationEngine, SECONDS_PER_DAY
+from core.concurrency.async_runner import fan_out, run_sync
+from core.eventlog.event_log import EventLog, JsonLinesSink, NullSink, INFO, WARNING
+from core.timeseries.timeseries_store import TimeSeriesStore
+from modules.security.security_module import SecurityFeedDecorator, SecurityModule, FeedChain
+from core.eventlog.event_log import event_log as city_event_log
+from modules.security.camera_registry import DROPPED, HEALTHY
 
 class TestDesignPatterns(unittest.TestCase):
 
@@ -51,6 +85,20 @@ class TestDesignPatterns(unittest.TestCase):
         with self.assertRaises(ValueError):
             module._factory_method("plane")
 
+        # New vehicle types plug into the registry the factory method (and so create_vehicle) resolves
+        class Ferry(Vehicle):
+            def operate(self):
+                return "Ferry is crossing the harbour."
+
+        class HarbourTransportModule(TransportModule):
+            _vehicle_classes = dict(TransportModule._vehicle_classes, ferry=Ferry)
+
+        harbour = HarbourTransportModule()
+        ferry_id = harbour.create_vehicle("ferry")
+        self.assertIs(harbour.vehicles[ferry_id], harbour._factory_method("ferry"))
+        self.assertEqual(harbour.create_vehicles("Ferry", 2), range(1, 3))
+        self.assertEqual(harbour.count_by_type()["ferry"], 3)
+
     def test_03_abstract_factory(self):
         """Test Abstract Factory pattern for City Devices."""
         basic_factory = BasicDeviceFactory()
@@ -124,6 +172,1087 @@ class TestDesignPatterns(unittest.TestCase):
         self.assertIn("Encrypted and Logged", result)
         self.assertIn("proprietary protocol", result) # Check if the original functionality is still present
 
+    def test_08_fleet_store(self):
+        """Test the columnar fleet store behind TransportModule."""
+        module = TransportModule()
+        module.create_vehicle("bus")
+        module.create_vehicle("plane")  # Unknown types are reported, not stored
+        taxis = module.create_vehicles("taxi", 1000)
+
+        self.assertEqual(len(module.vehicles), 1001)
+        self.assertEqual(module.count_by_type(), {"bus": 1, "tram": 0, "taxi": 1000})
+        self.assertIsInstance(module.vehicles[0], Bus)
+        self.assertEqual(module.vehicles[-1].operate(), "Taxi is available for on-demand service.")
+
+        module.fleet.set_state(taxis[:10], STATE_MAINTENANCE)
+        self.assertEqual(list(module.vehicles_in_state(STATE_MAINTENANCE)), list(taxis[:10]))
+        self.assertEqual(len(module.vehicles_in_state(STATE_IN_SERVICE)), 991)
+
+        with self.assertRaises(ValueError):
+            module.create_vehicles("plane", 5)
+
+    def test_09_simulation_engine(self):
+        """Test the discrete-event scheduler and the simulated city day."""
+        engine = SimulationEngine()
+        fired = []
+        engine.schedule(5, lambda now: fired.append(("once", now)))
+        ticker = engine.schedule_periodic(2, lambda now: fired.append(("tick", now)))
+        cancelled = engine.schedule(1, lambda now: fired.append(("cancelled", now)))
+        engine.cancel(cancelled)
+        engine.cancel(cancelled)  # Cancelling twice (or an unknown handle) is a no-op
+        engine.cancel(10 ** 6)
+        self.assertEqual(len(engine), 2)
+
+        report = engine.run(until=6)
+        self.assertEqual(fired, [("tick", 2), ("tick", 4), ("once", 5), ("tick", 6)])
+        self.assertEqual(report.events_processed, 4)
+        self.assertEqual(engine.now, 6)
+
+        engine.cancel(0)  # Already fired
+        self.assertEqual(len(engine), 1)
+        engine.cancel(ticker)
+        self.assertEqual(len(engine), 0)
+        engine.run(until=20)
+        self.assertEqual(len(fired), 4)
+        self.assertFalse(engine._cancelled)
+
+        if SmartCityController in Singleton._instances:
+            del Singleton._instances[SmartCityController]
+        controller = SmartCityController()
+        report = controller.run_simulation(SECONDS_PER_DAY)
+        self.assertEqual(controller._transport_module.traffic_cycles, SECONDS_PER_DAY // 90)
+        self.assertEqual(controller._energy_module.meter_readings, 96)
+        self.assertEqual(controller._energy_module.daily_reports, 1)
+        self.assertTrue(controller._lighting_module.lights_on)  # Midnight: lights are on
+        self.assertGreater(report.events_per_second, 0)
+
+    def test_10_async_facade(self):
+        """Test the concurrent async facade, timeouts and cancellation."""
+        if SmartCityController in Singleton._instances:
+            del Singleton._instances[SmartCityController]
+        controller = SmartCityController()
+        results = controller.run_async(controller.get_city_status_async(timeout=5))
+        self.assertEqual(set(results), {"transport", "lighting", "security", "energy"})
+        self.assertFalse(any(isinstance(r, Exception) for r in results.values()))
+
+        async def slow(value, delay):
+            await asyncio.sleep(delay)
+            return value
+
+        # Independent calls overlap, and a slow call times out without hiding the others
+        start = time.perf_counter()
+        results = run_sync(fan_out({"a": slow(1, 0.2), "b": slow(2, 0.2), "c": slow(3, 5)}, timeout=0.3))
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual((results["a"], results["b"]), (1, 2))
+        self.assertIsInstance(results["c"], asyncio.TimeoutError)
+
+        async def cancel_fan_out():
+            task = asyncio.ensure_future(fan_out({"a": slow(1, 5)}))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            await task
+
+        with self.assertRaises(asyncio.CancelledError):
+            run_sync(cancel_fan_out())
+
+    def test_11_event_log(self):
+        """Test level filtering, lazy formatting, the ring buffer and JSON-lines sink."""
+        formatted = []
+
+        class Tracked:
+            def __str__(self):
+                formatted.append(1)
+                return "tracked"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "events.jsonl")
+            lazy_log = EventLog(level=INFO, sinks=[NullSink()])
+            self.assertIsNone(lazy_log.debug("test.debug", "dropped {value}", value=Tracked()))
+            event = lazy_log.info("test.info", "value={value}", value=Tracked())
+            self.assertEqual(formatted, [])  # Nothing formatted until a sink or caller needs it
+            self.assertEqual(event.message, "value=tracked")
+
+            log = EventLog(level=INFO, capacity=3, sinks=[JsonLinesSink(path, buffer_size=2)])
+            log.info("test.info", "info")
+
+            for i in range(4):
+                log.warning("test.warning", "warning {i}", i=i)
+            self.assertEqual([e.message for e in log.recent()], ["warning 1", "warning 2", "warning 3"])
+            self.assertEqual(len(log.recent(kind="test.info")), 0)
+            log.close()
+
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[0]["kind"], "test.info")
+        self.assertEqual(records[-1]["level"], "WARNING")
+        self.assertEqual(records[-1]["fields"], {"i": 3})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "threaded.jsonl")
+            log = EventLog(level=INFO, capacity=10, sinks=[JsonLinesSink(path, buffer_size=7)])
+            workers = [threading.Thread(target=lambda t=t: [log.info("test.thread", "event", t=t, i=i) for i in range(2000)])
+                       for t in range(8)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            log.close()
+            with open(path) as f:
+                seen = [(record["fields"]["t"], record["fields"]["i"]) for record in map(json.loads, f)]
+        self.assertEqual(len(seen), 16000)  # Every event written exactly once
+        self.assertEqual(len(set(seen)), 16000)
+
+    def test_12_timeseries_store(self):
+        """Test rollup-based aggregates, mmap persistence and the proxy query API."""
+        store = TimeSeriesStore()
+        timestamps = list(range(0, 2 * 3600, 10))  # Two hours of 10-second samples
+        values = [(t % 700) / 100.0 for t in timestamps]
+        store.append("meter-1", timestamps[:500], values[:500], infrastructure="Data Center")
+        store.append("meter-1", timestamps[500:], values[500:])
+        store.append("meter-2", timestamps, [1.0] * len(timestamps), infrastructure="Power Plant 1")
+
+        def brute(start, end):
+            return [v for t, v in zip(timestamps, values) if start <= t < end]
+
+        for start, end in ((0, 7200), (120, 5400), (960, 3660)):
+            expected = brute(start, end)
+            self.assertAlmostEqual(store.aggregate("meter-1", start, end, "sum"), sum(expected))
+            self.assertEqual(store.aggregate("meter-1", start, end, "max"), max(expected))
+            self.assertEqual(store.aggregate("meter-1", start, end, "count"), len(expected))
+        self.assertEqual(store.aggregate_infrastructure(0, 3600)["Power Plant 1"], 360.0)
+        self.assertEqual(len(store.range("meter-1", 0, 3600, resolution=900)), 4)
+        with self.assertRaises(ValueError):
+            store.append("meter-2", [0], [1.0])  # Out of order
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store.save(tmp)
+            restored = TimeSeriesStore.load(tmp)
+            self.assertAlmostEqual(restored.aggregate("meter-1", 120, 5400), store.aggregate("meter-1", 120, 5400))
+            restored.save(tmp)  # Saving over the files it is mapped from
+            self.assertAlmostEqual(restored.aggregate("meter-1", 120, 5400), store.aggregate("meter-1", 120, 5400))
+            restored.append("meter-2", [7200], [5.0])
+            self.assertEqual(restored.aggregate("meter-2", 0, 7260, "max"), 5.0)
+            reloaded = TimeSeriesStore.load(tmp)
+            self.assertEqual(len(reloaded), len(store))
+            reloaded.close()
+            self.assertEqual(reloaded._mmaps, [])
+            self.assertAlmostEqual(reloaded.aggregate("meter-1", 0, 7200), store.aggregate("meter-1", 0, 7200))
+            restored.close()
+
+        proxy = EnergyDataProxy(store)
+        self.assertEqual(proxy.query_basic_data(0, 60, "count"), 12)
+        self.assertIn("Data Center", proxy.query_sensitive_data("Admin", 0, 3600))
+        self.assertIn("Access Denied", proxy.query_sensitive_data("Citizen", 0, 3600))
+        self.assertIn("Power Plant 1: 360 MWh", proxy.get_sensitive_data("Admin"))
+
+    def test_13_caching_proxy(self):
+        """Test TTL/LRU eviction, request coalescing and the caching proxy mode."""
+        now = [0.0]
+        cache = ResultCache(ttl=10, max_entries=2, clock=lambda: now[0])
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)  # "a" becomes most recently used
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))  # LRU entry evicted
+        now[0] = 11
+        self.assertIsNone(cache.get("a"))  # Expired
+        self.assertEqual(cache.stats(), {"entries": 1, "hits": 1, "misses": 2, "evictions": 1, "expirations": 1})
+        generation = cache.generation
+        cache.clear()
+        self.assertFalse(cache.put_if_generation("d", 4, generation))  # Cleared since the load began
+        self.assertTrue(cache.put_if_generation("d", 4, cache.generation))
+        self.assertEqual(cache.get("d"), 4)
+
+        calls = []
+        release = threading.Event()
+
+        def slow_backend():
+            calls.append(1)
+            release.wait(2)
+            return "result"
+
+        flight = SingleFlight()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow_backend))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        while flight.coalesced < 7:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["result"] * 8)
+
+        proxy = EnergyDataProxy(cache_ttl=60)
+        for role in ("Admin", "Energy Manager", "Citizen"):
+            proxy.get_sensitive_data(role)
+        stats = proxy.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))  # Privileged roles share an entry
+
+        def racing_loader():
+            # New readings land while this load is in flight
+            proxy.record_samples("meter-1", [0], [5.0])
+            return "stale"
+        self.assertEqual(proxy._cached(("query_basic", 0, 3600, "sum"), racing_loader), "stale")
+        self.assertEqual(proxy.query_basic_data(0, 3600), 5.0)  # The stale result was not cached
+        self.assertIsNone(EnergyDataProxy().cache_stats())
+
+    def test_14_access_policy(self):
+        """Test role inheritance, wildcard grants and batch decisions of the policy engine."""
+        policy = AccessPolicy()
+        self.assertTrue(policy.is_allowed("Operator", "energy:read_basic"))  # Inherited from Viewer
+        self.assertFalse(policy.is_allowed("Operator", "energy:read_sensitive"))
+        self.assertTrue(policy.is_allowed("Admin", "security:view_feed"))
+        self.assertFalse(policy.is_allowed("Stranger", "energy:read_basic"))
+        self.assertFalse(policy.is_allowed("Admin", "energy:launch_rockets"))
+        self.assertEqual(policy.check_many([("Citizen", "transport:manage"), ("Energy Manager", "transport:manage")]),
+                         [False, True])
+        self.assertTrue(policy.is_allowed("Operator", "energy:read_basic"))
+        self.assertGreater(policy.cache_hits, 0)
+        self.assertTrue(policy.allows_all("Security Officer", ["security:deploy", "lighting:adjust"]))
+        self.assertFalse(policy.allows_all("Security Officer", ["security:deploy", "energy:record"]))
+
+        with self.assertRaises(ValueError):
+            AccessPolicy({"A": {"inherits": ["B"], "permissions": []},
+                          "B": {"inherits": ["A"], "permissions": []}})
+
+        restricted = AccessPolicy({"Auditor": {"inherits": [], "permissions": ["energy:read_sensitive"]}})
+        proxy = EnergyDataProxy(policy=restricted)
+        self.assertIn("Sensitive Energy Data", proxy.get_sensitive_data("Auditor"))
+        self.assertIn("Access Denied", proxy.get_sensitive_data("Admin"))
+
+    def test_15_frame_streaming(self):
+        """Test the zero-copy frame stream through the adapter and decorator stages."""
+        decorated_feed = SecurityFeedDecorator(SecurityCameraAdapter(LegacySecurityCamera()), key=b"k3y")
+        decrypt = XorCipherStage(b"k3y")
+        sequences = []
+        for frame in decorated_feed.stream_frames(50, frame_size=4096, queue_size=2):
+            self.assertIsInstance(frame.data, memoryview)
+            self.assertEqual(frame.checksum, zlib.crc32(frame.data))
+            decrypt(frame)  # Decrypting in place restores the camera's header
+            sequences.append(struct.unpack_from("<Q", frame.data, 0)[0])
+        self.assertEqual(sequences, list(range(50)))
+        self.assertEqual((decorated_feed.frame_log.frames, decorated_feed.frame_log.bytes), (50, 50 * 4096))
+
+        # Stopping early releases in-flight buffers without hanging the producer
+        for frame in decorated_feed.stream_frames(1000, frame_size=1024):
+            if frame.sequence == 3:
+                break
+
+    def test_16_camera_registry(self):
+        """Test concurrent camera polling with timeouts and slow-camera dropping."""
+        class SlowCamera(LegacySecurityCamera):
+            def start_proprietary_feed(self):
+                time.sleep(1.0)
+                return super().start_proprietary_feed()
+
+        class LaggyCamera(LegacySecurityCamera):
+            def start_proprietary_feed(self):
+                time.sleep(0.1)
+                return super().start_proprietary_feed()
+
+        module = SecurityModule(max_concurrency=16, poll_timeout=0.4)
+        module.cameras.drop_after = 2
+        for i in range(10):
+            module.add_camera(f"laggy-{i}", LaggyCamera())
+        module.add_camera("slow", SlowCamera())
+
+        start = time.perf_counter()
+        results = module.check_feed()
+        self.assertLess(time.perf_counter() - start, 0.9)  # Not the 2s sum of all the laggy cameras
+        self.assertEqual(len(results), 12)
+        self.assertIsInstance(results["slow"], TimeoutError)
+        self.assertIn("proprietary protocol", results["laggy-3"])
+        self.assertEqual(module.cameras.health("laggy-3").status, HEALTHY)
+        self.assertGreaterEqual(module.cameras.health("laggy-3").last_latency, 0.1)
+
+        module.check_feed()
+        self.assertEqual(module.cameras.health("slow").status, DROPPED)
+        self.assertNotIn("slow", module.check_feed())
+        module.cameras.shutdown()
+
+        # Cameras queued behind busy workers are skipped, not timed out, and go first next time
+        queued = SecurityModule(max_concurrency=2, poll_timeout=0.2)
+        for i in range(20):
+            queued.add_camera(f"queued-{i}", LaggyCamera())
+        polled = set()
+        for _ in range(3):
+            results = queued.check_feed()
+            self.assertFalse(any(isinstance(result, Exception) for result in results.values()))
+            self.assertEqual(set(results) | set(queued.cameras.not_polled), set(queued.cameras.active_cameras()))
+            polled.update(results)
+        self.assertFalse(any(health.status == DROPPED for health in queued.cameras.health().values()))
+        self.assertGreater(len(polled), 12)
+        queued.cameras.shutdown()
+
+    def test_17_fused_feed_chain(self):
+        """Test that a compiled decorator chain behaves exactly like the nested decorators."""
+        chain = FeedChain(SecurityCameraAdapter(LegacySecurityCamera()))
+        for i in range(4):
+            chain.add(SecurityFeedDecorator, key=bytes([65 + i]) * 3)
+        nested, fused = chain.build(), chain.compile()
+        self.assertEqual(fused.depth, 4)
+
+        outputs, events = [], []
+        for device in (nested, fused):
+            city_event_log.buffer.clear()
+            outputs.append(device.start_feed())
+            events.append([e.kind for e in city_event_log.recent()])
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0].count("Encrypted and Logged: "), 4)
+        self.assertEqual(events[0], events[1])
+
+        checksums = []
+        for device in (nested, fused):
+            checksums.append([(f.sequence, f.checksum, bytes(f.data)) for f in device.stream_frames(5, frame_size=512)])
+        self.assertEqual(checksums[0], checksums[1])
+
+    def test_18_light_grid(self):
+        """Test spatial queries and zone-batched brightness updates in LightingModule."""
+        module = LightingModule()
+        main_street = module.add_street_lights([(x * 25.0, 0.0) for x in range(40)], district="north", street="main")
+        grid_lights = module.add_street_lights([(x * 37.0, y * 41.0) for x in range(20) for y in range(1, 20)],
+                                               district="south")
+        positions = {i: (x * 25.0, 0.0) for i, x in zip(main_street, range(40))}
+        positions.update({i: (x * 37.0, y * 41.0) for i, (x, y) in
+                          zip(grid_lights, [(x, y) for x in range(20) for y in range(1, 20)])})
+
+        def brute_radius(cx, cy, r):
+            return sorted(i for i, (x, y) in positions.items() if (x - cx) ** 2 + (y - cy) ** 2 <= r * r)
+
+        grid = module.lights
+        self.assertEqual(sorted(grid.in_radius(300, 200, 180)), brute_radius(300, 200, 180))
+        self.assertEqual(sorted(grid.in_rect(0, 0, 100, 50)),
+                         sorted(i for i, (x, y) in positions.items() if x <= 100 and y <= 50))
+        nearest = sorted(positions, key=lambda i: ((positions[i][0] - 333) ** 2 + (positions[i][1] - 77) ** 2, i))
+        self.assertEqual(grid.nearest(333, 77, k=5), nearest[:5])
+        self.assertEqual(grid._cell_bounds, (0, 0, 9, 7))  # Computed once by build()
+        far = sorted(positions, key=lambda i: ((positions[i][0] + 5000) ** 2 + (positions[i][1] - 9000) ** 2, i))
+        self.assertEqual(grid.nearest(-5000, 9000, k=3), far[:3])
+        started = time.perf_counter()
+        self.assertEqual(len(grid.nearest(-1e7, 1e7, k=3)), 3)  # Empty rings outside the bounds are skipped
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+        self.assertEqual(module.adjust_brightness(0.3, zone="main"), 40)
+        self.assertEqual(module.adjust_brightness(0.5, center=(300, 200), radius=180), len(brute_radius(300, 200, 180)))
+        self.assertAlmostEqual(grid.brightness_of(main_street[-1]), 0.3, places=5)
+        inside = set(brute_radius(300, 200, 180))
+        self.assertTrue(all(abs(grid.brightness_of(i) - (0.5 if i in inside else 1.0)) < 1e-6 for i in grid_lights))
+        with self.assertRaises(KeyError):
+            module.adjust_brightness(0.2, zone="atlantis")
+
+    def test_19_brightness_controller(self):
+        """Test table-driven brightness targets and dirty-mask incremental ticks."""
+        controller = BrightnessController(1000, hour=12)
+        self.assertIsNone(controller.tick())  # First tick computes every light
+        self.assertEqual(max(controller.target), 0)  # Daytime: lights off
+
+        controller.set_hour(22)
+        controller.tick()
+        self.assertAlmostEqual(controller.brightness(0), 0.4, places=2)  # Dark, empty street
+
+        controller.update([5, 6, 5], ambient=[0.0, 1.0, 0.0], traffic=[1.0, 1.0, 1.0])
+        self.assertEqual(controller.tick(), [5, 6])  # Only dirty lights recomputed, once each
+        self.assertEqual(controller.brightness(5), 1.0)
+        self.assertEqual(controller.brightness(6), 0.0)
+        self.assertEqual(controller.tick(), [])
+        controller.set_hour(23)  # Same time-of-day factor: nothing to recompute
+        self.assertEqual(controller.tick(), [])
+
+        module = LightingModule()
+        lights = module.add_street_lights([(x * 10.0, 0.0) for x in range(50)], street="ring")
+        module.enable_adaptive_control(hour=20)
+        module.run_control_tick()
+        module.controller.update([lights[3]], ambient=[0.0], traffic=[1.0])
+        module.run_control_tick()
+        self.assertAlmostEqual(module.lights.brightness_of(lights[3]), 1.0)
+        self.assertAlmostEqual(module.lights.brightness_of(lights[4]), 0.4, places=2)
+
+        # Lights added after control is enabled join the controller
+        grown = LightingModule()
+        grown.add_street_lights([(0.0, 0.0), (1.0, 0.0)])
+        grown.enable_adaptive_control(hour=22)
+        grown.run_control_tick()
+        late = grown.add_street_lights([(2.0, 0.0), (3.0, 0.0)])
+        self.assertEqual(grown.run_control_tick(), list(late))
+        self.assertAlmostEqual(grown.lights.brightness_of(late[1]), 0.4, places=2)
+        self.assertEqual(BrightnessController(1, hour=26).hour, 2)
+
+    def test_20_flyweight_devices(self):
+        """Test shared flyweight products and compact per-device records."""
+        basic, advanced = BasicDeviceFactory(), AdvancedDeviceFactory()
+        self.assertIs(basic.create_sensor(), BasicDeviceFactory().create_sensor())
+        self.assertIsNot(basic.create_sensor(), advanced.create_sensor())
+        with self.assertRaises(AttributeError):
+            basic.create_actuator().brightness = 1.0  # Flyweights carry no per-device state
+
+        record = advanced.create_actuator_device(7, x=1.5, y=2.5)
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertEqual(record.model.actuate(), "Adjusting advanced street light color and intensity.")
+
+        fleet = DeviceFleet()
+        sensors = basic.add_sensors(fleet, 1000)
+        lights = advanced.add_actuators(fleet, 500)
+        fleet.state[lights[0]] = DEVICE_OFFLINE
+        self.assertEqual(len(fleet), 1500)
+        self.assertIs(fleet.model(sensors[10]), basic.create_sensor())
+        self.assertIsInstance(fleet.model(lights[-1]), AdvancedStreetLight)
+        self.assertEqual(fleet.record(lights[0]).state, DEVICE_OFFLINE)
+
+    def test_21_lazy_subsystems(self):
+        """Test that subsystems are only constructed when a facade method needs them."""
+        if SmartCityController in Singleton._instances:
+            del Singleton._instances[SmartCityController]
+        controller = SmartCityController()
+        self.assertEqual(controller.loaded_subsystems(), [])
+        controller.request_sensitive_energy_data("Admin")
+        self.assertEqual(controller.loaded_subsystems(), ["energy"])
+        controller.get_city_status()
+        self.assertEqual(sorted(controller.loaded_subsystems()), ["energy", "lighting", "security", "transport"])
+
+    def test_22_keyed_registry(self):
+        """Test thread-safe creation, fork detection and per-district controllers."""
+        class SlowService(metaclass=Singleton):
+            created = 0
+
+            def __init__(self):
+                time.sleep(0.05)
+                SlowService.created += 1
+
+        instances = []
+        threads = [threading.Thread(target=lambda: instances.append(SlowService())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(SlowService.created, 1)
+        self.assertTrue(all(instance is instances[0] for instance in instances))
+
+        # Pretend this process was forked from another one; the parent's registry is put back afterwards
+        saved = Singleton._instances, Singleton._lock, Singleton._pid
+        Singleton._pid = -1
+        try:
+            self.assertIsNot(SlowService(), instances[0])
+            self.assertEqual(list(Singleton._instances), [SlowService])  # The child starts from an empty registry
+        finally:
+            Singleton._instances, Singleton._lock, Singleton._pid = saved
+        self.assertIs(SlowService(), instances[0])
+
+        north = SmartCityController.for_district("north")
+        self.assertIs(north, SmartCityController.for_district("north"))
+        self.assertIsNot(north, SmartCityController.for_district("south"))
+        self.assertIsNot(north, SmartCityController())
+        self.assertEqual(north.district, "north")
+        self.assertIn("north", SmartCityController.registered_keys())
+        SmartCityController.clear_instances()
+        self.assertEqual(SmartCityController.registered_keys(), [])
+
+        operations = [("manage_transport", ("bus",)), ("manage_transport", ("taxi",)), ("run_simulation", (3600,))]
+        for parallel in (False, True):
+            report = CityFacade(["north", "south", "east"], max_workers=3, parallel=parallel).run(operations)
+            self.assertEqual(report["city"]["vehicles"], {"bus": 3, "tram": 0, "taxi": 3})
+            self.assertEqual(report["city"]["districts"], ["east", "north", "south"])
+            self.assertEqual(report["districts"]["north"]["summary"]["simulated_seconds"], 3600)
+            SmartCityController.clear_instances()
+
+    def test_23_memoized_builds(self):
+        """Test content-addressed step reuse, build diffs and incremental director rebuilds."""
+        plan = {f"district_{d}": {f"Lamp {d}-{i}": f"LED {i % 3}" for i in range(100)} for d in range(50)}
+        builder = SmartCityBuilder()
+        director = InfrastructureDirector(builder)
+        director.build_plan(plan)
+        first = builder.get_result()
+        self.assertEqual(len(first.parts), 5000)
+        self.assertEqual(builder.steps_executed, 50)
+
+        # Same steps with the same specs (in any key order) come from the part cache
+        director.build_plan({step: dict(reversed(list(parts.items()))) for step, parts in plan.items()})
+        again = builder.get_result()
+        self.assertEqual(builder.steps_executed, 50)
+        self.assertEqual(again.parts, first.parts)
+        self.assertFalse(first.diff(again))
+
+        changed_plan = dict(plan)
+        changed_plan["district_7"] = dict(plan["district_7"], **{"Lamp 7-0": "Solar LED", "Lamp 7-new": "LED 0"})
+        del changed_plan["district_9"]
+        changed = director.rebuild_incremental(first, changed_plan)
+        self.assertEqual(director.last_rebuilt_steps, ["district_7"])
+        self.assertEqual(builder.steps_executed, 51)
+        self.assertEqual(len(first.parts), 5000)  # The previous result is left untouched
+
+        diff = first.diff(changed)
+        self.assertEqual(diff.changed, {"Lamp 7-0": ("LED 0", "Solar LED")})
+        self.assertEqual(diff.added, {"Lamp 7-new": "LED 0"})
+        self.assertEqual(len(diff.removed), 100)
+        self.assertEqual(len(changed.parts), 4901)
+
+        # Reverting the plan is served from the cache and restores the first build
+        restored = director.rebuild_incremental(changed, plan)
+        self.assertEqual(sorted(director.last_rebuilt_steps), ["district_7", "district_9"])
+        self.assertEqual(builder.steps_executed, 51)
+        self.assertFalse(restored.diff(first))
+        self.assertEqual(restored.parts, first.parts)
+
+        # Part names are unique across steps; incremental rebuilds match a full build of the same plan
+        with self.assertRaises(ValueError):
+            director.build_plan({"a": {"Depot": "v1"}, "b": {"Depot": "v2"}})
+        builder.reset()
+        base_plan = {"a": {"Depot": "v1", "Yard": "v1"}, "b": {"Hub": "v1"}}
+        director.build_plan(base_plan)
+        base = builder.get_result()
+        for next_plan in ({"a": {"Yard": "v1"}, "b": {"Hub": "v1", "Depot": "v2"}},
+                          {"b": {"Hub": "v1", "Depot": "v1"}},
+                          {"a": {"Depot": "v3", "Hub": "v1"}, "b": {"Yard": "v2"}}):
+            incremental = director.rebuild_incremental(base, next_plan)
+            director.build_plan(next_plan)
+            full = builder.get_result()
+            self.assertEqual(incremental.parts, full.parts)
+            self.assertEqual(incremental.step_parts, full.step_parts)
+            self.assertFalse(incremental.diff(full))
+            self.assertEqual(len(base.diff(incremental)), len(base.diff(full)))
+        infrastructure = CityInfrastructure()
+        infrastructure.add_part("Depot", "v1")
+        self.assertEqual(infrastructure.step_parts, {None: ("Depot",)})
+
+    def test_24_snapshot_restore(self):
+        """Test binary snapshot/restore of controller state with memory-mapped columns."""
+        SmartCityController.clear_instances()
+        controller = SmartCityController.for_district("snapshot-source")
+        transport = controller._transport_module
+        transport.create_vehicles("bus", 1000)
+        transport.create_vehicles("taxi", 500)
+        transport.fleet.set_state(range(10), STATE_MAINTENANCE)
+        transport.fleet.move(3, 12.5, -4.0)
+        lighting = controller._lighting_module
+        lighting.add_street_lights([(x * 30.0, y * 30.0) for x in range(40) for y in range(25)], district="Centre")
+        lighting.adjust_brightness(0.25, center=(300.0, 300.0), radius=200.0)
+        lighting.enable_adaptive_control(hour=22)
+        lighting.controller.update(range(5), ambient=[0.5] * 5, traffic=[1.0] * 5)
+        lighting.run_control_tick()
+        controller.build_infrastructure()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "city.snap")
+            controller.snapshot(path)
+
+            restored = SmartCityController.for_district("snapshot-target")
+            self.assertEqual(sorted(restored.restore(path)), ["lighting", "transport"])
+            fleet = restored._transport_module.fleet
+            self.assertIsInstance(fleet.type_code, memoryview)  # Mapped, not copied
+            self.assertEqual(restored._transport_module.count_by_type(), {"bus": 1000, "tram": 0, "taxi": 500})
+            self.assertEqual(fleet.count_by_state()["maintenance"], 10)
+            self.assertEqual((fleet.pos_x[3], fleet.pos_y[3]), (12.5, -4.0))
+            self.assertEqual(restored.manage_transport("tram"), None)
+            self.assertEqual(len(restored._transport_module.vehicles), 1501)
+            self.assertEqual(len(transport.vehicles), 1500)
+
+            grid, original_grid = restored._lighting_module.lights, lighting.lights
+            for light_id in (0, 5, 250, 999):
+                self.assertEqual(grid.brightness_of(light_id), original_grid.brightness_of(light_id))
+            self.assertEqual(sorted(grid.in_radius(300.0, 300.0, 100.0)), sorted(original_grid.in_radius(300.0, 300.0, 100.0)))
+            self.assertEqual(grid.set_zone("Centre", 0.5), 1000)
+            self.assertEqual(list(restored._lighting_module.controller.target), list(lighting.controller.target))
+            restored._lighting_module.run_control_tick()
+            self.assertEqual(restored._lighting_module.controller.brightness(0), lighting.controller.brightness(0))
+
+            self.assertEqual(restored.infrastructure.parts, controller.infrastructure.parts)
+            self.assertFalse(controller.infrastructure.diff(restored.infrastructure))
+
+            # Writes to restored columns stay private to the process
+            fleet.set_state(range(20, 30), STATE_MAINTENANCE)
+            self.assertEqual(SnapshotReader(path).array("transport.state")[25], STATE_IN_SERVICE)
+
+            # Proxy cache entries keep their remaining ttl; records round-trip nested values
+            proxy = EnergyDataProxy(cache_ttl=60)
+            proxy.get_basic_data()
+            writer = SnapshotWriter()
+            proxy.save_state(writer, "energy.proxy")
+            writer.add_record("values", {"nested": [1, 2.5, None, True, ("a", b"b")], 2 ** 70: "big"})
+            other = os.path.join(tmp, "proxy.snap")
+            writer.write(other)
+            reader = SnapshotReader(other)
+            self.assertEqual(reader.record("values"), {"nested": [1, 2.5, None, True, ("a", b"b")], 2 ** 70: "big"})
+            warm = EnergyDataProxy(cache_ttl=60)
+            warm.load_state(reader, "energy.proxy")
+            self.assertEqual(warm.get_basic_data(), proxy.get_basic_data())
+            self.assertEqual(warm.cache_stats()["hits"], 1)
+            self.assertIsNone(warm._real_service)
+
+            with open(os.path.join(tmp, "bad.snap"), "wb") as f:
+                f.write(b"not a snapshot at all, just some bytes")
+            with self.assertRaises(SnapshotFormatError):
+                SnapshotReader(os.path.join(tmp, "bad.snap"))
+        SmartCityController.clear_instances()
+
+    def test_25_benchmark_harness(self):
+        """Test benchmark statistics, regression comparison and that every suite benchmark runs."""
+        self.assertEqual(percentile([1.0, 2.0, 3.0, 4.0, 5.0], 0.5), 3.0)
+        self.assertAlmostEqual(percentile([1.0, 2.0], 0.99), 1.99)
+        calls = []
+        stats = measure(Benchmark("append", lambda: lambda: calls.append(1), number=10, warmup=2, repeats=5))
+        self.assertEqual(len(calls), 70)
+        self.assertEqual(stats["repeats"], 5)
+        self.assertTrue(stats["min"] <= stats["p50"] <= stats["p99"] <= stats["max"])
+
+        baseline = {"benchmarks": {"a": {"p50": 1.0}, "b": {"p50": 1.0}, "c": {"p50": 1.0}, "gone": {"p50": 1.0}}}
+        current = {"benchmarks": {"a": {"p50": 1.5}, "b": {"p50": 0.5}, "c": {"p50": 1.05}, "added": {"p50": 1.0}}}
+        statuses = {name: status for name, status, *_ in compare(baseline, current, threshold=0.1)}
+        self.assertEqual(statuses, {"a": REGRESSION, "b": IMPROVEMENT, "c": UNCHANGED, "gone": "missing", "added": "new"})
+
+        previous_sinks = city_event_log.set_sinks(NullSink())
+        try:
+            results = run_all(SUITE, warmup=0, repeats=1, number=1, report=None)
+        finally:
+            city_event_log.set_sinks(*previous_sinks)
+            SmartCityController.clear_instances()
+        self.assertEqual(sorted(results["benchmarks"]), sorted(benchmark.name for benchmark in SUITE))
+        json.dumps(results)
+
+    def test_26_metrics(self):
+        """Test per-method counters, latency histograms, Prometheus endpoint and sampling profiler."""
+        import urllib.request
+        SmartCityController.clear_instances()
+        metrics.reset()
+        controller = SmartCityController()
+        controller.manage_transport("bus")
+        controller.manage_transport("bus")
+        controller.get_city_status()
+        collected = metrics.collect()
+        self.assertEqual(collected["controller.manage_transport"]["calls"], 2)
+        self.assertEqual(collected["transport.create_vehicle"]["calls"], 2)
+        self.assertEqual(collected["lighting.get_status"]["calls"], 1)
+        self.assertEqual(sum(collected["controller.get_city_status"]["buckets"]), 1)
+
+        registry = MetricsRegistry()
+
+        @registry.timed("test.fails")
+        def fails():
+            raise RuntimeError("boom")
+
+        def worker():
+            for seconds in (0.001, 0.002, 0.5):
+                registry.record("test.latency", seconds)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with self.assertRaises(RuntimeError):
+            fails()
+        collected = registry.collect()
+        self.assertEqual(collected["test.latency"]["calls"], 12)
+        self.assertEqual(collected["test.fails"]["errors"], 1)
+
+        @registry.timed_async("test.async_fails")
+        async def async_fails(delay):
+            await asyncio.sleep(delay)
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(async_fails(0.01))
+        entry = registry.collect()["test.async_fails"]
+        self.assertEqual((entry["calls"], entry["errors"]), (1, 1))
+        self.assertGreaterEqual(entry["sum"], 0.01)  # Measured across the await
+        controller.run_async(controller.get_city_status_async(timeout=5))
+        controller.status_summary()
+        collected = metrics.collect()
+        self.assertEqual(collected["controller.get_city_status_async"]["calls"], 1)
+        self.assertEqual(collected["controller.status_summary"]["calls"], 1)
+        self.assertTrue(0.002 <= registry.quantile("test.latency", 0.5) < 0.0025)
+        self.assertTrue(0.5 <= registry.quantile("test.latency", 0.99) < 0.6)
+
+        server = controller.serve_metrics()
+        try:
+            with urllib.request.urlopen(server.url, timeout=5) as response:
+                body = response.read().decode()
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+        finally:
+            server.stop()
+        self.assertIn('smartcity_calls_total{method="controller.manage_transport"} 2', body)
+        self.assertIn('smartcity_call_duration_seconds_bucket{method="controller.manage_transport",le="+Inf"} 2', body)
+
+        started, release = threading.Event(), threading.Event()
+
+        @registry.timed("controller.slow_call")
+        def slow_call():
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=slow_call)
+        thread.start()
+        started.wait(5)
+        registry.record("controller.slow_call", 1.0)
+        profiler = SamplingProfiler(registry)
+        profiler.sample_once()
+        profiler.sample_once()
+        release.set()
+        thread.join()
+        (stack, samples), = profiler.top_stacks("controller.slow_call")
+        self.assertEqual(samples, 2)
+        self.assertIn("slow_call", stack)
+        self.assertIn("controller.slow_call;", profiler.render_collapsed())
+        SmartCityController.clear_instances()
+
+    def test_27_traffic_engine(self):
+        """Test CSR road graph, max-pressure signal timing, queue conservation and module integration."""
+        network = RoadNetwork.grid(3, 2)
+        self.assertEqual((network.intersection_count, network.road_count), (6, 14))
+        self.assertEqual(list(network.in_offsets), [0, 2, 5, 7, 9, 12, 14])
+        centre = 1  # Top middle: west, east and south neighbours
+        self.assertEqual(sorted(network.road_source[road] for road in network.approaches(centre)), [0, 2, 4])
+        self.assertEqual(sorted(network.road_target[road] for road in network.exits(centre)), [0, 2, 4])
+        self.assertEqual(sorted(network.road_phase[road] for road in network.approaches(centre)),
+                         [PHASE_NORTH_SOUTH, PHASE_EAST_WEST, PHASE_EAST_WEST])
+        with self.assertRaises(ValueError):
+            RoadNetwork(2, [(0, 5)])
+
+        engine = TrafficEngine(network, tick_seconds=30.0, min_green_share=0.2)
+        east_west = next(road for road in network.approaches(centre) if network.road_phase[road] == PHASE_EAST_WEST)
+        engine.add_vehicles(east_west, 40.0)
+        engine.step()
+        self.assertEqual(engine.green_share[centre], 0.2)  # Phase 0 (north-south) gets the minimum
+        self.assertEqual(engine.green_share[5], 0.5)  # No pressure at all: even split
+
+        report = engine.run(50)
+        self.assertAlmostEqual(engine.total_queued() + engine.vehicles_exited, 40.0)
+        self.assertLess(engine.total_queued(), 1.0)
+        self.assertEqual(report.ticks, 50)
+        self.assertGreater(report.intersections_per_second, 0)
+        self.assertIn("intersections/sec", str(report))
+
+        transport = TransportModule()
+        traffic = transport.start_traffic_control()
+        self.assertIs(transport.start_traffic_control(), traffic)
+        self.assertEqual(traffic.network.intersection_count, 100)
+        self.assertEqual(transport.run_traffic(3).ticks, 3)
+        engine_clock = SimulationEngine()
+        transport.register_events(engine_clock)
+        engine_clock.run(until=10 * transport.TRAFFIC_CYCLE_SECONDS)
+        self.assertEqual(traffic.ticks, 3 + transport.traffic_cycles)
+        self.assertGreater(traffic.vehicles_served, 0)
+
+    def test_28_taxi_dispatch(self):
+        """Tests the grid index's nearest search and batched taxi assignment."""
+        transport = TransportModule()
+        taxis = transport.create_vehicles("taxi", 400)
+        transport.create_vehicles("bus", 5)  # Never dispatched
+        transport.fleet.move_many(taxis, [(i % 20) * 10.0 for i in taxis], [(i // 20) * 10.0 for i in taxis])
+
+        index = TaxiIndex(transport.fleet)
+        index.rebuild(taxis)
+        for x, y in ((3.0, 4.0), (101.0, 57.0), (-40.0, 300.0), (50000.0, -20000.0), (95.0, -9000.0)):
+            brute = sorted(((transport.fleet.pos_x[t] - x) ** 2 + (transport.fleet.pos_y[t] - y) ** 2, t) for t in taxis)
+            self.assertEqual([d for d, _ in index.nearest(x, y, 5)], [d for d, _ in brute[:5]])
+        started = time.perf_counter()
+        self.assertEqual(len(index.nearest(-1e6, 1e6, 3)), 3)  # Far outside the fleet: no walk through empty rings
+        self.assertLess(time.perf_counter() - started, 0.5)
+        index.remove(0)
+        self.assertNotIn(0, index)
+        self.assertNotEqual(index.nearest(0.0, 0.0)[0][1], 0)
+
+        now = [0.0]
+        engine = DispatchEngine(transport.fleet, transport.fleet.code_for("taxi"), window_seconds=0.5, clock=lambda: now[0])
+        self.assertEqual(len(engine.index), 400)
+        engine.submit(0.0, 0.0)
+        engine.submit(1.0, 0.0)
+        self.assertEqual(engine.poll(), [])  # Window still open
+        now[0] = 0.5
+        assignments = engine.poll()
+        self.assertEqual(len({a.taxi_id for a in assignments}), 2)  # Each request gets its own taxi
+        self.assertEqual({a.taxi_id for a in assignments}, {0, 1})
+        self.assertTrue(all(a.latency == 0.5 for a in assignments))
+        self.assertEqual(transport.fleet.state[0], STATE_ON_TRIP)
+        self.assertNotIn(0, engine.index)
+        engine.complete_trip(0, 95.0, 95.0)
+        self.assertEqual(transport.fleet.state[0], STATE_IN_SERVICE)
+        self.assertEqual(engine.index.nearest(95.0, 95.0)[0][1], 0)
+
+        for _ in range(450):
+            engine.submit(50.0, 50.0)
+        engine.flush()
+        stats = engine.stats()
+        self.assertEqual((stats["dispatched"], stats["unmatched"], stats["available_taxis"]), (401, 51, 0))
+        self.assertEqual(stats["p50_latency"], 0.0)
+
+        transport.fleet.set_state(taxis, STATE_IN_SERVICE)
+        request_id = transport.request_ride(10.0, 10.0)
+        self.assertEqual(request_id, 0)
+        transport.dispatch.flush()
+        self.assertEqual(transport.dispatch_stats()["dispatched"], 1)
+
+        # Taxis created after dispatch starts are indexed; assignments are published; the simulation polls
+        module = TransportModule()
+        module.create_vehicle("taxi")
+        assigned = []
+        module.bus.subscribe("transport.ride.assigned", lambda message: assigned.append(message.payload["taxi_id"]))
+        module.request_ride(0.0, 0.0)
+        module.dispatch.flush()
+        module.create_vehicles("taxi", 2)
+        self.assertEqual(len(module.dispatch.index), 2)
+        module.dispatch.window_seconds = 10.0
+        module.request_ride(1.0, 1.0)  # Last request of a burst: stays pending until something polls
+        self.assertEqual(len(assigned), 1)
+        module.dispatch.window_seconds = 0.0
+        clock = SimulationEngine()
+        module.register_events(clock)
+        clock.run(until=module.DISPATCH_CYCLE_SECONDS)
+        self.assertEqual(assigned[0], 0)
+        self.assertIn(assigned[1], (1, 2))  # Not None: the late taxis were available
+
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = SnapshotWriter()
+            module.save_state(writer, "transport")
+            path = os.path.join(tmp, "fleet.snap")
+            writer.write(path)
+            previous = module.dispatch
+            module.load_state(SnapshotReader(path), "transport")
+            self.assertIsNot(module.dispatch, previous)
+            self.assertIs(module.dispatch.fleet, module.fleet)
+
+    def test_29_sensor_ring(self):
+        """Tests shared-memory sensor rings: zero-copy drains, wraparound, overflow policies and the controller hook."""
+        from array import array
+        ring = SensorRing(8, overflow=OVERFLOW_DROP)
+        try:
+            attached = SensorRing.attach(ring.name)
+            self.assertEqual(attached.capacity, 8)
+            self.assertEqual(attached.write_batch(array("I", range(6)), [1.0] * 6, [float(i) for i in range(6)]), 6)
+            with ring.drain(4) as batch:
+                self.assertEqual(list(batch.values), [0.0, 1.0, 2.0, 3.0])
+                self.assertEqual(batch.values.obj, ring.values.obj)  # A view of the shared block, not a copy
+            with self.assertRaises(ValueError):
+                batch.values[0]  # Released with the batch
+
+            self.assertEqual(attached.write_batch(range(10, 20), [2.0] * 10, [9.0] * 10), 6)
+            self.assertEqual((ring.dropped, len(ring)), (4, 8))
+            self.assertFalse(BasicTrafficSensor().record_reading(attached, 99, 1.0))
+            first = ring.drain()
+            self.assertEqual(list(first.device_ids), [4, 5, 10, 11])  # Stops at the end of the ring
+            second = ring.drain()
+            self.assertEqual(list(second.device_ids), [12, 13, 14, 15])
+            with self.assertRaises(ValueError):
+                ring.release(second)  # Out of order
+            first.release()
+            second.release()
+            self.assertEqual(len(ring), 0)
+            attached.close()
+        finally:
+            ring.close()
+
+        strict = SensorRing(2, overflow=OVERFLOW_ERROR)
+        blocking = SensorRing(2, overflow=OVERFLOW_BLOCK, timeout=0.01)
+        for full in (strict, blocking):
+            full.write_batch([1, 2], [0.0, 0.0], [0.0, 0.0])
+            with self.assertRaises(RingFullError):
+                full.write(3, 0.0, 0.0)
+            full.close()
+        with self.assertRaises(ValueError):
+            SensorRing(6)
+
+        controller = SmartCityController.for_district("ingestion")
+        producer = controller.open_sensor_ring(capacity=16)
+        producer.write_batch(array("I", [7, 8, 9]), array("d", [1.0, 2.0, 3.0]), array("d", [0.5, 1.5, 2.5]))
+        totals = []
+        self.assertEqual(controller.drain_sensor_readings(lambda batch: totals.append(sum(batch.values))), 3)
+        self.assertEqual(totals, [4.5])
+        self.assertEqual(len(producer), 0)
+
+        def release_early(batch):
+            with batch:  # Releasing inside the handler is fine, drain's own release is a no-op
+                totals.append(len(batch))
+        producer.write_batch(array("I", [1, 2]), array("d", [0.0, 0.0]), array("d", [1.0, 1.0]))
+        self.assertEqual(controller.drain_sensor_readings(release_early), 2)
+        self.assertEqual(len(producer), 0)
+
+        name = producer.name
+        SmartCityController.discard_instance("ingestion")  # Closes the controller's rings
+        with self.assertRaises(FileNotFoundError):
+            SensorRing.attach(name)
+
+        names = [SmartCityController.for_district(district).open_sensor_ring(capacity=16).name
+                 for district in ("ingestion-a", "ingestion-b")]
+        SmartCityController.clear_instances()  # Closes every dropped controller's rings too
+        for name in names:
+            with self.assertRaises(FileNotFoundError):
+                SensorRing.attach(name)
+
+    def test_30_demand_response(self):
+        """Tests the demand-response optimizer: lower peaks, delivered charging, dim bounds, warm start and the facade."""
+        base = [[100.0, 100.0, 150.0, 160.0, 120.0, 80.0, 60.0, 60.0], [50.0] * 8]
+        lighting = [[0.0, 0.0, 40.0, 40.0, 40.0, 40.0, 0.0, 0.0]] * 2
+        problem = DemandResponseProblem(base, 200.0, lighting_load=lighting, min_dim=0.5, charging_energy=100.0,
+                                        charging_power=50.0, charging_window=(5, 2), period_hours=1.0)
+        optimizer = DemandResponseOptimizer()
+        schedule = optimizer.solve(problem)
+        self.assertLessEqual(schedule.peak[0], schedule.unmanaged_peak()[0])
+        self.assertAlmostEqual(schedule.peak[0], 180.0, delta=0.05)  # 160 + 40 of lighting dimmed to 50%
+        self.assertEqual(schedule.over_capacity(), [])
+        for feeder in range(2):
+            delivered = sum(schedule.charging[period][feeder] for period in range(8))
+            self.assertAlmostEqual(delivered, 100.0, delta=0.01)
+            self.assertEqual(schedule.charging[3][feeder], 0.0)  # Outside the wrapping window
+        self.assertTrue(all(0.5 <= level <= 1.0 for row in schedule.dim for level in row))
+        self.assertEqual(optimizer.previous_peak, schedule.peak)
+        self.assertAlmostEqual(optimizer.solve(problem).peak[1], schedule.peak[1], delta=0.02)
+
+        # Charging that needs the charger at full power all window long has a closed-form peak
+        capped = DemandResponseProblem([[10.0, 10.0, 30.0]], 100.0, charging_energy=60.0, charging_power=20.0,
+                                       charging_window=(0, 3), period_hours=1.0)
+        self.assertAlmostEqual(DemandResponseOptimizer().solve(capped).peak[0], 50.0)
+
+        controller = SmartCityController.for_district("demand")
+        controller._lighting_module.add_street_lights([(float(i), 0.0) for i in range(500)])
+        controller._transport_module.create_vehicles("bus", 20)
+        schedule = controller.optimize_energy_usage()
+        self.assertEqual(controller._energy_module.schedule, schedule)
+        self.assertGreater(schedule.peak_reduction(), 0.0)
+        self.assertEqual(schedule.over_capacity(), [])
+
+        results = controller.run_async(controller.optimize_energy_usage_async(timeout=30))
+        self.assertEqual(set(results), {"lighting", "energy"})
+        self.assertFalse(any(isinstance(r, Exception) for r in results.values()))
+
+        async def failing_optimizer(*args):
+            raise RuntimeError("solver diverged")
+        controller._energy_module.optimize_demand_async = failing_optimizer
+        results = controller.run_async(controller.optimize_energy_usage_async(timeout=30))
+        self.assertIsInstance(results["energy"], RuntimeError)  # Reported, not raised
+        self.assertNotIn("lighting", results)  # Nothing to apply without a schedule
+
+        async def stuck_optimizer(*args):
+            await asyncio.sleep(5)
+        controller._energy_module.optimize_demand_async = stuck_optimizer
+        results = controller.run_async(controller.optimize_energy_usage_async(timeout=0.05))
+        self.assertIsInstance(results["energy"], asyncio.TimeoutError)
+        SmartCityController.discard_instance("demand")
+
+    def test_31_scenario_runner(self):
+        """Tests scenario file parsing and the headless runner: isolation, error capture, suppression and the report."""
+        definitions = [
+            {"name": "fleet", "repeat": 2, "steps": [["manage_transport", "bus"], "status_summary"]},
+            {"name": "broken", "steps": [{"call": "run_simulation", "kwargs": {"hours": 1}}, "status_summary"]},
+            {"name": "denied", "district": "north", "steps": [["request_sensitive_energy_data", "Citizen"]]},
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "what_if.jsonl")
+            with open(path, "w") as file:
+                file.writelines(json.dumps(definition) + "\n" for definition in definitions)
+            scenarios = load_scenarios(path)
+        self.assertEqual([scenario.name for scenario in scenarios], ["fleet#1", "fleet#2", "broken", "denied"])
+        self.assertEqual(scenarios[0].steps[0], ("manage_transport", ("bus",), {}))
+        for bad in ({"name": "x", "steps": ["serve_metrics"]}, {"name": "x", "steps": ["open_sensor_ring"]},
+                    {"name": "x", "steps": ["no_such_call"]}, {"steps": []}):
+            with self.assertRaises(ScenarioError):
+                parse_scenarios([bad])
+        with self.assertRaises(ScenarioError):
+            parse_scenarios([{"name": "x", "steps": []}] * 2)
+
+        sinks = city_event_log.sinks
+        report = ScenarioRunner(workers=1).run(scenarios)
+        self.assertIs(city_event_log.sinks, sinks)
+        fleet, _, broken, denied = report.results
+        self.assertEqual(fleet["summary"]["vehicles"]["bus"], 1)  # Each scenario starts from a fresh controller
+        self.assertEqual(report.results[1]["steps"][1]["result"]["vehicles"]["bus"], 1)
+        self.assertEqual(broken["status"], "failed")
+        self.assertEqual(len(broken["steps"]), 1)  # Stopped at the failing step
+        self.assertIn("TypeError", broken["steps"][0]["error"])
+        self.assertEqual((denied["summary"]["district"], denied["warnings"]), ("north", 1))
+        self.assertEqual([result["name"] for result in report.failed], ["broken"])
+        self.assertEqual(report.summary()["scenarios"], 4)
+        self.assertEqual(report.call_stats()["manage_transport"]["count"], 2)
+        self.assertNotIn(("scenario", "denied"), SmartCityController.registered_keys())
+        self.assertIn("FAILED broken", report.format())
+
+        def broken_summary(controller):
+            raise RuntimeError("summary unavailable")
+        original = SmartCityController.status_summary
+        SmartCityController.status_summary = broken_summary
+        try:
+            result = run_scenario(Scenario("no-summary", [("manage_transport", ("bus",), {})]))
+        finally:
+            SmartCityController.status_summary = original
+        self.assertEqual((result["status"], result["summary"]), ("failed", {"error": "RuntimeError: summary unavailable"}))
+
+        parallel = ScenarioRunner(workers=2).run([Scenario(f"p{i}", [("manage_transport", ("taxi",), {})]) for i in range(4)])
+        self.assertEqual([result["name"] for result in parallel.results], ["p0", "p1", "p2", "p3"])
+        self.assertTrue(all(result["pid"] != os.getpid() for result in parallel.results))
+
+    def test_32_event_bus(self):
+        """Tests the event bus: wildcard routing, batching, async delivery, failure isolation, stats and module wiring."""
+        bus = EventBus(workers=2)
+        seen = []
+        bus.subscribe("energy.#", lambda message: seen.append(("any", message.topic)))
+        star = bus.subscribe("*.feeders.*", lambda message: seen.append(("star", message.topic)))
+        batches = []
+        bus.subscribe("transport.vehicle.*", batches.append, batch=True)
+        self.assertEqual(bus.publish("energy.feeders.over_capacity", feeders=[3]), 2)
+        self.assertEqual(bus.publish("energy"), 1)  # "#" also matches zero words
+        self.assertEqual(bus.publish("lighting.feeders"), 0)
+        self.assertEqual(seen, [("any", "energy.feeders.over_capacity"), ("star", "energy.feeders.over_capacity"),
+                                ("any", "energy")])
+        self.assertTrue(star.unsubscribe())
+        self.assertEqual(bus.subscribers("energy.feeders.x")[0].pattern, "energy.#")
+        with self.assertRaises(ValueError):
+            bus.subscribe("energy.#.x", print)
+
+        with bus.batched():
+            for number in range(3):
+                bus.publish("transport.vehicle.created", vehicle_id=number)
+            self.assertEqual(batches, [])  # Held until the block ends
+        self.assertEqual([[message.payload["vehicle_id"] for message in batch] for batch in batches], [[0, 1, 2]])
+
+        received, threads = [], set()
+
+        def slow(message):
+            threads.add(threading.current_thread().name)
+            received.append(message.payload["n"])
+        bus.subscribe("sensor.reading", slow, asynchronous=True)
+        bus.subscribe("sensor.reading", lambda message: 1 / 0)
+        logged = len(city_event_log.recent(kind="bus.subscriber_failed"))
+        sinks = city_event_log.set_sinks(NullSink())
+        try:
+            for number in range(50):
+                bus.publish("sensor.reading", n=number)
+            self.assertTrue(bus.join(timeout=5))
+        finally:
+            city_event_log.set_sinks(*sinks)
+        failures = city_event_log.recent(kind="bus.subscriber_failed")
+        self.assertEqual(len(failures) - logged, 50)  # Logged, never raised to the publisher
+        self.assertIn("division by zero", failures[-1].message)
+        self.assertEqual(received, list(range(50)))  # Publish order is kept per subscription
+        self.assertTrue(all(name.startswith("event-bus") for name in threads))
+        stats = bus.stats("sensor")["sensor.reading"]
+        self.assertEqual((stats["published"], stats["delivered"], stats["errors"]), (50, 50, 50))
+        self.assertGreaterEqual(stats["max_lag"], 0.0)
+        bus.close()
+
+        trie = TopicTrie()
+        trie.insert("a.*.c", "x")
+        trie.remove("a.*.c", "x")
+        self.assertEqual(trie.root.children, {})  # Empty branches are pruned
+
+        controller = SmartCityController.for_district("bus")
+        topics = []
+        controller.bus.subscribe("#", lambda message: topics.append(message.topic))
+        controller.manage_transport("bus")
+        controller.request_sensitive_energy_data("Admin")
+        self.assertEqual(topics, ["transport.vehicle.created", "energy.sensitive_data.requested"])
+        self.assertEqual(controller.event_bus_stats("transport")["transport.vehicle.created"]["published"], 1)
+
+        lighting = controller._lighting_module
+        lighting.add_street_lights([(0.0, 0.0), (1.0, 0.0)])
+        lighting.enable_adaptive_control()
+        lighting.run_control_tick()
+        controller.bus.publish("transport.traffic.cycle", now=90.0, queued_per_road=lighting.TRAFFIC_SATURATION)
+        self.assertEqual(list(lighting.controller.traffic), [255, 255])  # Lighting reacts to transport congestion
+        self.assertEqual(lighting.run_control_tick(), [0, 1])  # Still an incremental tick
+        controller.bus.publish("transport.traffic.cycle", now=180.0, queued_per_road=lighting.TRAFFIC_SATURATION * 2)
+        self.assertEqual(lighting.run_control_tick(), [])  # Same saturated level: nothing marked dirty
+        SmartCityController.discard_instance("bus")
+
 if __name__ == '__main__':
     # The main application runs a demonstration, the test file runs unit tests.
     print("Running Unit Tests for SmartCity System Design Patterns...")